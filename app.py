@@ -1,5 +1,6 @@
 import streamlit as st
 from src.models.rag_model import RAGModel
+from src.utils.chat_history import ChatHistory
 import logging
 
 # Configure logging
@@ -296,7 +297,9 @@ st.markdown("""
 if 'rag_model' not in st.session_state:
     st.session_state.rag_model = None
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = ChatHistory()
+if 'history_pages' not in st.session_state:
+    st.session_state.history_pages = 1
 if 'question' not in st.session_state:
     st.session_state.question = ""
 
@@ -315,39 +318,20 @@ def initialize_model():
 
 
 def display_chat_history():
-    """Display the chat history with source documents."""
-    for message in st.session_state.chat_history:
-        role = message["role"]
-        content = message["content"]
-        
-        if role == "user":
-            st.markdown(f"""
-                <div class="message-group user-group">
-                    <div class="message">
-                        <div class="avatar user-avatar">👤</div>
-                        <div class="content">{content}</div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-                <div class="message-group assistant-group">
-                    <div class="message">
-                        <div class="avatar assistant-avatar">🤖</div>
-                        <div class="content">{content}</div>
-                    </div>
-            """, unsafe_allow_html=True)
-            
-            if "sources" in message and message["sources"]:
-                st.markdown("""
-                    <div class="source-document">
-                        <p>📚 Sources Referenced</p>
-                """, unsafe_allow_html=True)
-                for source in message["sources"]:
-                    st.markdown(f"• {source}")
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            st.markdown("</div>", unsafe_allow_html=True)
+    """Display the newest pages of the chat history with source documents."""
+    history = st.session_state.chat_history
+    pages = st.session_state.history_pages
+    if history.has_older(pages):
+        if st.button("Load older messages", use_container_width=True):
+            st.session_state.history_pages += 1
+            st.rerun()
+    st.markdown(history.render(pages), unsafe_allow_html=True)
+    # Measuring walks the whole history, so only do it when it is logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"Chat history: {len(history)} exchanges, "
+            f"{history.memory_bytes()} bytes, {history.dropped} dropped"
+        )
 
 
 def handle_question():
@@ -357,10 +341,7 @@ def handle_question():
         st.session_state.question = ""
         
         # Add user message
-        st.session_state.chat_history.append({
-            "role": "user",
-            "content": question
-        })
+        st.session_state.chat_history.add_question(question)
         
         try:
             # Get the answer
@@ -368,11 +349,7 @@ def handle_question():
             
             if answer:
                 # Add assistant's response
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": answer,
-                    "sources": sources
-                })
+                st.session_state.chat_history.set_answer(answer, sources)
             else:
                 st.error("I couldn't generate an answer. Please try rephrasing your question.")
         except Exception as e:
@@ -405,7 +382,7 @@ def main():
     else:
         # Chat container
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-        if not st.session_state.chat_history:
+        if not len(st.session_state.chat_history):
             st.markdown("""
                 <div class="empty-state">
                     👋 Hi! I'm ready to help you with UDST policies.<br>
@@ -425,7 +402,8 @@ def main():
         )
         st.markdown('<div class="clear-button">', unsafe_allow_html=True)
         if st.button("Clear", use_container_width=True):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
+            st.session_state.history_pages = 1
             st.rerun()
         st.markdown('</div></div></div>', unsafe_allow_html=True)
 
@@ -0,0 +1,116 @@
+"""Per-rerun render cost and per-session memory of the chat history: the
+former unbounded list of message dicts against the bounded, windowed
+ChatHistory used by app.py."""
+import argparse
+import time
+from typing import Dict, List
+import logging
+
+from src.utils.chat_history import ChatHistory, deep_size, render_exchange
+from benchmarks.common import run_metadata, write_results
+
+
+logger = logging.getLogger(__name__)
+
+SOURCES = [
+    f"https://www.udst.edu.qa/about-udst/institutional-excellence-ie/"
+    f"udst-policies-and-procedures/policy-{i}"
+    for i in range(12)
+]
+
+
+def make_exchange(i: int):
+    """A question, a typical-length answer and three sources."""
+    question = f"What does the policy say about case number {i}?"
+    answer = (f"According to the policy, case {i} is handled as follows. " * 25).strip()
+    return question, answer, [SOURCES[(i + k) % len(SOURCES)] for k in range(3)]
+
+
+def render_list(history: List[Dict]) -> int:
+    """Format every message the way the former display loop did; returns
+    the number of st.markdown elements it emitted."""
+    elements = 0
+    for message in history:
+        if message["role"] == "user":
+            render_exchange((message["content"], None, ()))
+            elements += 1
+        else:
+            render_exchange(("", message["content"], tuple(message["sources"])))
+            elements += 4 + len(message["sources"])
+    return elements
+
+
+def run(exchanges: int = 500, reruns: int = 50) -> Dict:
+    """
+    Fill both histories with the same exchanges and time a rerun
+
+    Args:
+        exchanges (int): Questions asked in the session
+        reruns (int): Reruns timed after the last question
+
+    Returns:
+        Dict: Memory, render time per rerun and elements per rerun
+    """
+    messages: List[Dict] = []
+    history = ChatHistory()
+    for i in range(exchanges):
+        question, answer, sources = make_exchange(i)
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": answer, "sources": sources})
+        history.add_question(question)
+        history.set_answer(answer, sources)
+
+    start = time.perf_counter()
+    for _ in range(reruns):
+        elements = render_list(messages)
+    list_ms = (time.perf_counter() - start) * 1000 / reruns
+
+    history.render()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        history.render()
+    windowed_ms = (time.perf_counter() - start) * 1000 / reruns
+
+    return {
+        'exchanges': exchanges,
+        'list': {
+            'kept_exchanges': exchanges,
+            'memory_kb': deep_size(messages) / 1024,
+            'rerun_ms': list_ms,
+            'elements': elements,
+        },
+        'windowed': {
+            'kept_exchanges': len(history),
+            'memory_kb': history.memory_bytes() / 1024,
+            'rerun_ms': windowed_ms,
+            'elements': 1,
+        },
+    }
+
+
+def print_table(results: Dict):
+    print(f"{'history':>9} {'kept':>5} {'memory_kb':>10} {'rerun_ms':>9} {'elements':>8}")
+    for name in ('list', 'windowed'):
+        row = results[name]
+        print(
+            f"{name:>9} {row['kept_exchanges']:>5} {row['memory_kb']:>10.1f} "
+            f"{row['rerun_ms']:>9.3f} {row['elements']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--exchanges", type=int, default=500)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.exchanges, args.reruns)
+    print_table(results)
+    if args.output:
+        write_results({'chat_history': results, 'meta': run_metadata()}, args.output)
+
+
+if __name__ == "__main__":
+    main()
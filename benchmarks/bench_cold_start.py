@@ -0,0 +1,93 @@
+"""First-query against steady-state retrieval latency of a fresh process, with
+and without the start-up warm-up."""
+import argparse
+import multiprocessing
+import statistics
+import time
+from typing import Dict
+import logging
+
+from benchmarks.bench_query import build_model
+from benchmarks.common import load_questions, run_metadata, write_results
+
+
+logger = logging.getLogger(__name__)
+
+
+def _measure(embedder_kind: str, warm_up: bool, queries: int, results):
+    """Start like a serving process, then time the first and later queries."""
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    rag, _ = build_model(embedder_kind)
+    rag.config.SERVING_WARMUP = warm_up
+    rag.warm_up()
+    startup_s = time.perf_counter() - start
+
+    questions = [q['question'] for q in load_questions()]
+    timings = []
+    for i in range(queries + 1):
+        start = time.perf_counter()
+        rag.get_relevant_context(questions[i % len(questions)])
+        timings.append((time.perf_counter() - start) * 1000)
+    steady_ms = statistics.median(timings[1:])
+    results.put({
+        'startup_s': startup_s,
+        'first_query_ms': timings[0],
+        'steady_query_ms': steady_ms,
+        'first_over_steady': timings[0] / steady_ms,
+    })
+
+
+def run(embedder_kind: str = "auto", queries: int = 20) -> Dict:
+    """
+    Measure each mode in a fresh spawned process
+
+    Args:
+        embedder_kind (str): See ``load_embedder``
+        queries (int): Queries after the first one
+
+    Returns:
+        Dict: Start-up time, first and median later latency per mode
+    """
+    context = multiprocessing.get_context("spawn")
+    modes = {}
+    for name, warm_up in (('cold', False), ('warm_up', True)):
+        results = context.Queue()
+        process = context.Process(
+            target=_measure, args=(embedder_kind, warm_up, queries, results)
+        )
+        process.start()
+        modes[name] = results.get()
+        process.join()
+    _, embedder_name = build_model(embedder_kind)
+    return {'embedder': embedder_name, 'modes': modes}
+
+
+def print_table(results: Dict):
+    print(f"{'mode':>8} {'startup_s':>9} {'first_ms':>9} {'steady_ms':>9} {'ratio':>6}")
+    for name, row in results['modes'].items():
+        print(
+            f"{name:>8} {row['startup_s']:>9.2f} {row['first_query_ms']:>9.1f} "
+            f"{row['steady_query_ms']:>9.1f} {row['first_over_steady']:>6.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.embedder, args.queries)
+    print_table(results)
+    if args.output:
+        write_results(
+            {'cold_start': results, 'meta': run_metadata(embedder=results['embedder'])},
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Query embedding latency under concurrent load: p50/p99 per number of
+simultaneous queries, with and without the per-process inference lock."""
+import argparse
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Sequence
+import logging
+
+from src.config.config import Config
+from src.embeddings import embedder as embedder_module
+from benchmarks.common import (
+    load_embedder,
+    load_questions,
+    run_metadata,
+    summarize,
+    timer,
+    write_results,
+)
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ("locked", "unlocked")
+
+
+def run_level(embedder, questions: List[str], concurrency: int, rounds: int) -> Dict:
+    """
+    Fire ``concurrency`` queries at once, ``rounds`` times
+
+    Returns:
+        Dict: Latency percentiles and throughput for this level
+    """
+    samples: List[float] = []
+    barrier = threading.Barrier(concurrency)
+
+    def worker(offset: int):
+        for round_index in range(rounds):
+            question = questions[(offset + round_index * concurrency) % len(questions)]
+            barrier.wait()
+            with timer(samples):
+                embedder.generate_embedding(question)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,)) for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = summarize(samples)
+    result['queries_per_s'] = len(samples) / elapsed
+    return result
+
+
+def run(
+    embedder_kind: str = "auto",
+    levels: Sequence[int] = (1, 2, 4, 8, 16),
+    rounds: int = 10,
+    modes: Sequence[str] = MODES
+) -> Dict:
+    """
+    Measure query embedding latency against the number of concurrent queries
+
+    Args:
+        embedder_kind (str): See ``load_embedder``
+        levels (Sequence[int]): Numbers of simultaneous queries
+        rounds (int): Queries per thread at each level
+        modes (Sequence[str]): "locked" serializes forward passes through
+            the process-wide inference lock, "unlocked" lets them overlap
+
+    Returns:
+        Dict: Results per mode and concurrency level
+    """
+    embedder, embedder_name = load_embedder(embedder_kind)
+    questions = [q['question'] for q in load_questions()]
+    embedder.warm_up()
+
+    results = {}
+    for mode in modes:
+        embedder._lock = (
+            embedder_module._INFERENCE_LOCK if mode == "locked" else nullcontext()
+        )
+        results[mode] = {
+            str(level): run_level(embedder, questions, level, rounds)
+            for level in levels
+        }
+    return {
+        'embedder': embedder_name,
+        'torch_num_threads': Config.TORCH_NUM_THREADS,
+        'torch_num_interop_threads': Config.TORCH_NUM_INTEROP_THREADS,
+        'rounds': rounds,
+        'modes': results,
+    }
+
+
+def print_table(results: Dict):
+    print(f"{'mode':>9} {'conc':>5} {'p50_ms':>9} {'p99_ms':>9} {'qps':>8}")
+    for mode, levels in results['modes'].items():
+        for level, row in levels.items():
+            print(
+                f"{mode:>9} {level:>5} {row['p50_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['queries_per_s']:>8.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(
+        args.embedder,
+        [int(level) for level in args.levels.split(",")],
+        args.rounds,
+        args.modes.split(","),
+    )
+    print_table(results)
+    if args.output:
+        write_results(
+            {'concurrency': results, 'meta': run_metadata(embedder=results['embedder'])},
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Crawl time over a generated local policy site with simulated server latency:
+the sequential POLICY_URLS scraper against the concurrent crawler at several
+worker counts, with the pages actually fetched."""
+import argparse
+import functools
+import os
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence
+import logging
+
+from src.scrapers.crawler import PolicyCrawler
+from src.scrapers.policy_scraper import PolicyScraper
+from benchmarks.common import run_metadata, write_results
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_site(root: str, pages: int, per_index: int = 20):
+    """Index pages that each list ``per_index`` policies and the next index
+    page, with every policy linking to its neighbours under other spellings."""
+    os.makedirs(os.path.join(root, "policies"), exist_ok=True)
+    indexes = (pages + per_index - 1) // per_index
+    for n in range(indexes):
+        links = [
+            f'<a href="policy-{i}.html">Policy {i}</a>'
+            for i in range(n * per_index, min(pages, (n + 1) * per_index))
+        ]
+        if n + 1 < indexes:
+            links.append(f'<a href="index-{n + 1}.html">Next</a>')
+        name = "index.html" if n == 0 else f"index-{n}.html"
+        with open(os.path.join(root, "policies", name), 'w', encoding='utf-8') as f:
+            f.write(" ".join(links))
+    for i in range(pages):
+        body = f"Policy {i} applies to all students and staff. " * 40
+        neighbours = " ".join(
+            f'<a href="./policy-{j}.html#section-2">See {j}</a>'
+            f'<a href="/policies/policy-{j}.html?utm_source=related">Also {j}</a>'
+            for j in (i - 1, i + 1) if 0 <= j < pages
+        )
+        with open(os.path.join(root, "policies", f"policy-{i}.html"), 'w', encoding='utf-8') as f:
+            f.write(f"<main>{body}</main>{neighbours}")
+
+
+def serve(root: str, latency_ms: float) -> ThreadingHTTPServer:
+    """Serve ``root`` in a thread, sleeping ``latency_ms`` per request."""
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory=root)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(pages: int = 100, latency_ms: float = 20.0, workers: Sequence[int] = (1, 4, 8)) -> Dict:
+    """
+    Crawl the generated site once per configuration
+
+    Args:
+        pages (int): Policy pages on the site
+        latency_ms (float): Server time per request
+        workers (Sequence[int]): Crawler worker counts
+
+    Returns:
+        Dict: Seconds, pages fetched and documents per configuration
+    """
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_site(tmp, pages)
+        server = serve(tmp, latency_ms)
+        base = f"http://127.0.0.1:{server.server_address[1]}/policies"
+        try:
+            scraper = PolicyScraper()
+            scraper.store = None
+            scraper.config.CRAWL_DELAY_S = 0.0
+            scraper.config.CRAWL_RESPECT_ROBOTS = False
+            scraper.config.CRAWL_MAX_DEPTH = pages
+            scraper.config.CRAWL_MAX_PAGES = 10 * pages
+
+            urls = [f"{base}/policy-{i}.html" for i in range(pages)]
+            start = time.perf_counter()
+            documents = sum(1 for url in urls if scraper.fetch_document(url))
+            rows['sequential'] = {
+                'seconds': time.perf_counter() - start,
+                'fetched': pages,
+                'documents': documents,
+            }
+
+            for count in workers:
+                scraper.config.CRAWL_WORKERS = count
+                scraper.config.CRAWL_MAX_PER_HOST = count
+                crawler = PolicyCrawler(
+                    scraper, seeds=[f"{base}/index.html"] + [
+                        f"{base}/index-{n}.html" for n in range(1, (pages + 19) // 20)
+                    ],
+                    state_path=os.path.join(tmp, f"crawl_state_{count}.json")
+                )
+                start = time.perf_counter()
+                documents = sum(1 for _ in crawler.crawl())
+                rows[f'crawl-{count}'] = {
+                    'seconds': time.perf_counter() - start,
+                    'fetched': len(crawler.done),
+                    'documents': documents,
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+    return {'pages': pages, 'latency_ms': latency_ms, 'runs': rows}
+
+
+def print_table(results: Dict):
+    print(f"{results['pages']} policy pages, {results['latency_ms']:.0f} ms per request")
+    print(f"{'mode':>11} {'seconds':>8} {'fetched':>8} {'documents':>9} {'pages/s':>8}")
+    for name, row in results['runs'].items():
+        print(
+            f"{name:>11} {row['seconds']:>8.2f} {row['fetched']:>8} "
+            f"{row['documents']:>9} {row['fetched'] / row['seconds']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.pages, args.latency_ms, [int(w) for w in args.workers.split(",")])
+    print_table(results)
+    if args.output:
+        write_results({'crawl': results, 'meta': run_metadata()}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Document store size and rebuild cost over src/data/raw: compressed bytes per
+codec, and cleaning plus chunking against reading stored chunk spans."""
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, Sequence
+import logging
+
+from src.config.config import Config
+from src.utils.document_store import DocumentStore, content_hash
+from src.utils.text_processor import TextProcessor
+from benchmarks.bench_ingest import load_raw_documents
+from benchmarks.common import run_metadata, write_results
+
+
+logger = logging.getLogger(__name__)
+
+
+def store_size(path: str) -> int:
+    """Bytes of all files under a store directory."""
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, files in os.walk(path) for name in files
+    )
+
+
+def run(codecs: Sequence[str] = ("gzip", "zstd")) -> Dict:
+    """
+    Fill a fresh store per codec, then rebuild from it
+
+    Args:
+        codecs (Sequence[str]): Compression of the blobs
+
+    Returns:
+        Dict: Bytes stored (all, and the raw blobs alone) and
+            first/unchanged rebuild time per codec
+    """
+    documents = load_raw_documents()
+    raw_bytes = sum(len(d['content'].encode('utf-8')) for d in documents)
+    processor = TextProcessor(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+    rows = {}
+    for codec in codecs:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = DocumentStore(tmp, compression=codec)
+            start = time.perf_counter()
+            for doc in documents:
+                store.put_document(doc['url'], doc['content'], doc['filepath'])
+                clean = processor.clean_text(doc['content'])
+                store.put_chunks(
+                    doc['url'], clean, processor.split_clean_text(clean),
+                    processor.chunk_size, processor.chunk_overlap
+                )
+            store.save()
+            first_s = time.perf_counter() - start
+
+            store = DocumentStore(tmp, compression=codec)
+            start = time.perf_counter()
+            chunks = 0
+            for doc in documents:
+                chunks += len(store.get_chunks(
+                    doc['url'], content_hash(doc['content']),
+                    processor.chunk_size, processor.chunk_overlap
+                ))
+            unchanged_s = time.perf_counter() - start
+            raw_blobs = store_size(os.path.join(tmp, "raw"))
+            rows[codec] = {
+                'stored_bytes': store_size(tmp),
+                'raw_blob_bytes': raw_blobs,
+                'raw_ratio': raw_bytes / raw_blobs,
+                'first_build_s': first_s,
+                'unchanged_rebuild_s': unchanged_s,
+                'chunks': chunks,
+            }
+    return {'documents': len(documents), 'raw_bytes': raw_bytes, 'codecs': rows}
+
+
+def print_table(results: Dict):
+    print(f"raw: {results['raw_bytes']} bytes in {results['documents']} documents")
+    print(f"{'codec':>6} {'stored':>9} {'raw_blobs':>9} {'raw_ratio':>9} {'first_s':>8} {'unchanged_s':>11}")
+    for codec, row in results['codecs'].items():
+        print(
+            f"{codec:>6} {row['stored_bytes']:>9} {row['raw_blob_bytes']:>9} "
+            f"{row['raw_ratio']:>9.2f} "
+            f"{row['first_build_s']:>8.3f} {row['unchanged_rebuild_s']:>11.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codecs", default="gzip,zstd")
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.codecs.split(","))
+    print_table(results)
+    if args.output:
+        write_results({'document_store': results, 'meta': run_metadata()}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Embedding backends: torch vs ONNX Runtime (fp32 and int8) latency,
+throughput and agreement with the torch embeddings."""
+import argparse
+import os
+import time
+from typing import Dict, List, Sequence
+import logging
+
+from src.config.config import Config
+from src.utils.text_processor import TextProcessor
+from src.embeddings.onnx_backend import (
+    OnnxEncoder,
+    compare_encoders,
+    export_onnx,
+    onnx_model_path,
+)
+from benchmarks.bench_ingest import load_raw_documents
+from benchmarks.common import (
+    load_questions,
+    run_metadata,
+    summarize,
+    timer,
+    write_results,
+)
+
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_chunk_texts(limit: int) -> List[str]:
+    """Chunk texts from the raw corpus, as embedded during ingest."""
+    processor = TextProcessor(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+    texts = []
+    for doc in load_raw_documents():
+        texts.extend(
+            chunk['content'] for chunk in processor.process_document(
+                content=doc['content'],
+                metadata={'source_url': doc['url'], 'source_file': doc['filepath']}
+            )
+        )
+    return texts[:limit]
+
+
+def build_encoder(backend: str, model_name: str, onnx_dir: str, threads: int):
+    if backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, device="cpu")
+
+    quantized = backend == "onnx-int8"
+    if not os.path.exists(onnx_model_path(onnx_dir, quantized)):
+        export_onnx(model_name, onnx_dir, quantize=quantized)
+    return OnnxEncoder(onnx_dir, quantized=quantized, intra_op_threads=threads)
+
+
+def run(
+    backends: Sequence[str] = BACKENDS,
+    model_name: str = Config.EMBEDDING_MODEL,
+    onnx_dir: str = Config.ONNX_MODEL_DIR,
+    threads: int = 0,
+    batch_size: int = 32,
+    chunk_limit: int = 256,
+    repeat: int = 3
+) -> Dict:
+    """
+    Compare embedding backends on the labeled questions and corpus chunks
+
+    Args:
+        backends (Sequence[str]): Any of "torch", "onnx", "onnx-int8"
+        model_name (str): SentenceTransformer name or path
+        onnx_dir (str): Where the exported models live
+        threads (int): Intra-op threads for every backend, 0 for defaults
+        batch_size (int): Texts per forward pass for throughput
+        chunk_limit (int): Chunks embedded for throughput
+        repeat (int): Passes over the questions for latency
+
+    Returns:
+        Dict: Latency percentiles, throughput and agreement per backend
+    """
+    questions = [q['question'] for q in load_questions()]
+    chunks = load_chunk_texts(chunk_limit)
+
+    reference = None
+    results = {}
+    for backend in backends:
+        encoder = build_encoder(backend, model_name, onnx_dir, threads)
+        if reference is None:
+            reference = encoder
+        encoder.encode(questions[:2], show_progress_bar=False)
+
+        latency = []
+        for _ in range(repeat):
+            for question in questions:
+                with timer(latency):
+                    encoder.encode(question, show_progress_bar=False)
+
+        start = time.perf_counter()
+        encoder.encode(chunks, batch_size=batch_size, show_progress_bar=False)
+        elapsed = time.perf_counter() - start
+
+        results[backend] = {
+            'query_latency': summarize(latency),
+            'chunks_per_s': len(chunks) / elapsed,
+            'agreement': compare_encoders(reference, encoder, questions),
+        }
+    return {
+        'model': model_name,
+        'threads': threads,
+        'batch_size': batch_size,
+        'chunks': len(chunks),
+        'reference': backends[0],
+        'backends': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--onnx-dir", default=Config.ONNX_MODEL_DIR)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = {'embedding_backends': run(
+        args.backends.split(","), args.model, args.onnx_dir, args.threads,
+        args.batch_size, args.chunks, args.repeat
+    )}
+    results['meta'] = run_metadata(embedder=args.model)
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
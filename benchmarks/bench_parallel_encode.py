@@ -0,0 +1,126 @@
+"""Full-rebuild encoding throughput against the number of worker processes,
+each with its own model copy and an even share of the cores."""
+import argparse
+import os
+import time
+from typing import Dict, List, Sequence
+import logging
+
+from src.config.config import Config
+from src.embeddings.parallel_encoder import ParallelEncoder
+from src.utils.text_processor import TextProcessor
+from benchmarks.bench_ingest import load_raw_documents
+from benchmarks.common import (
+    HashingEncoder,
+    load_embedder,
+    run_metadata,
+    write_results,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_texts(copies: int = 1) -> List[str]:
+    """Chunk texts of the raw corpus, repeated to make a larger rebuild."""
+    processor = TextProcessor(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+    texts = [
+        chunk['content']
+        for doc in load_raw_documents()
+        for chunk in processor.process_document(
+            content=doc['content'],
+            metadata={'source_url': doc['url'], 'source_file': doc['filepath']}
+        )
+    ]
+    return texts * copies
+
+
+def run(
+    embedder_kind: str = "auto",
+    workers: Sequence[int] = (1, 2, 4),
+    copies: int = 1
+) -> Dict:
+    """
+    Encode the corpus with 0 (in-process) and each number of workers
+
+    Worker start-up (process spawn and model load) is timed separately
+    from encoding, since a rebuild pays it once.
+
+    Args:
+        embedder_kind (str): See ``load_embedder``; "hashing" gives every
+            worker a HashingEncoder
+        workers (Sequence[int]): Numbers of worker processes
+        copies (int): Times the corpus is repeated
+
+    Returns:
+        Dict: Throughput per number of workers
+    """
+    texts = load_texts(copies)
+    embedder, embedder_name = load_embedder(embedder_kind)
+    factory = HashingEncoder if embedder_name == "hashing" else None
+
+    start = time.perf_counter()
+    embedder.generate_embeddings(texts)
+    baseline_s = time.perf_counter() - start
+    rows = {'0': {'encode_s': baseline_s, 'chunks_per_s': len(texts) / baseline_s}}
+
+    for count in workers:
+        encoder = ParallelEncoder(count, model_factory=factory)
+        start = time.perf_counter()
+        with encoder:
+            # A tiny encode waits for every worker to finish loading
+            encoder.encode(texts[:count])
+            startup_s = time.perf_counter() - start
+            start = time.perf_counter()
+            encoder.encode(texts)
+            encode_s = time.perf_counter() - start
+        rows[str(count)] = {
+            'threads_per_worker': encoder.threads_per_worker,
+            'startup_s': startup_s,
+            'encode_s': encode_s,
+            'chunks_per_s': len(texts) / encode_s,
+            'speedup': baseline_s / encode_s,
+        }
+    return {
+        'embedder': embedder_name,
+        'cpu_count': os.cpu_count(),
+        'chunks': len(texts),
+        'workers': rows,
+    }
+
+
+def print_table(results: Dict):
+    print(f"{'workers':>7} {'threads':>7} {'startup_s':>9} {'encode_s':>9} {'chunks/s':>9} {'speedup':>7}")
+    for count, row in results['workers'].items():
+        print(
+            f"{count:>7} {row.get('threads_per_worker', '-'):>7} "
+            f"{row.get('startup_s', 0.0):>9.2f} {row['encode_s']:>9.2f} "
+            f"{row['chunks_per_s']:>9.1f} {row.get('speedup', 1.0):>7.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--copies", type=int, default=1,
+                        help="Repeat the corpus to simulate a larger rebuild")
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(
+        args.embedder,
+        [int(count) for count in args.workers.split(",")],
+        args.copies,
+    )
+    print_table(results)
+    if args.output:
+        write_results(
+            {'parallel_encode': results, 'meta': run_metadata(embedder=results['embedder'])},
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Startup time and memory of N serving workers: forked from one loaded model
+(copy-on-write) against each worker loading its own."""
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, List, Sequence
+import logging
+
+from src.models.rag_model import WARMUP_QUERY
+from src.serving.prefork import PreforkServer, load_shared_model
+from benchmarks.bench_query import build_model
+from benchmarks.common import run_metadata, write_results
+
+
+logger = logging.getLogger(__name__)
+
+
+def process_memory(pids: List[int]) -> Dict[str, float]:
+    """
+    Summed memory of processes from /proc/<pid>/smaps_rollup, in MB
+
+    RSS counts shared pages once per process; PSS splits them between
+    the processes sharing them, so its sum is the real footprint.
+    """
+    totals = {'rss_mb': 0.0, 'pss_mb': 0.0, 'private_mb': 0.0}
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {
+                line.split(':')[0]: int(line.split()[1])
+                for line in f if line.split()[-1] == 'kB'
+            }
+        totals['rss_mb'] += fields['Rss'] / 1024
+        totals['pss_mb'] += fields['Pss'] / 1024
+        totals['private_mb'] += (
+            fields['Private_Clean'] + fields['Private_Dirty']
+        ) / 1024
+    return totals
+
+
+def _ready_then_wait(rag, write_fd: int):
+    """Worker body: answer one query like a first request, report, idle."""
+    rag.get_relevant_context(WARMUP_QUERY)
+    os.write(write_fd, b'.')
+    while True:
+        signal.pause()
+
+
+def _independent_worker(embedder_kind: str, ready):
+    logging.disable(logging.INFO)
+    rag, _ = build_model(embedder_kind)
+    load_shared_model(rag)
+    ready.put(os.getpid())
+    while True:
+        signal.pause()
+
+
+def measure_prefork(embedder_kind: str, workers: int, results):
+    """Load one model, fork the workers and put their memory once ready."""
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    rag, _ = build_model(embedder_kind)
+    load_shared_model(rag)
+    load_s = time.perf_counter() - start
+    read_fd, write_fd = os.pipe()
+    server = PreforkServer(
+        rag, "127.0.0.1", 0, workers,
+        serve=lambda rag, sock: _ready_then_wait(rag, write_fd)
+    )
+    server.start()
+    for _ in range(workers):
+        os.read(read_fd, 1)
+    ready_at = time.time()
+    memory = process_memory([os.getpid()] + server.pids)
+    server.stop()
+    results.put({'load_s': load_s, 'ready_at': ready_at, **memory})
+
+
+def measure_independent(embedder_kind: str, workers: int) -> Dict:
+    """Spawn workers that each load the model; their memory once ready."""
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    start = time.time()
+    processes = [
+        context.Process(target=_independent_worker, args=(embedder_kind, ready))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    pids = [ready.get() for _ in processes]
+    startup_s = time.time() - start
+    memory = process_memory(pids)
+    for process in processes:
+        process.terminate()
+        process.join()
+    return {'startup_s': startup_s, **memory}
+
+
+def run(embedder_kind: str = "auto", workers: Sequence[int] = (1, 2, 4)) -> Dict:
+    """
+    Start N workers both ways and measure them once all are ready
+
+    Each pre-fork launch runs in a fresh spawned process, so nothing this
+    process has loaded is shared with its workers.
+
+    Args:
+        embedder_kind (str): See ``load_embedder``
+        workers (Sequence[int]): Numbers of workers
+
+    Returns:
+        Dict: Startup time and summed RSS/PSS per mode and worker count
+    """
+    context = multiprocessing.get_context("spawn")
+    rows = {}
+    for count in workers:
+        results = context.Queue()
+        launcher = context.Process(
+            target=measure_prefork, args=(embedder_kind, count, results)
+        )
+        # Wall clock across processes: both modes pay interpreter start
+        start = time.time()
+        launcher.start()
+        prefork = results.get()
+        prefork['startup_s'] = prefork.pop('ready_at') - start
+        launcher.join()
+        rows[str(count)] = {
+            'independent': measure_independent(embedder_kind, count),
+            'prefork': prefork,
+        }
+    _, embedder_name = build_model(embedder_kind)
+    return {'embedder': embedder_name, 'cpu_count': os.cpu_count(), 'workers': rows}
+
+
+def print_table(results: Dict):
+    print(f"{'workers':>7} {'mode':>11} {'startup_s':>9} {'rss_mb':>8} {'pss_mb':>8} {'private_mb':>10}")
+    for count, modes in results['workers'].items():
+        for mode, row in modes.items():
+            print(
+                f"{count:>7} {mode:>11} {row['startup_s']:>9.2f} {row['rss_mb']:>8.1f} "
+                f"{row['pss_mb']:>8.1f} {row['private_mb']:>10.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run(args.embedder, [int(count) for count in args.workers.split(",")])
+    print_table(results)
+    if args.output:
+        write_results(
+            {'prefork': results, 'meta': run_metadata(embedder=results['embedder'])},
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Query latency per stage and end to end against the saved index."""
+import argparse
+from functools import wraps
+from typing import Dict, List
+import logging
+
+from src.models.llm_gateway import LLMGateway
+from src.models.rag_model import RAGModel
+from benchmarks.common import (
+    FakeLLMClient,
+    load_embedder,
+    load_questions,
+    run_metadata,
+    summarize,
+    timer,
+    write_results,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def instrument(obj, name: str, samples: List[float]):
+    """Record the latency of every call to ``obj.name`` into ``samples``."""
+    original = getattr(obj, name)
+
+    @wraps(original)
+    def wrapped(*args, **kwargs):
+        with timer(samples):
+            return original(*args, **kwargs)
+
+    setattr(obj, name, wrapped)
+
+
+def build_model(embedder_kind: str = "auto", llm_delay_ms: float = 0.0):
+    """Create a RAGModel on the saved index with a fake LLM client."""
+    embedder, embedder_name = load_embedder(embedder_kind)
+    rag = RAGModel(embedder=embedder, client=FakeLLMClient(llm_delay_ms))
+    # Measure the pipeline, not the production request quota
+    rag.llm = LLMGateway(rag.client, rag.tracer, rate_limit=0)
+    if not rag.index.load_index():
+        raise RuntimeError(
+            f"No saved index at {rag.config.INDEX_PATH}; build it first"
+        )
+    return rag, embedder_name
+
+
+def run(
+    embedder_kind: str = "auto",
+    repeat: int = 5,
+    llm_delay_ms: float = 800.0
+) -> Dict:
+    """
+    Time retrieval stages and the full answer path
+
+    Args:
+        embedder_kind (str): See ``load_embedder``
+        repeat (int): Passes over the question set
+        llm_delay_ms (float): Simulated LLM latency per call
+
+    Returns:
+        Dict: Latency percentiles per stage
+    """
+    rag, embedder_name = build_model(embedder_kind, llm_delay_ms)
+    questions = [q['question'] for q in load_questions()]
+
+    # Warm up lazy initialisation so it does not skew the percentiles
+    rag.get_relevant_context(questions[0])
+
+    samples = {'embed': [], 'search': [], 'context_build': [], 'retrieve': []}
+    instrument(rag.embedder, 'generate_embedding', samples['embed'])
+    search_method = 'hybrid_search' if rag.config.HYBRID_SEARCH else 'search'
+    instrument(rag.index, search_method, samples['search'])
+    instrument(rag.context_builder, 'build', samples['context_build'])
+
+    for _ in range(repeat):
+        for question in questions:
+            with timer(samples['retrieve']):
+                rag.get_relevant_context(question)
+
+    end_to_end = []
+    for question in questions:
+        with timer(end_to_end):
+            rag.get_answer_with_sources(question)
+
+    return {
+        'embedder': embedder_name,
+        'questions': len(questions),
+        'repeat': repeat,
+        'search_method': search_method,
+        'stages': {name: summarize(values) for name, values in samples.items()},
+        'end_to_end': {
+            'llm_delay_ms': llm_delay_ms,
+            'latency': summarize(end_to_end),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-delay-ms", type=float, default=800.0)
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = {'query': run(args.embedder, args.repeat, args.llm_delay_ms)}
+    results['meta'] = run_metadata(embedder=results['query']['embedder'])
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
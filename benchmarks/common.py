@@ -0,0 +1,161 @@
+"""Shared helpers for the offline benchmark suite."""
+import json
+import os
+import platform
+import subprocess
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from src.config.config import Config
+from src.retrieval.bm25_index import tokenize
+
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "data", "questions.json")
+
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer used when the real model
+    is not available offline. Tokens are hashed into a signed bag-of-words
+    vector, so timings exercise the same shapes but retrieval quality is
+    only lexical.
+    """
+    def __init__(self, dimension: int = Config.EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                h = zlib.crc32(token.encode('utf-8'))
+                vectors[row, h % self.dimension] += 1.0 if h & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+        return vectors[0] if single else vectors
+
+
+class FakeLLMClient:
+    """
+    Deterministic replacement for the Mistral client with a fixed delay,
+    exposing the ``client.chat.complete`` call RAGModel makes.
+    """
+    def __init__(self, delay_ms: float = 0.0):
+        self.delay_ms = delay_ms
+        self.calls = 0
+        self.chat = self
+
+    def complete(self, model: str, messages: List[Dict], **kwargs):
+        self.calls += 1
+        time.sleep(self.delay_ms / 1000.0)
+        question = messages[-1]["content"].rsplit("Question:", 1)[-1].strip()
+        content = f"Answer ({zlib.crc32(question.encode('utf-8')):08x})."
+
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def load_embedder(kind: str = "auto", model_name: Optional[str] = None):
+    """
+    Build a DocumentEmbedder for benchmarks
+
+    Args:
+        kind (str): "model" for the configured SentenceTransformer,
+            "hashing" for HashingEncoder, "auto" to try the model first
+        model_name (Optional[str]): SentenceTransformer to load instead of
+            the configured one
+
+    Returns:
+        Tuple of the DocumentEmbedder and the name of the encoder used
+    """
+    from src.embeddings.embedder import DocumentEmbedder
+
+    if kind in ("auto", "model"):
+        try:
+            if model_name:
+                from sentence_transformers import SentenceTransformer
+                return (
+                    DocumentEmbedder(model=SentenceTransformer(model_name)),
+                    model_name
+                )
+            return DocumentEmbedder(), Config.EMBEDDING_MODEL
+        except Exception as e:
+            if kind == "model":
+                raise
+            logger.warning(
+                f"Embedding model unavailable offline, using hashing "
+                f"encoder instead: {str(e)}"
+            )
+    return DocumentEmbedder(model=HashingEncoder()), "hashing"
+
+
+def load_questions(path: str = QUESTIONS_PATH) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@contextmanager
+def timer(samples: List[float]):
+    """Append the elapsed wall time of the block, in ms, to ``samples``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append((time.perf_counter() - start) * 1000.0)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Latency percentiles for a list of samples in milliseconds."""
+    if not samples_ms:
+        return {}
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        'n': int(len(values)),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def run_metadata(**extra) -> Dict:
+    """Describe the environment so results can be compared across commits."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = "unknown"
+    meta = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def write_results(results: Dict, output: Optional[str]):
+    """Write results as JSON to ``output``, or print them."""
+    text = json.dumps(results, indent=2)
+    if not output:
+        print(text)
+        return
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(text + "\n")
+    logger.warning(f"Wrote benchmark results to {output}")
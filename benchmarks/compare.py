@@ -0,0 +1,43 @@
+"""Compare two benchmark JSON files and print relative changes."""
+import argparse
+import json
+from typing import Dict, Iterator, Tuple
+
+
+def flatten(data: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Flag changes larger than this many percent"
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = dict(flatten(json.load(f)))
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = dict(flatten(json.load(f)))
+
+    for name in sorted(baseline.keys() & candidate.keys()):
+        if name.startswith("meta.") or not baseline[name]:
+            continue
+        change = (candidate[name] - baseline[name]) / baseline[name] * 100.0
+        flag = " <--" if abs(change) >= args.threshold else ""
+        print(
+            f"{name:55s} {baseline[name]:12.3f} -> "
+            f"{candidate[name]:12.3f} ({change:+6.1f}%){flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Retrieval quality vs speed over a parameter grid.
+
+Every (embedding profile, CHUNK_SIZE, CHUNK_OVERLAP) combination is
+re-chunked, embedded and indexed in its own worker process; each worker then
+evaluates all index types and top-k values through the batch
+``FAISSIndex.search_batch`` path and reports recall@k, MRR and latency
+against the labeled questions. ``--top-docs`` adds the two-stage
+``hierarchical_search_batch`` path for each number of documents searched,
+with 0 standing for the flat search.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+import logging
+
+import numpy as np
+
+from src.config.config import Config
+from src.utils.text_processor import TextProcessor
+from src.retrieval.faiss_index import FAISSIndex
+from benchmarks.bench_ingest import load_raw_documents
+from benchmarks.common import (
+    load_embedder,
+    load_questions,
+    run_metadata,
+    write_results,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def source_name(path: str) -> str:
+    """File name of a source path, also for paths saved on Windows."""
+    return path.replace('\\', '/').rsplit('/', 1)[-1]
+
+
+def is_relevant(result: Dict, label: Dict) -> bool:
+    """A result is relevant if it comes from an expected source file and,
+    when the label has one, contains the expected answer snippet."""
+    if source_name(result['source_file']) not in label['source_files']:
+        return False
+    snippet = label.get('answer_contains')
+    return not snippet or snippet.lower() in result['content'].lower()
+
+
+def score_rankings(
+    rankings: List[List[Dict]], labels: List[Dict], k: int
+) -> Dict[str, float]:
+    """
+    Compute recall@k and MRR@k
+
+    Recall counts the fraction of expected source files found in the top k
+    (or, for labels with an answer snippet, whether a matching chunk was
+    found). MRR uses the rank of the first relevant chunk.
+
+    Args:
+        rankings (List[List[Dict]]): Search results per question
+        labels (List[Dict]): Labeled questions
+        k (int): Cutoff
+
+    Returns:
+        Dict[str, float]: Mean recall@k and MRR@k
+    """
+    recalls = []
+    reciprocal_ranks = []
+    for results, label in zip(rankings, labels):
+        top = results[:k]
+        relevant = [is_relevant(r, label) for r in top]
+        if label.get('answer_contains'):
+            recalls.append(float(any(relevant)))
+        else:
+            found = {source_name(r['source_file']) for r in top}
+            expected = set(label['source_files'])
+            recalls.append(len(found & expected) / len(expected))
+        first = next((i for i, hit in enumerate(relevant) if hit), None)
+        reciprocal_ranks.append(0.0 if first is None else 1.0 / (first + 1))
+    return {
+        f'recall@{k}': float(np.mean(recalls)),
+        f'mrr@{k}': float(np.mean(reciprocal_ranks)),
+    }
+
+
+def evaluate_chunking(
+    profile: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    index_types: Sequence[str],
+    top_ks: Sequence[int],
+    embedder_kind: str,
+    labels: List[Dict],
+    threads: int = 1,
+    top_docs: Sequence[int] = (0,)
+) -> List[Dict]:
+    """
+    Evaluate one embedding profile and chunking configuration over all
+    index types, document cutoffs and top-k
+
+    Runs in a worker process, so everything it needs is passed in.
+
+    Returns:
+        List[Dict]: One row per (index type, top docs, top-k)
+    """
+    import torch
+    torch.set_num_threads(threads)
+    logging.disable(logging.INFO)
+
+    embedder, _ = load_embedder(
+        embedder_kind, Config.EMBEDDING_PROFILES[profile]['model']
+    )
+    processor = TextProcessor(chunk_size, chunk_overlap)
+
+    chunks = []
+    for doc in load_raw_documents():
+        chunks.extend(processor.process_document(
+            content=doc['content'],
+            metadata={'source_url': doc['url'], 'source_file': doc['filepath']}
+        ))
+
+    start = time.perf_counter()
+    embeddings_dict = embedder.embed_chunks(chunks)
+    embed_s = time.perf_counter() - start
+
+    questions = [label['question'] for label in labels]
+    start = time.perf_counter()
+    query_embeddings = embedder.generate_embeddings(questions)
+    query_embed_ms = (time.perf_counter() - start) * 1000.0 / len(questions)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type in index_types:
+            index = FAISSIndex()
+            index.config.INDEX_TYPE = index_type
+            index.config.EMBEDDING_DIMENSION = query_embeddings.shape[1]
+            index.config.INDEX_PATH = os.path.join(tmp, f"{index_type}_index")
+            index.config.SPARSE_INDEX_PATH = os.path.join(
+                tmp, f"{index_type}_index_bm25.npz"
+            )
+            start = time.perf_counter()
+            index.create_index(embeddings_dict)
+            build_s = time.perf_counter() - start
+
+            for docs in top_docs:
+                # One batched search at the largest k serves every cutoff
+                start = time.perf_counter()
+                if docs:
+                    rankings = index.hierarchical_search_batch(
+                        query_embeddings, max(top_ks), top_docs=docs
+                    )
+                else:
+                    rankings = index.search_batch(query_embeddings, max(top_ks))
+                search_ms = (time.perf_counter() - start) * 1000.0 / len(questions)
+
+                for k in top_ks:
+                    row = {
+                        'profile': profile,
+                        'dimension': int(query_embeddings.shape[1]),
+                        'chunk_size': chunk_size,
+                        'chunk_overlap': chunk_overlap,
+                        'index_type': index_type,
+                        'top_docs': docs,
+                        'top_k': k,
+                        'chunks': len(chunks),
+                        'documents': len(index.doc_sources),
+                        'embed_s': embed_s,
+                        'build_s': build_s,
+                        'query_embed_ms': query_embed_ms,
+                        'search_ms': search_ms,
+                    }
+                    row.update(score_rankings(rankings, labels, k))
+                    row['recall'] = row.pop(f'recall@{k}')
+                    row['mrr'] = row.pop(f'mrr@{k}')
+                    rows.append(row)
+    return rows
+
+
+def run(
+    profiles: Sequence[str],
+    chunk_sizes: Sequence[int],
+    chunk_overlaps: Sequence[int],
+    index_types: Sequence[str],
+    top_ks: Sequence[int],
+    embedder_kind: str = "auto",
+    workers: int = None,
+    top_docs: Sequence[int] = (0,)
+) -> List[Dict]:
+    """Evaluate the full grid, one process per profile and chunking."""
+    labels = load_questions()
+    chunkings = [
+        (profile, size, overlap)
+        for profile, size, overlap in itertools.product(
+            profiles, chunk_sizes, chunk_overlaps
+        )
+        if overlap < size
+    ]
+    workers = workers or min(len(chunkings), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    # Spawn so every worker gets a clean torch runtime
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                evaluate_chunking, profile, size, overlap, index_types,
+                top_ks, embedder_kind, labels, threads, top_docs
+            )
+            for profile, size, overlap in chunkings
+        ]
+        rows = [row for future in futures for row in future.result()]
+    return rows
+
+
+def print_table(rows: List[Dict]):
+    header = (
+        f"{'profile':>14} {'size':>5} {'ovl':>4} {'index':>6} {'docs':>4} {'k':>3} {'chunks':>6} "
+        f"{'recall':>7} {'mrr':>6} {'embed_ms':>9} {'search_ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['profile']:>14} {row['chunk_size']:>5} {row['chunk_overlap']:>4} "
+            f"{row['index_type']:>6} {row['top_docs'] or 'all':>4} {row['top_k']:>3} {row['chunks']:>6} "
+            f"{row['recall']:>7.3f} {row['mrr']:>6.3f} "
+            f"{row['query_embed_ms']:>9.2f} {row['search_ms']:>9.3f}"
+        )
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", default=Config.EMBEDDING_PROFILE,
+                        help=f"Comma-separated, from {', '.join(Config.EMBEDDING_PROFILES)}")
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[Config.CHUNK_SIZE, 500])
+    parser.add_argument("--chunk-overlaps", type=_int_list, default=[0, Config.CHUNK_OVERLAP])
+    parser.add_argument("--index-types", default="flat,hnsw,ivf")
+    parser.add_argument("--top-k", type=_int_list, default=[3, 5, Config.TOP_K_MATCHES])
+    parser.add_argument("--top-docs", type=_int_list, default=[0],
+                        help="Documents searched by the two-stage path, 0 for flat search")
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="JSON file to write (default: table only)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    rows = run(
+        args.profiles.split(","),
+        args.chunk_sizes,
+        args.chunk_overlaps,
+        args.index_types.split(","),
+        args.top_k,
+        args.embedder,
+        args.workers,
+        args.top_docs,
+    )
+    print_table(rows)
+    print(f"\nEvaluated {len(rows)} configurations in {time.perf_counter() - start:.1f}s")
+    if args.output:
+        write_results(
+            {'meta': run_metadata(embedder=args.embedder), 'grid': rows},
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Run the offline benchmark suite and emit one JSON document."""
+import argparse
+import logging
+
+from benchmarks import bench_ingest, bench_query
+from benchmarks.common import run_metadata, write_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedder", default="auto", choices=["auto", "model", "hashing"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-delay-ms", type=float, default=800.0)
+    parser.add_argument("--skip-ingest", action="store_true")
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = {}
+    if not args.skip_ingest:
+        results['ingest'] = bench_ingest.run(args.embedder)
+    results['query'] = bench_query.run(
+        args.embedder, args.repeat, args.llm_delay_ms
+    )
+    results['meta'] = run_metadata(embedder=results['query']['embedder'])
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,18 +31,103 @@ class Config:
         logger.info(f"URL: {url}")
     
     # Embedding Configuration
-    EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
-    EMBEDDING_DIMENSION = 768
+    # Named model profiles; the smaller ones trade some recall for latency
+    EMBEDDING_PROFILES = {
+        "mpnet-768": {
+            "model": "sentence-transformers/all-mpnet-base-v2",
+            "dimension": 768,
+        },
+        "minilm-l12-384": {
+            "model": "sentence-transformers/all-MiniLM-L12-v2",
+            "dimension": 384,
+        },
+        "minilm-384": {
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "dimension": 384,
+        },
+    }
+    DEFAULT_EMBEDDING_PROFILE = "mpnet-768"
+    EMBEDDING_PROFILE = os.getenv('EMBEDDING_PROFILE', DEFAULT_EMBEDDING_PROFILE)
+    if EMBEDDING_PROFILE not in EMBEDDING_PROFILES:
+        raise ValueError(
+            f"Unknown EMBEDDING_PROFILE {EMBEDDING_PROFILE!r}, "
+            f"expected one of {sorted(EMBEDDING_PROFILES)}"
+        )
+    EMBEDDING_MODEL = EMBEDDING_PROFILES[EMBEDDING_PROFILE]["model"]
+    EMBEDDING_DIMENSION = EMBEDDING_PROFILES[EMBEDDING_PROFILE]["dimension"]
     CHUNK_SIZE = 300
     CHUNK_OVERLAP = 100
     
+    # Near-duplicate Chunk Deduplication Configuration
+    DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+    DEDUP_THRESHOLD = 0.85  # Estimated Jaccard similarity of word shingles
+    DEDUP_NUM_PERM = 128
+    DEDUP_BANDS = 32  # 4 rows per band
+    DEDUP_SHINGLE_SIZE = 5
+    
     # FAISS Configuration
-    INDEX_PATH = "src/data/faiss_index"
+    # Each profile keeps its own index so switching models never reuses one
+    INDEX_PATH = (
+        "src/data/faiss_index" if EMBEDDING_PROFILE == DEFAULT_EMBEDDING_PROFILE
+        else f"src/data/faiss_index_{EMBEDDING_PROFILE}"
+    )
+    # Rebuild an index stamped with another model instead of failing
+    INDEX_REBUILD_ON_MISMATCH = os.getenv('INDEX_REBUILD_ON_MISMATCH', 'true').lower() == 'true'
+    SPARSE_INDEX_PATH = f"{INDEX_PATH}_bm25.npz"
+    INDEX_TYPE = "flat"  # "flat", "hnsw" or "ivf"
+    HNSW_M = 32
+    HNSW_EF_SEARCH = 64
+    IVF_NLIST = 64
+    IVF_NPROBE = 8
+    # Two-stage search: rank per-document centroids, then only their chunks
+    HIERARCHICAL_SEARCH = os.getenv('HIERARCHICAL_SEARCH', 'false').lower() == 'true'
+    HIERARCHICAL_TOP_DOCS = 8
+    
+    # Sharded Index Configuration
+    SHARD_DIR = f"{INDEX_PATH}_shards"
+    SHARD_COUNT = 4
+    # Shard server addresses (Unix socket paths or host:port), in shard order;
+    # empty searches one in-process index
+    SHARD_ADDRESSES = [
+        address.strip()
+        for address in os.getenv('SHARD_ADDRESSES', '').split(',')
+        if address.strip()
+    ]
+    SHARD_TIMEOUT_S = 10.0
     
     # Storage Configuration
     DATA_DIR = "src/data"
     RAW_DOCS_DIR = os.path.join(DATA_DIR, "raw")
     PROCESSED_DOCS_DIR = os.path.join(DATA_DIR, "processed")
+    # Compressed, content-hashed raw and cleaned text with a manifest
+    DOC_STORE_ENABLED = os.getenv('DOC_STORE_ENABLED', 'true').lower() == 'true'
+    DOC_STORE_DIR = os.path.join(DATA_DIR, "store")
+    DOC_STORE_COMPRESSION = os.getenv('DOC_STORE_COMPRESSION', 'gzip')  # gzip, zstd
+    DOC_STORE_LEVEL = 6
+    
+    # Crawl Configuration: discover policy pages from seed index pages
+    # instead of fetching exactly POLICY_URLS
+    CRAWL_ENABLED = os.getenv('CRAWL_ENABLED', 'false').lower() == 'true'
+    CRAWL_SEEDS = [
+        url.strip()
+        for url in os.getenv('CRAWL_SEEDS', '').split(',')
+        if url.strip().startswith('http')
+    ]  # Empty uses POLICY_URLS
+    CRAWL_ALLOWED_PREFIXES = [
+        prefix.strip()
+        for prefix in os.getenv('CRAWL_ALLOWED_PREFIXES', '').split(',')
+        if prefix.strip()
+    ]  # URL paths; empty uses each seed's own path
+    CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', '2'))  # Links followed from a seed
+    CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', '500'))
+    CRAWL_WORKERS = int(os.getenv('CRAWL_WORKERS', '4'))
+    CRAWL_MAX_PER_HOST = 2  # Concurrent requests to one host
+    CRAWL_DELAY_S = float(os.getenv('CRAWL_DELAY_S', '0.5'))  # Between requests to one host
+    CRAWL_TIMEOUT_S = 30
+    CRAWL_RESPECT_ROBOTS = True
+    CRAWL_USER_AGENT = "udst-policy-rag-crawler"
+    CRAWL_STATE_PATH = os.path.join(DATA_DIR, "crawl_state.json")
+    CRAWL_CHECKPOINT_EVERY = 10  # Pages between state saves
     
     # Create directories if they don't exist
     os.makedirs(RAW_DOCS_DIR, exist_ok=True)
@@ -52,10 +137,102 @@ class Config:
     TOP_K_MATCHES = 10
     SIMILARITY_THRESHOLD = 1.0
     
+    # Hybrid (BM25 + dense) Retrieval Configuration
+    HYBRID_SEARCH = True
+    HYBRID_CANDIDATES = 30
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    RRF_K = 60
+    
+    # Diversification (MMR) Configuration
+    MMR_ENABLED = True
+    MMR_TOP_K = 6
+    MMR_LAMBDA = 0.7
+    MAX_CHUNKS_PER_SOURCE = 3
+    
+    # Re-ranking Configuration
+    RERANK_ENABLED = False
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = 20
+    RERANK_TOP_K = 4
+    RERANK_TIME_BUDGET_MS = 250
+    RERANK_CACHE_SIZE = 4096
+    RERANK_WORKERS = 4  # Concurrent scoring calls; more requests fall back to dense order
+    
+    # Context Assembly Configuration
+    CONTEXT_MAX_TOKENS = 1500
+    CONTEXT_TOKENIZER = "cl100k_base"
+    CONTEXT_DEDUP_THRESHOLD = 0.8
+    
+    # FAQ Answer Cache Configuration
+    FAQ_ENABLED = os.getenv('FAQ_ENABLED', 'true').lower() == 'true'
+    FAQ_INDEX_PATH = f"{INDEX_PATH}_faq"
+    FAQ_QUESTIONS_PATH = "src/data/faq_questions.json"
+    FAQ_SIMILARITY_THRESHOLD = 0.92  # Cosine similarity to reuse an answer
+    FAQ_REQUIRE_TERM_MATCH = True  # Never reuse an answer when the question swaps a term
+    FAQ_AUTO_REFRESH = True  # Re-answer entries when the documents change
+    
+    # Tracing Configuration
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACING_SINK = os.getenv('TRACING_SINK', 'memory')  # memory, json, otel
+    TRACING_LOG_PATH = os.getenv('TRACING_LOG_PATH')
+    TRACING_MEMORY_RECORDS = 10000  # Spans and counter updates the memory sink keeps
+    
+    # Serving Configuration
+    SERVING_HOST = os.getenv('SERVING_HOST', '127.0.0.1')
+    SERVING_PORT = int(os.getenv('SERVING_PORT', '8000'))
+    SERVING_BATCH_WINDOW_MS = 5
+    SERVING_MAX_BATCH_SIZE = 32
+    SERVING_BACKLOG = 2048
+    SERVING_BATCH_HISTORY = 1024  # Recent batch sizes kept for metrics
+    # Run queries through retrieval before reporting ready
+    SERVING_WARMUP = os.getenv('SERVING_WARMUP', 'true').lower() == 'true'
+    SERVING_WARMUP_QUERIES = 3  # Warm repeats after the cold query
+    SERVING_LATENCY_WINDOW = 256  # Recent retrievals kept for the steady-state latency
+    # Load the model once and fork workers that share it copy-on-write
+    SERVING_PREFORK = os.getenv('SERVING_PREFORK', 'false').lower() == 'true'
+    SERVING_WORKER_THREADS = int(os.getenv('SERVING_WORKER_THREADS', '0'))  # 0 = cores / workers
+    # Unix socket of a shared embedding server; empty loads the model in-process
+    EMBEDDING_SERVER_SOCKET = os.getenv('EMBEDDING_SERVER_SOCKET', '')
+    EMBEDDING_SERVER_TIMEOUT_S = 30.0
+    
+    # Embedding Runtime Configuration
+    TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', '0'))  # 0 = torch default
+    TORCH_NUM_INTEROP_THREADS = int(os.getenv('TORCH_NUM_INTEROP_THREADS', '0'))
+    EMBEDDING_INFERENCE_LOCK = True  # One forward pass at a time per process
+    EMBEDDING_WARMUP = True
+    # Worker processes for full rebuilds; 0 or 1 encodes in-process
+    EMBEDDING_WORKERS = int(os.getenv('EMBEDDING_WORKERS', '0'))
+    EMBEDDING_WORKER_THREADS = int(os.getenv('EMBEDDING_WORKER_THREADS', '0'))  # 0 = cores / workers
+    EMBEDDING_WORKER_TASK_SIZE = 128  # Texts per queue task
+    EMBEDDING_MATRIX_PATH = os.getenv('EMBEDDING_MATRIX_PATH', '')  # .npy memory map, empty keeps it in RAM
+    
+    # Embedding Backend Configuration
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch, onnx
+    ONNX_MODEL_DIR = f"src/data/onnx_model/{EMBEDDING_PROFILE}"
+    ONNX_QUANTIZE = os.getenv('ONNX_QUANTIZE', 'false').lower() == 'true'
+    ONNX_INTRA_OP_THREADS = int(os.getenv('ONNX_INTRA_OP_THREADS', '0'))  # 0 = onnxruntime default
+    ONNX_INTER_OP_THREADS = 1
+    
     # Model Configuration
     TEMPERATURE = 0.7
     MAX_TOKENS = 500
     MISTRAL_MODEL = "mistral-medium"
+    MISTRAL_SERVER_URL = os.getenv('MISTRAL_SERVER_URL')  # None uses the public API
+    
+    # LLM Gateway Configuration
+    LLM_RATE_LIMIT_PER_S = float(os.getenv('LLM_RATE_LIMIT_PER_S', '5'))  # 0 disables
+    LLM_RATE_BURST = 5
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+    LLM_MAX_RETRIES = 3
+    LLM_BACKOFF_BASE_S = 0.5
+    LLM_BACKOFF_MAX_S = 8.0
+    LLM_DEADLINE_S = 30.0  # Per call, including retries
+    LLM_HEDGE_AFTER_MS = float(os.getenv('LLM_HEDGE_AFTER_MS', '0'))  # 0 disables hedging
+    
+    # Chat UI Configuration
+    CHAT_PAGE_SIZE = 10  # Exchanges rendered per page, newest first
+    CHAT_MAX_EXCHANGES = int(os.getenv('CHAT_MAX_EXCHANGES', '200'))  # Oldest are dropped beyond this
     
     # Additional configuration
     # ... (keep the existing attributes)
@@ -1,20 +1,137 @@
-from typing import List, Dict
-import torch
-from sentence_transformers import SentenceTransformer
+import os
+import sys
+import threading
+from contextlib import nullcontext
+from typing import List, Dict, Optional
 import numpy as np
 import logging
 from src.config.config import Config
+from src.utils.chunk_batch import ChunkBatch
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One forward pass at a time per process: concurrent passes each start a
+# full intra-op thread pool and oversubscribe the cores
+_INFERENCE_LOCK = threading.Lock()
+_torch_configured = False
+
+
+def _reset_inference_lock():
+    """A forked child gets a fresh lock, in case a parent thread held it."""
+    global _INFERENCE_LOCK
+    _INFERENCE_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_inference_lock)
+
+WARMUP_TEXTS = [
+    "What is the attendance policy?",
+    "Students who are placed on academic probation must meet with their "
+    "advisor and follow an academic success plan for the next semester.",
+]
+
+
+def configure_torch_runtime():
+    """Apply the configured torch thread counts once per process."""
+    global _torch_configured
+    if _torch_configured:
+        return
+    import torch
+    config = Config()
+    if config.TORCH_NUM_THREADS > 0:
+        torch.set_num_threads(config.TORCH_NUM_THREADS)
+    if config.TORCH_NUM_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(config.TORCH_NUM_INTEROP_THREADS)
+        except RuntimeError as e:
+            # Only allowed before torch has started any parallel work
+            logger.warning(f"Could not set torch inter-op threads: {str(e)}")
+    _torch_configured = True
+    logger.info(
+        f"Torch threads: intra-op {torch.get_num_threads()}, "
+        f"inter-op {torch.get_num_interop_threads()}"
+    )
+
 
 class DocumentEmbedder:
-    def __init__(self):
-        """Initialize the document embedder with the specified model."""
+    def __init__(self, model=None):
+        """
+        Initialize the document embedder with the specified model.
+        
+        Args:
+            model: Optional preloaded encoder exposing ``encode``; defaults
+                to a client of the shared embedding server when
+                EMBEDDING_SERVER_SOCKET is set, else the configured
+                EMBEDDING_BACKEND (SentenceTransformer or ONNX Runtime)
+        """
         self.config = Config()
-        self.model = SentenceTransformer(self.config.EMBEDDING_MODEL)
+        loaded_here = model is None
+        if model is None and self.config.EMBEDDING_SERVER_SOCKET:
+            from src.embeddings.embedding_server import RemoteEncoder
+            model = RemoteEncoder(self.config.EMBEDDING_SERVER_SOCKET)
+        if model is None and self.config.EMBEDDING_BACKEND == "onnx":
+            model = self._load_onnx_encoder()
+        if model is None:
+            configure_torch_runtime()
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.config.EMBEDDING_MODEL)
+        self.model = model
+        
+        # The embedding server batches across callers itself
+        remote = getattr(model, 'remote', False)
+        # Rebuild workers load the configured model, so only use them for it
+        self._parallel_rebuilds = loaded_here and not remote
+        self._lock = (
+            _INFERENCE_LOCK
+            if self.config.EMBEDDING_INFERENCE_LOCK and not remote
+            else nullcontext()
+        )
+        if loaded_here and not remote and self.config.EMBEDDING_WARMUP:
+            self.warm_up()
+        
+    def _load_onnx_encoder(self):
+        """Load the ONNX model, exporting it on first use."""
+        from src.embeddings.onnx_backend import (
+            OnnxEncoder, export_onnx, onnx_model_path
+        )
+        if not os.path.exists(
+            onnx_model_path(self.config.ONNX_MODEL_DIR, self.config.ONNX_QUANTIZE)
+        ):
+            export_onnx(quantize=self.config.ONNX_QUANTIZE)
+        return OnnxEncoder()
+        
+    def after_fork(self, num_threads: int = 0):
+        """
+        Prepare an embedder inherited by a forked serving worker
+        
+        Args:
+            num_threads (int): Intra-op threads for this worker, 0 keeps
+                the parent's count
+        """
+        if not isinstance(self._lock, nullcontext):
+            self._lock = _INFERENCE_LOCK
+        if hasattr(self.model, 'after_fork'):
+            self.model.after_fork(num_threads)
+            return
+        torch = sys.modules.get('torch')
+        if torch is not None and num_threads > 0:
+            torch.set_num_threads(num_threads)
+        
+    def _inference_context(self):
+        """torch.inference_mode for torch models, nothing otherwise."""
+        torch = sys.modules.get('torch')
+        if torch is not None and isinstance(self.model, torch.nn.Module):
+            return torch.inference_mode()
+        return nullcontext()
+        
+    def warm_up(self):
+        """Run a few throwaway passes so the first query does not pay for
+        lazy initialisation and allocator growth."""
+        for text in WARMUP_TEXTS:
+            self.generate_embedding(text)
+        self.generate_embeddings(WARMUP_TEXTS)
         
     def generate_embedding(self, text: str) -> np.ndarray:
         """
@@ -27,14 +144,68 @@ class DocumentEmbedder:
             np.ndarray: Embedding vector
         """
         try:
-            with torch.no_grad():
-                embedding = self.model.encode(text)
-            return embedding
+            with self._lock, self._inference_context():
+                return self.model.encode(text)
             
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             return np.zeros(self.config.EMBEDDING_DIMENSION)
             
+    def generate_embeddings(
+        self, texts: List[str], batch_size: int = 32, raise_errors: bool = False
+    ) -> np.ndarray:
+        """
+        Generate embeddings for several texts in batched forward passes
+        
+        Args:
+            texts (List[str]): Texts to embed
+            batch_size (int): Texts per forward pass
+            raise_errors (bool): Raise encoding errors instead of returning
+                zero vectors, for callers that must not serve them
+            
+        Returns:
+            np.ndarray: Matrix with one embedding per text
+        """
+        try:
+            with self._lock, self._inference_context():
+                embeddings = self.model.encode(
+                    list(texts),
+                    batch_size=batch_size,
+                    show_progress_bar=False
+                )
+            return np.asarray(embeddings)
+            
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            if raise_errors:
+                raise
+            return np.zeros((len(texts), self.config.EMBEDDING_DIMENSION))
+            
+    def generate_embeddings_parallel(
+        self, texts: List[str], num_workers: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Generate embeddings with a pool of worker processes
+        
+        Falls back to in-process encoding if the workers fail.
+        
+        Args:
+            texts (List[str]): Texts to embed
+            num_workers (Optional[int]): Defaults to EMBEDDING_WORKERS
+            
+        Returns:
+            np.ndarray: Matrix with one embedding per text
+        """
+        from src.embeddings.parallel_encoder import ParallelEncoder
+        try:
+            with ParallelEncoder(num_workers) as encoder:
+                return encoder.encode(
+                    texts, self.config.EMBEDDING_MATRIX_PATH or None
+                )
+        except Exception as e:
+            logger.error(f"Parallel encoding failed, encoding in-process: {str(e)}")
+            return self.generate_embeddings(texts)
+            
     def embed_chunks(self, chunks: List[Dict[str, str]]) -> Dict[str, Dict]:
         """
         Generate embeddings for multiple text chunks
@@ -46,10 +217,10 @@ class DocumentEmbedder:
             Dict[str, Dict]: Dictionary mapping chunk IDs to embeddings and metadata
         """
         embeddings_dict = {}
+        embeddings = self._encode_chunks([chunk['content'] for chunk in chunks])
         
-        for chunk in chunks:
+        for chunk, embedding in zip(chunks, embeddings):
             chunk_id = chunk['chunk_id']
-            embedding = self.generate_embedding(chunk['content'])
             
             # Copy all metadata except chunk_id which becomes the dict key
             metadata = chunk.copy()
@@ -60,4 +231,26 @@ class DocumentEmbedder:
                 'metadata': metadata
             }
             
-        return embeddings_dict 
\ No newline at end of file
+        return embeddings_dict
+        
+    def embed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        Embed a columnar batch into one float32 matrix
+        
+        Args:
+            batch (ChunkBatch): Chunks from TextProcessor.add_to_batch
+            
+        Returns:
+            ChunkBatch: The same batch with ``embeddings`` set
+        """
+        batch.embeddings = np.asarray(
+            self._encode_chunks(batch.contents), dtype='float32'
+        )
+        return batch
+        
+    def _encode_chunks(self, texts: List[str]) -> np.ndarray:
+        """Encode chunk texts for an index rebuild, in worker processes
+        when EMBEDDING_WORKERS asks for them."""
+        if self._parallel_rebuilds and self.config.EMBEDDING_WORKERS > 1:
+            return self.generate_embeddings_parallel(texts)
+        return self.generate_embeddings(texts)
@@ -0,0 +1,221 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+import logging
+import numpy as np
+from src.config.config import Config
+from src.utils.rpc import RPCClient, make_server
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    __slots__ = ('texts', 'done', 'embeddings', 'error')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.embeddings = None
+        self.error = None
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        model=None,
+        socket_path: Optional[str] = None,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        """
+        Own one embedding model and serve encode requests over a Unix socket.
+
+        Requests from all connected workers are merged into shared forward
+        passes, so N web workers need one model copy instead of N.
+
+        Args:
+            model: Optional preloaded encoder exposing ``encode``; defaults
+                to the configured SentenceTransformer
+            socket_path (Optional[str]): Defaults to EMBEDDING_SERVER_SOCKET
+            window_ms (Optional[float]): How long a batch waits for more
+                requests, defaults to SERVING_BATCH_WINDOW_MS
+            max_batch_size (Optional[int]): Texts per forward pass, defaults
+                to SERVING_MAX_BATCH_SIZE
+        """
+        self.config = Config()
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            from src.embeddings.embedder import configure_torch_runtime
+            configure_torch_runtime()
+            model = SentenceTransformer(self.config.EMBEDDING_MODEL)
+        self.model = model
+        self.socket_path = socket_path or self.config.EMBEDDING_SERVER_SOCKET
+        self.window_ms = (
+            self.config.SERVING_BATCH_WINDOW_MS if window_ms is None
+            else window_ms
+        )
+        self.max_batch_size = (
+            max_batch_size or self.config.SERVING_MAX_BATCH_SIZE
+        )
+        self._pending: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._server = None
+        self._threads: List[threading.Thread] = []
+        self.batch_sizes: Deque[int] = deque(maxlen=self.config.SERVING_BATCH_HISTORY)
+
+    def start(self):
+        """Bind the socket and start serving in background threads."""
+        if not self.socket_path:
+            raise ValueError("No socket path for the embedding server")
+        self._server = make_server(self.socket_path, self._handle)
+
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._batch_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Embedding server listening on {self.socket_path}")
+
+    def _handle(self, message: dict) -> dict:
+        """Queue one request for the next batch and wait for its rows."""
+        request = _PendingRequest(list(message['texts']))
+        self._pending.put(request)
+        request.done.wait()
+        if request.error is not None:
+            return {'error': request.error}
+        return {'embeddings': request.embeddings}
+
+    def serve_forever(self):
+        """Start serving and block until interrupted."""
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop serving and remove the socket file."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._pending.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _collect(self, first: _PendingRequest) -> List[_PendingRequest]:
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self.window_ms / 1000.0
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Keep the shutdown marker for the loop
+                self._pending.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            texts = [text for request in batch for text in request.texts]
+            self.batch_sizes.append(len(texts))
+            try:
+                embeddings = np.asarray(self.model.encode(
+                    texts,
+                    batch_size=self.max_batch_size,
+                    show_progress_bar=False
+                ))
+            except Exception as e:
+                logger.error(f"Error embedding batch: {str(e)}")
+                for request in batch:
+                    request.error = str(e)
+                    request.done.set()
+                continue
+
+            offset = 0
+            for request in batch:
+                request.embeddings = embeddings[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.done.set()
+
+
+class RemoteEncoder:
+    # DocumentEmbedder skips its inference lock; the server batches instead
+    remote = True
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Client for ``EmbeddingServer`` with the ``encode`` interface of
+        SentenceTransformer, so DocumentEmbedder can use it unchanged.
+
+        Args:
+            socket_path (Optional[str]): Defaults to EMBEDDING_SERVER_SOCKET
+            timeout (Optional[float]): Seconds to wait for the server to
+                come up and for each reply, defaults to
+                EMBEDDING_SERVER_TIMEOUT_S
+        """
+        self.config = Config()
+        self.socket_path = socket_path or self.config.EMBEDDING_SERVER_SOCKET
+        self.timeout = timeout or self.config.EMBEDDING_SERVER_TIMEOUT_S
+        self._client = RPCClient(self.socket_path, self.timeout)
+
+    def _request(self, texts: List[str]) -> np.ndarray:
+        reply = self._client.call({'texts': texts})
+        if 'error' in reply:
+            raise RuntimeError(f"Embedding server error: {reply['error']}")
+        return reply['embeddings']
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        """
+        Encode one text or a list of texts on the embedding server
+
+        Args:
+            sentences: A string or a list of strings
+            batch_size (int): Ignored, the server decides the batch size
+
+        Returns:
+            np.ndarray: A vector for a string, a matrix for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = self._request(texts)
+        return embeddings[0] if single else embeddings
+
+    def close(self):
+        self._client.close()
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Shared embedding model server")
+    parser.add_argument("--socket", default=config.EMBEDDING_SERVER_SOCKET or "/tmp/udst_rag_embed.sock")
+    args = parser.parse_args()
+    EmbeddingServer(socket_path=args.socket).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
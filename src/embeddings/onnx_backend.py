@@ -0,0 +1,290 @@
+import json
+import os
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENCODER_CONFIG = "encoder_config.json"
+POOLING_MODES = ('mean', 'cls', 'max')
+
+
+def onnx_model_path(model_dir: str, quantized: bool) -> str:
+    name = "model_int8.onnx" if quantized else "model.onnx"
+    return os.path.join(model_dir, name)
+
+
+def export_onnx(
+    model_name: Optional[str] = None,
+    output_dir: Optional[str] = None,
+    quantize: bool = False
+) -> str:
+    """
+    Export a SentenceTransformer to ONNX for onnxruntime inference
+
+    Only the transformer is exported; pooling and normalization are read
+    from the sentence-transformers pipeline and replayed by OnnxEncoder.
+
+    Args:
+        model_name (Optional[str]): Model name or path, defaults to
+            EMBEDDING_MODEL
+        output_dir (Optional[str]): Defaults to ONNX_MODEL_DIR
+        quantize (bool): Also write a dynamically int8-quantized model
+
+    Returns:
+        str: The output directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    config = Config()
+    model_name = model_name or config.EMBEDDING_MODEL
+    output_dir = output_dir or config.ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next(
+        (m for m in st_model if isinstance(m, models.Pooling)), None
+    )
+    pooling_mode = pooling.pooling_mode if pooling is not None else 'mean'
+    if pooling_mode not in POOLING_MODES:
+        raise ValueError(f"Unsupported pooling mode for ONNX: {pooling_mode}")
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(
+                input_ids=input_ids, attention_mask=attention_mask
+            )[0]
+
+    auto_model = TokenEmbeddings(transformer.auto_model).eval()
+    # A padded batch so the attention mask path is traced
+    dummy = transformer.tokenizer(
+        ["export the embedding model to onnx", "onnx"],
+        padding=True, return_tensors="pt"
+    )
+    with torch.no_grad():
+        dimension = int(
+            auto_model(dummy['input_ids'], dummy['attention_mask']).shape[-1]
+        )
+        torch.onnx.export(
+            auto_model,
+            (dummy['input_ids'], dummy['attention_mask']),
+            onnx_model_path(output_dir, False),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['token_embeddings'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'token_embeddings': {0: 'batch', 1: 'sequence'},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(
+            onnx_model_path(output_dir, False),
+            onnx_model_path(output_dir, True),
+            weight_type=QuantType.QInt8,
+        )
+
+    transformer.tokenizer.save_pretrained(output_dir)
+    tokenizer = transformer.tokenizer
+    encoder_config = {
+        'model': model_name,
+        'dimension': dimension,
+        'max_seq_length': st_model.max_seq_length,
+        'pooling': pooling_mode,
+        'normalize': any(isinstance(m, models.Normalize) for m in st_model),
+        'pad_token': tokenizer.pad_token,
+        'pad_id': tokenizer.pad_token_id,
+        'quantized': quantize,
+    }
+    with open(os.path.join(output_dir, ENCODER_CONFIG), 'w') as f:
+        json.dump(encoder_config, f, indent=2)
+
+    logger.info(f"Exported {model_name} to ONNX in {output_dir}")
+    return output_dir
+
+
+class OnnxEncoder:
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        quantized: Optional[bool] = None,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None
+    ):
+        """
+        Run an exported embedding model with onnxruntime on CPU.
+
+        Exposes the ``encode`` interface of SentenceTransformer so it can be
+        passed to DocumentEmbedder.
+
+        Args:
+            model_dir (Optional[str]): Output of ``export_onnx``, defaults to
+                ONNX_MODEL_DIR
+            quantized (Optional[bool]): Use the int8 model, defaults to
+                ONNX_QUANTIZE
+            intra_op_threads (Optional[int]): Threads per operator, 0 lets
+                onnxruntime decide; defaults to ONNX_INTRA_OP_THREADS
+            inter_op_threads (Optional[int]): Defaults to
+                ONNX_INTER_OP_THREADS
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.config = Config()
+        self.model_dir = model_dir or self.config.ONNX_MODEL_DIR
+        quantized = self.config.ONNX_QUANTIZE if quantized is None else quantized
+
+        with open(os.path.join(self.model_dir, ENCODER_CONFIG)) as f:
+            self.encoder_config: Dict = json.load(f)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = (
+            self.config.ONNX_INTRA_OP_THREADS if intra_op_threads is None
+            else intra_op_threads
+        )
+        options.inter_op_num_threads = (
+            self.config.ONNX_INTER_OP_THREADS if inter_op_threads is None
+            else inter_op_threads
+        )
+        options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.options = options
+        self.model_path = onnx_model_path(self.model_dir, quantized)
+        self.session = ort.InferenceSession(
+            self.model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+        self.tokenizer = Tokenizer.from_file(
+            os.path.join(self.model_dir, "tokenizer.json")
+        )
+        self.tokenizer.enable_truncation(self.encoder_config['max_seq_length'])
+        self.tokenizer.enable_padding(
+            pad_id=self.encoder_config['pad_id'],
+            pad_token=self.encoder_config['pad_token'],
+        )
+
+    def after_fork(self, num_threads: int = 0):
+        """
+        Open a new session in a forked worker; onnxruntime's thread pools
+        do not survive a fork
+
+        Args:
+            num_threads (int): Intra-op threads, 0 keeps the configured count
+        """
+        import onnxruntime as ort
+
+        if num_threads > 0:
+            self.options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            self.model_path,
+            sess_options=self.options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def _pool(self, token_embeddings: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        mode = self.encoder_config['pooling']
+        if mode == 'cls':
+            pooled = token_embeddings[:, 0]
+        elif mode == 'max':
+            masked = np.where(mask[..., None] > 0, token_embeddings, -np.inf)
+            pooled = masked.max(axis=1)
+        else:
+            weights = mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * weights).sum(axis=1) / np.maximum(
+                weights.sum(axis=1), 1e-9
+            )
+        if self.encoder_config['normalize']:
+            pooled /= np.maximum(
+                np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12
+            )
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        """
+        Encode one text or a list of texts
+
+        Args:
+            sentences: A string or a list of strings
+            batch_size (int): Texts per session run
+
+        Returns:
+            np.ndarray: A vector for a string, a matrix for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.encoder_config['dimension']), dtype=np.float32)
+
+        # Sort by length so each batch pads to similar lengths
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = np.zeros(
+            (len(texts), self.encoder_config['dimension']), dtype=np.float32
+        )
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            encoded = self.tokenizer.encode_batch([texts[i] for i in rows])
+            input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+            token_embeddings = self.session.run(
+                ['token_embeddings'],
+                {'input_ids': input_ids, 'attention_mask': mask}
+            )[0]
+            embeddings[rows] = self._pool(token_embeddings, mask)
+        return embeddings[0] if single else embeddings
+
+
+def compare_encoders(reference, candidate, texts: List[str]) -> Dict[str, float]:
+    """
+    Measure how closely two encoders agree on the same texts
+
+    Args:
+        reference: Encoder exposing ``encode``, e.g. the torch model
+        candidate: Encoder to check, e.g. an OnnxEncoder
+
+    Returns:
+        Dict[str, float]: Largest absolute difference and lowest cosine
+            similarity between matching embeddings
+    """
+    expected = np.asarray(reference.encode(texts), dtype=np.float32)
+    actual = np.asarray(candidate.encode(texts), dtype=np.float32)
+    cosine = (expected * actual).sum(axis=1) / np.maximum(
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1),
+        1e-12
+    )
+    return {
+        'max_abs_diff': float(np.abs(expected - actual).max()),
+        'min_cosine': float(cosine.min()),
+    }
+
+
+def main():
+    import argparse
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--output-dir", default=config.ONNX_MODEL_DIR)
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.model, args.output_dir, args.quantize)
+
+
+if __name__ == "__main__":
+    main()
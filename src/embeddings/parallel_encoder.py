@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import queue
+import sys
+from contextlib import nullcontext
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_worker_model():
+    """Load the configured encoder inside a worker process."""
+    config = Config()
+    if config.EMBEDDING_BACKEND == "onnx":
+        from src.embeddings.onnx_backend import OnnxEncoder
+        return OnnxEncoder()
+    from src.embeddings.embedder import configure_torch_runtime
+    configure_torch_runtime()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(config.EMBEDDING_MODEL)
+
+
+def _pin_threads(threads: int):
+    """Limit every thread pool a worker may start to ``threads`` threads."""
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    Config.TORCH_NUM_THREADS = threads
+    Config.TORCH_NUM_INTEROP_THREADS = 1
+    Config.ONNX_INTRA_OP_THREADS = threads
+
+
+def _open_matrix(spec: Tuple) -> Tuple[np.ndarray, Optional[shared_memory.SharedMemory]]:
+    """Attach to the output matrix described by ``spec``."""
+    kind, location, shape = spec
+    if kind == 'npy':
+        return np.load(location, mmap_mode='r+'), None
+    shm = shared_memory.SharedMemory(name=location)
+    return np.ndarray(shape, dtype=np.float32, buffer=shm.buf), shm
+
+
+def _encode_worker(
+    model_factory: Callable,
+    threads: int,
+    batch_size: int,
+    tasks,
+    results
+):
+    """
+    Worker loop: take (matrix spec, start row, texts) tasks until a None
+    sentinel and write the embeddings into rows ``start:start + len(texts)``.
+    """
+    _pin_threads(threads)
+    logging.disable(logging.INFO)
+    try:
+        model = model_factory()
+    except Exception as e:
+        results.put(('error', f"loading model: {str(e)}"))
+        return
+
+    torch = sys.modules.get('torch')
+    inference = (
+        torch.inference_mode
+        if torch is not None and isinstance(model, torch.nn.Module)
+        else nullcontext
+    )
+    attached = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            spec, start, texts = task
+            try:
+                if spec not in attached:
+                    attached[spec] = _open_matrix(spec)
+                matrix = attached[spec][0]
+                with inference():
+                    embeddings = model.encode(
+                        texts, batch_size=batch_size, show_progress_bar=False
+                    )
+                matrix[start:start + len(texts)] = embeddings
+                results.put(('done', start, len(texts)))
+            except Exception as e:
+                results.put(('error', f"rows {start}-{start + len(texts)}: {str(e)}"))
+    finally:
+        for matrix, shm in attached.values():
+            if shm is None:
+                matrix.flush()
+            else:
+                del matrix
+                shm.close()
+
+
+class ParallelEncoder:
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        model_factory: Optional[Callable] = None,
+        task_size: Optional[int] = None,
+        batch_size: int = 32,
+        dimension: Optional[int] = None
+    ):
+        """
+        Encode large text collections with a pool of worker processes, each
+        with its own model copy and a fixed number of threads.
+
+        Texts are fed to the workers in slices through one shared queue, and
+        every worker writes its slice straight into the rows of a single
+        preallocated float32 matrix, so the output is in input order.
+
+        Args:
+            num_workers (Optional[int]): Defaults to EMBEDDING_WORKERS
+            threads_per_worker (Optional[int]): Defaults to
+                EMBEDDING_WORKER_THREADS, 0 splits the cores evenly
+            model_factory (Optional[Callable]): Picklable callable building
+                the encoder in a worker, defaults to the configured model
+            task_size (Optional[int]): Texts per queue task, defaults to
+                EMBEDDING_WORKER_TASK_SIZE
+            batch_size (int): Texts per forward pass inside a worker
+            dimension (Optional[int]): Embedding size, defaults to
+                EMBEDDING_DIMENSION
+        """
+        self.config = Config()
+        self.num_workers = max(1, num_workers or self.config.EMBEDDING_WORKERS)
+        self.threads_per_worker = (
+            threads_per_worker or self.config.EMBEDDING_WORKER_THREADS
+            or max(1, (os.cpu_count() or 1) // self.num_workers)
+        )
+        self.model_factory = model_factory or load_worker_model
+        self.task_size = task_size or self.config.EMBEDDING_WORKER_TASK_SIZE
+        self.batch_size = batch_size
+        self.dimension = dimension or self.config.EMBEDDING_DIMENSION
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = None
+        self._results = None
+        self._workers = []
+
+    def start(self):
+        """Start the worker processes; each loads its model once."""
+        if self._workers:
+            return
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._workers = [
+            self._context.Process(
+                target=_encode_worker,
+                args=(
+                    self.model_factory, self.threads_per_worker,
+                    self.batch_size, self._tasks, self._results
+                ),
+                daemon=True
+            )
+            for _ in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        logger.info(
+            f"Started {self.num_workers} encoding workers with "
+            f"{self.threads_per_worker} threads each"
+        )
+
+    def close(self):
+        """Stop the workers."""
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=30)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
+
+    def terminate(self):
+        """Kill the workers, dropping queued tasks."""
+        for worker in self._workers:
+            worker.terminate()
+            worker.join()
+        self._workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _wait(self, pending: int):
+        """Wait for ``pending`` task results, failing fast on errors."""
+        while pending:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [w for w in self._workers if not w.is_alive()]
+                if dead:
+                    raise RuntimeError(
+                        f"Encoding worker exited with code {dead[0].exitcode}"
+                    )
+                continue
+            if message[0] == 'error':
+                raise RuntimeError(f"Encoding worker failed: {message[1]}")
+            pending -= 1
+
+    def encode(self, texts: List[str], output_path: Optional[str] = None) -> np.ndarray:
+        """
+        Encode texts into one float32 matrix
+
+        Args:
+            texts (List[str]): Texts to encode
+            output_path (Optional[str]): ``.npy`` file to write the matrix to
+                as a memory map; by default it lives in shared memory and a
+                regular array is returned
+
+        Returns:
+            np.ndarray: Matrix with one embedding per text, in input order
+
+        Raises:
+            RuntimeError: If a worker fails or dies
+        """
+        self.start()
+        shape = (len(texts), self.dimension)
+        shm = None
+        if output_path:
+            matrix = np.lib.format.open_memmap(
+                output_path, mode='w+', dtype=np.float32, shape=shape
+            )
+            matrix.flush()
+            spec = ('npy', os.path.abspath(output_path), shape)
+        else:
+            shm = shared_memory.SharedMemory(
+                create=True, size=max(1, len(texts) * self.dimension * 4)
+            )
+            matrix = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            spec = ('shm', shm.name, shape)
+
+        try:
+            starts = range(0, len(texts), self.task_size)
+            for start in starts:
+                self._tasks.put((spec, start, list(texts[start:start + self.task_size])))
+            self._wait(len(starts))
+            if shm is None:
+                return matrix
+            return matrix.copy()
+        except Exception:
+            # Queued tasks point at this matrix; never hand them to a later call
+            self.terminate()
+            raise
+        finally:
+            if shm is not None:
+                del matrix
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,285 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Iterator, Optional
+import logging
+from src.config.config import Config
+from src.utils.tracing import Tracer, get_tracer
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMGatewayError(Exception):
+    """Raised when a call cannot complete within its retries or deadline."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """
+        Thread-safe token bucket rate limiter.
+
+        Args:
+            rate (float): Tokens added per second; 0 disables limiting
+            burst (int): Bucket capacity
+        """
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def acquire(self, deadline: float) -> bool:
+        """
+        Take one token, waiting for it until ``deadline`` (monotonic time)
+
+        Returns:
+            bool: False if no token became available in time
+        """
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_s = (1 - self.tokens) / self.rate
+            if now + wait_s > deadline:
+                return False
+            time.sleep(wait_s)
+
+    def try_acquire(self) -> bool:
+        """Take one token only if it is available right now."""
+        return self.acquire(time.monotonic())
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transient failures: rate limits, server errors, timeouts, connection errors."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import httpx
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+    except ImportError:
+        return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if any."""
+    headers = getattr(getattr(error, 'raw_response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        client,
+        tracer: Optional[Tracer] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        deadline_s: Optional[float] = None,
+        hedge_after_ms: Optional[float] = None
+    ):
+        """
+        Rate limiting, bounded concurrency, retries, deadlines and optional
+        hedging around a Mistral-style chat client.
+
+        Args:
+            client: Object with ``chat.complete`` and ``chat.stream``
+            tracer (Optional[Tracer]): Defaults to the global tracer
+            rate_limit (Optional[float]): Requests per second, defaults to
+                LLM_RATE_LIMIT_PER_S
+            burst (Optional[int]): Defaults to LLM_RATE_BURST
+            max_concurrency (Optional[int]): Requests in flight, defaults to
+                LLM_MAX_CONCURRENCY
+            max_retries (Optional[int]): Defaults to LLM_MAX_RETRIES
+            deadline_s (Optional[float]): Budget per call including retries,
+                defaults to LLM_DEADLINE_S
+            hedge_after_ms (Optional[float]): Send a second request when the
+                first has not answered after this long, 0 disables; defaults
+                to LLM_HEDGE_AFTER_MS
+        """
+        self.config = Config()
+        self.client = client
+        self.tracer = tracer or get_tracer()
+
+        def pick(value, default):
+            return default if value is None else value
+
+        self.bucket = TokenBucket(
+            pick(rate_limit, self.config.LLM_RATE_LIMIT_PER_S),
+            pick(burst, self.config.LLM_RATE_BURST)
+        )
+        self.max_concurrency = pick(max_concurrency, self.config.LLM_MAX_CONCURRENCY)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.max_retries = pick(max_retries, self.config.LLM_MAX_RETRIES)
+        self.deadline_s = pick(deadline_s, self.config.LLM_DEADLINE_S)
+        self.hedge_after_ms = pick(hedge_after_ms, self.config.LLM_HEDGE_AFTER_MS)
+        self.backoff_base_s = self.config.LLM_BACKOFF_BASE_S
+        self.backoff_max_s = self.config.LLM_BACKOFF_MAX_S
+        # Hedged attempts run here; sized so hedges never queue behind primaries
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * self.max_concurrency,
+            thread_name_prefix="llm-gateway"
+        )
+
+    def _remaining(self, deadline: float) -> float:
+        return deadline - time.monotonic()
+
+    def _admit(self, deadline: float):
+        """Wait for a rate token and a concurrency slot."""
+        if not self.bucket.acquire(deadline):
+            self.tracer.incr("llm.rate_limited")
+            raise LLMGatewayError("rate limit: no capacity before the deadline")
+        if not self._slots.acquire(timeout=max(0.0, self._remaining(deadline))):
+            raise LLMGatewayError("concurrency limit: no slot before the deadline")
+
+    def _call(self, method, kwargs: dict, deadline: float):
+        """One attempt holding a slot, with the remaining time as timeout."""
+        try:
+            timeout_ms = int(max(1.0, self._remaining(deadline) * 1000))
+            return method(timeout_ms=timeout_ms, **kwargs)
+        finally:
+            self._slots.release()
+
+    def _backoff(self, attempt: int, error: Exception, deadline: float):
+        delay = _retry_after(error)
+        if delay is None:
+            # Full jitter keeps retries from many callers apart
+            delay = random.uniform(
+                0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt)
+            )
+        if delay >= self._remaining(deadline):
+            raise LLMGatewayError(f"deadline exceeded after {attempt + 1} attempts") from error
+        time.sleep(delay)
+
+    def _with_retries(self, attempt_fn, deadline: float):
+        attempt = 0
+        while True:
+            try:
+                return attempt_fn(deadline)
+            except LLMGatewayError:
+                raise
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"LLM call failed ({str(e)}), retrying")
+                self.tracer.incr("llm.retries")
+                self._backoff(attempt, e, deadline)
+                attempt += 1
+
+    def _attempt(self, kwargs: dict, deadline: float):
+        self._admit(deadline)
+        return self._call(self.client.chat.complete, kwargs, deadline)
+
+    def _hedged_attempt(self, kwargs: dict, deadline: float):
+        """Start one request; if it is slow, race a second one against it."""
+        self._admit(deadline)
+        primary = self._executor.submit(
+            self._call, self.client.chat.complete, kwargs, deadline
+        )
+        done, _ = wait([primary], timeout=self.hedge_after_ms / 1000.0)
+        if done:
+            return primary.result()
+
+        # Hedge only with spare capacity, never by waiting for it
+        futures = [primary]
+        if self.bucket.try_acquire() and self._slots.acquire(blocking=False):
+            self.tracer.incr("llm.hedges")
+            futures.append(self._executor.submit(
+                self._call, self.client.chat.complete, kwargs, deadline
+            ))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending, timeout=max(0.0, self._remaining(deadline)),
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                raise LLMGatewayError("deadline exceeded waiting for the LLM")
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def complete(self, **kwargs) -> Any:
+        """
+        ``chat.complete`` with rate limiting, retries and a deadline
+
+        Args:
+            **kwargs: Passed to ``chat.complete`` (model, messages, ...)
+
+        Returns:
+            Any: The client's chat completion response
+
+        Raises:
+            LLMGatewayError: If capacity or the deadline ran out
+            Exception: The last client error for non-retryable failures
+        """
+        deadline = time.monotonic() + self.deadline_s
+        if self.hedge_after_ms > 0:
+            return self._with_retries(
+                lambda d: self._hedged_attempt(kwargs, d), deadline
+            )
+        return self._with_retries(
+            lambda d: self._attempt(kwargs, d), deadline
+        )
+
+    def stream(self, **kwargs) -> Iterator[Any]:
+        """
+        ``chat.stream`` with the same admission control
+
+        Retries only cover opening the stream; the concurrency slot is
+        held until the stream is exhausted or closed.
+
+        Args:
+            **kwargs: Passed to ``chat.stream``
+
+        Yields:
+            Stream events from the client
+        """
+        deadline = time.monotonic() + self.deadline_s
+
+        def open_stream(d: float):
+            self._admit(d)
+            try:
+                timeout_ms = int(max(1.0, self._remaining(d) * 1000))
+                return self.client.chat.stream(timeout_ms=timeout_ms, **kwargs)
+            except Exception:
+                self._slots.release()
+                raise
+
+        events = self._with_retries(open_stream, deadline)
+        try:
+            for event in events:
+                yield event
+        finally:
+            close = getattr(events, 'close', None)
+            if close is not None:
+                close()
+            self._slots.release()
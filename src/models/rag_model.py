@@ -1,28 +1,123 @@
-from typing import List, Optional, Tuple
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import logging
+import numpy as np
 from src.config.config import Config
 from src.scrapers.policy_scraper import PolicyScraper
 from src.utils.text_processor import TextProcessor
 from src.embeddings.embedder import DocumentEmbedder
 from src.retrieval.faiss_index import FAISSIndex
+from src.retrieval.sharded_index import ShardedIndex
+from src.retrieval.reranker import CrossEncoderReranker
+from src.retrieval.diversity import mmr_select, cap_per_source
+from src.retrieval.faq_index import FAQIndex, refresh_faq_index
+from src.utils.chunk_batch import ChunkBatch
+from src.utils.context_builder import ContextBuilder
+from src.utils.dedup import ChunkDeduplicator, source_urls
+from src.utils.tracing import Tracer, get_tracer, profile
+from src.models.llm_gateway import LLMGateway
 from mistralai import Mistral
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NO_CONTEXT_ANSWER = (
+    "I apologize, but I couldn't find any relevant information "
+    "in the available documents to answer your question."
+)
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that answers questions about "
+    "UDST policies. Use the provided context to answer questions "
+    "accurately. If you don't find relevant information in the "
+    "context to answer the question, say so and don't include "
+    "any source documents."
+)
+
+WARMUP_QUERY = "What happens to a student placed on academic probation?"
+
 
 class RAGModel:
-    def __init__(self):
-        """Initialize the RAG model with all necessary components."""
+    def __init__(
+        self,
+        embedder: Optional[DocumentEmbedder] = None,
+        client: Optional[Mistral] = None,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        Initialize the RAG model with all necessary components.
+        
+        Args:
+            embedder (Optional[DocumentEmbedder]): Preloaded embedder
+            client (Optional[Mistral]): Chat client, defaults to Mistral
+            tracer (Optional[Tracer]): Span sink, defaults to the global tracer
+        """
         self.config = Config()
+        self.tracer = tracer or get_tracer()
         self.scraper = PolicyScraper()
         self.processor = TextProcessor()
-        self.embedder = DocumentEmbedder()
-        self.index = FAISSIndex()
-        self.client = Mistral(
-            api_key=self.config.MISTRAL_API_KEY
+        self.deduplicator = ChunkDeduplicator()
+        self.embedder = embedder or DocumentEmbedder()
+        # Scatter-gather over shard servers when they are configured
+        self.index = (
+            ShardedIndex() if self.config.SHARD_ADDRESSES else FAISSIndex()
         )
+        self.reranker = CrossEncoderReranker()
+        self.context_builder = ContextBuilder()
+        self.faq = FAQIndex()
+        # Off in a launcher that forks workers: threads do not survive a fork
+        self.background_refresh = True
+        self._system_prompt_tokens: Optional[int] = None
+        # Serving readiness and cold-start vs steady-state retrieval latency
+        self.ready = False
+        self.warmup_stats: Dict[str, float] = {}
+        self._first_query_ms: Optional[float] = None
+        self._recent_query_ms = deque(maxlen=self.config.SERVING_LATENCY_WINDOW)
+        self._owns_client = client is None
+        self.client = client or self._new_client()
+        # Rate limits, retries and deadlines for every LLM call
+        self.llm = LLMGateway(self.client, self.tracer)
+        
+    def _new_client(self) -> Mistral:
+        return Mistral(
+            api_key=self.config.MISTRAL_API_KEY,
+            server_url=self.config.MISTRAL_SERVER_URL
+        )
+        
+    def after_fork(self, num_threads: int = 0):
+        """
+        Re-create per-process state in a worker forked from a loaded model
+        
+        The weights, index and metadata stay shared copy-on-write; HTTP
+        connections and thread pools do not survive a fork and are rebuilt.
+        
+        Args:
+            num_threads (int): Encoder intra-op threads for this worker,
+                0 keeps the parent's count
+        """
+        if self._owns_client:
+            self.client = self._new_client()
+        llm = self.llm
+        self.llm = LLMGateway(
+            self.client, self.tracer,
+            rate_limit=llm.bucket.rate,
+            burst=llm.bucket.capacity,
+            max_concurrency=llm.max_concurrency,
+            max_retries=llm.max_retries,
+            deadline_s=llm.deadline_s,
+            hedge_after_ms=llm.hedge_after_ms
+        )
+        self.reranker.after_fork()
+        self.embedder.after_fork(num_threads)
+        if isinstance(self.index, ShardedIndex):
+            self.index.after_fork()
+        self.faq.after_fork()
+        self.background_refresh = True
+        self.refresh_faq()
     
     def initialize(self) -> bool:
         """
@@ -34,164 +129,506 @@ class RAGModel:
         # Try to load existing index
         if self.index.load_index():
             logger.info("Successfully loaded existing index")
-            return True
+            self.load_faq()
+            return self.warm_up()
+        if self.index.incompatible and not self.config.INDEX_REBUILD_ON_MISMATCH:
+            logger.error(
+                "Saved index was built with another embedding model; "
+                "rebuild it or enable INDEX_REBUILD_ON_MISMATCH"
+            )
+            return False
+        if isinstance(self.index, ShardedIndex):
+            logger.error(
+                "Shard servers are not reachable or do not match the manifest; "
+                "build them with python -m src.retrieval.sharded_index build"
+            )
+            return False
             
         # If loading fails, create new index
         try:
             # Scrape documents
-            documents = self.scraper.scrape_policies()
+            with self.tracer.span("ingest.scrape"):
+                documents = self.scraper.scrape_policies()
             if not documents:
                 logger.error("No documents were scraped")
                 return False
+            self.tracer.incr("ingest.documents", len(documents))
                 
-            # Process documents
-            all_chunks = []
-            for doc in documents:
-                # Ensure consistent metadata keys
-                metadata = {
-                    'source_url': doc['url'],
-                    'source_file': doc['filepath']
-                }
-                chunks = self.processor.process_document(
-                    content=doc['content'],
-                    metadata=metadata
-                )
-                all_chunks.extend(chunks)
+            # Process documents into one columnar batch; unchanged documents
+            # reuse their stored chunks
+            batch = ChunkBatch()
+            cached = 0
+            with self.tracer.span("ingest.process", documents=len(documents)):
+                for doc in documents:
+                    # Ensure consistent metadata keys
+                    metadata = {
+                        'source_url': doc['url'],
+                        'source_file': doc['filepath']
+                    }
+                    chunks = self._stored_chunks(doc)
+                    if chunks is None:
+                        chunks = self._chunk_and_store(doc)
+                    else:
+                        cached += 1
+                    batch.add_document(metadata, chunks)
+                if self.scraper.store is not None:
+                    self.scraper.store.save()
+            self.tracer.incr("ingest.chunks", len(batch))
+            self.tracer.incr("ingest.cached_documents", cached)
+            
+            # Collapse boilerplate shared across policies into one vector
+            if self.config.DEDUP_ENABLED:
+                with self.tracer.span("ingest.dedup", chunks=len(batch)):
+                    unique = self.deduplicator.deduplicate_batch(batch)
+                self.tracer.incr("ingest.duplicate_chunks", len(batch) - len(unique))
+                batch = unique
                 
             # Generate embeddings
-            embeddings_dict = self.embedder.embed_chunks(all_chunks)
+            with self.tracer.span("ingest.embed", chunks=len(batch)):
+                self.embedder.embed_batch(batch)
             
             # Create index
-            self.index.create_index(embeddings_dict)
+            with self.tracer.span("ingest.index_build", chunks=len(batch)):
+                self.index.create_index(batch)
             logger.info("Successfully created new index")
-            return True
+            self.load_faq()
+            return self.warm_up()
             
         except Exception as e:
             logger.error(f"Error during initialization: {str(e)}")
             return False
             
-    def get_relevant_context(self, query: str) -> Tuple[str, List[str]]:
+    def _stored_chunks(self, doc: Dict[str, str]) -> Optional[List[str]]:
+        """Chunks from the document store if the document is unchanged."""
+        store = self.scraper.store
+        if store is None or 'content_hash' not in doc:
+            return None
+        return store.get_chunks(
+            doc['url'], doc['content_hash'],
+            self.processor.chunk_size, self.processor.chunk_overlap
+        )
+        
+    def _chunk_and_store(self, doc: Dict[str, str]) -> List[str]:
+        """Clean and chunk a document, recording the chunks in the store."""
+        clean_text = self.processor.clean_text(doc['content'])
+        chunks = self.processor.split_clean_text(clean_text)
+        store = self.scraper.store
+        if store is not None and doc['url'] in store.documents:
+            store.put_chunks(
+                doc['url'], clean_text, chunks,
+                self.processor.chunk_size, self.processor.chunk_overlap
+            )
+        return chunks
+        
+    def warm_up(self) -> bool:
+        """
+        Pay the first-query costs before reporting ready
+        
+        Encodes texts at query and chunk length, then runs the warm-up
+        query through retrieval (index search, re-ranker, tokenizer) and
+        the prompt template, once cold and
+        SERVING_WARMUP_QUERIES times warm. Sets ``ready``.
+        
+        Returns:
+            bool: True if the model is ready to serve
+        """
+        if not self.config.SERVING_WARMUP:
+            self.ready = True
+            return True
+        try:
+            with self.tracer.span("rag.warmup"):
+                chunk = next(iter(self.index.metadata.values()), {}).get('content', '')
+                self.embedder.generate_embeddings([WARMUP_QUERY, chunk or WARMUP_QUERY])
+                if self.config.RERANK_ENABLED:
+                    self.reranker.warm_up()
+                
+                timings = []
+                for _ in range(1 + self.config.SERVING_WARMUP_QUERIES):
+                    start = time.perf_counter()
+                    context, _ = self._get_relevant_context(WARMUP_QUERY, None, None)
+                    self.build_messages(WARMUP_QUERY, context)
+                    timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.error(f"Error during warm-up: {str(e)}")
+            return False
+            
+        self.warmup_stats = {
+            'cold_query_ms': timings[0],
+            'warm_query_ms': statistics.median(timings[1:] or timings),
+        }
+        self.ready = True
+        logger.info(
+            f"Warm-up done: cold query {timings[0]:.1f} ms, "
+            f"warm {self.warmup_stats['warm_query_ms']:.1f} ms"
+        )
+        return True
+        
+    def latency_stats(self) -> Dict[str, Optional[float]]:
+        """Warm-up timings, the first served retrieval and the median of
+        recent ones, in milliseconds."""
+        recent = list(self._recent_query_ms)
+        return {
+            **self.warmup_stats,
+            'first_query_ms': self._first_query_ms,
+            'steady_query_ms': statistics.median(recent) if recent else None,
+        }
+        
+    def load_faq(self):
+        """Load precomputed FAQ answers and refresh stale ones in the
+        background; stale answers are never served meanwhile."""
+        if not self.config.FAQ_ENABLED or not self.faq.load():
+            return
+        self.refresh_faq()
+
+    def refresh_faq(self):
+        """Re-answer FAQ entries built on older documents in a background
+        thread, unless background refresh is off in this process."""
+        if (
+            self.background_refresh
+            and self.config.FAQ_AUTO_REFRESH
+            and self.faq.stale_questions(self.index.version)
+        ):
+            threading.Thread(
+                target=refresh_faq_index, args=(self, self.faq), daemon=True
+            ).start()
+            
+    def lookup_faq(
+        self, query_embedding: np.ndarray, question: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Return a precomputed answer close enough to the query, if any."""
+        if not self.config.FAQ_ENABLED or not len(self.faq):
+            return None
+        with self.tracer.span("rag.faq_lookup") as span:
+            hit = self.faq.lookup(query_embedding, self.index.version, question)
+            span.set_attribute("hit", hit is not None)
+        if hit is not None:
+            self.tracer.incr("rag.faq_hits")
+            logger.info(f"Answered from FAQ: {hit['question']}")
+        return hit
+            
+    def get_relevant_context(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[str, List[str]]:
         """
         Retrieve relevant context and sources for a query
         
         Args:
             query (str): User query
+            filters (Optional[Dict[str, Any]]): Metadata filter expression,
+                e.g. ``{'source_file': 'examination-policy.txt'}``
+            query_embedding (Optional[np.ndarray]): Precomputed query
+                embedding, e.g. from a batched encode
             
         Returns:
             Tuple containing:
                 - str: Concatenated context
                 - List[str]: List of source URLs
         """
+        start = time.perf_counter()
+        with self.tracer.span("rag.retrieve"):
+            result = self._get_relevant_context(query, filters, query_embedding)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self._first_query_ms is None:
+            self._first_query_ms = elapsed_ms
+        else:
+            self._recent_query_ms.append(elapsed_ms)
+        return result
+            
+    def _get_relevant_context(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        query_embedding: Optional[np.ndarray]
+    ) -> Tuple[str, List[str]]:
         logger.info(f"Processing query: {query}")
+        self.tracer.incr("rag.queries")
         
         # Generate query embedding
-        query_embedding = self.embedder.generate_embedding(query)
-        logger.info("Generated query embedding")
+        if query_embedding is None:
+            with self.tracer.span("rag.embed_query"):
+                query_embedding = self.embedder.generate_embedding(query)
+            logger.info("Generated query embedding")
         
-        # Search for relevant chunks
-        results = self.index.search(query_embedding)
+        # Search for relevant chunks, widening the pool when re-ranking
+        top_k = None
+        if self.config.RERANK_ENABLED:
+            top_k = self.config.RERANK_CANDIDATES
+        with self.tracer.span(
+            "rag.search", hybrid=self.config.HYBRID_SEARCH
+        ) as span:
+            if self.config.HYBRID_SEARCH:
+                results = self.index.hybrid_search(
+                    query, query_embedding, top_k, filters
+                )
+            elif filters:
+                results = self.index.search(query_embedding, top_k, filters)
+            else:
+                results = self.index.search(query_embedding, top_k)
+            span.set_attribute("results", len(results))
         logger.info(f"Search returned {len(results)} results")
         
         if not results:
             logger.warning("No relevant chunks found for query")
             return "", []
         
-        # Sort results by similarity score
-        results.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
+        # Sort results by fused score when available, else similarity score
+        results.sort(
+            key=lambda x: x.get('rrf_score', x.get('similarity_score', 0)),
+            reverse=True
+        )
+        
+        # Trade redundant chunks of one policy for coverage of others;
+        # keep the re-ranker's whole candidate pool when it runs next
+        if self.config.MMR_ENABLED:
+            keep = self.config.MMR_TOP_K
+            if self.config.RERANK_ENABLED:
+                keep = max(keep, self.config.RERANK_CANDIDATES)
+            with self.tracer.span("rag.diversify"):
+                results = self.diversify(query_embedding, results, keep)
+        
+        # Keep only the best few candidates according to the cross-encoder
+        if self.config.RERANK_ENABLED:
+            with self.tracer.span("rag.rerank"):
+                results = self.reranker.rerank(query, results)
         
         # Extract sources and log them
-        sources = list(set(r['source_url'] for r in results))
+        sources = list(set(url for r in results for url in source_urls(r)))
         logger.info(f"Found {len(sources)} unique sources")
         for source in sources:
             logger.info(f"Source URL: {source}")
         
-        # Build context string with chunks and their scores
-        context_parts = []
-        for r in results:
-            score = r.get('similarity_score', 0)
-            distance = r.get('distance', float('inf'))
-            context_parts.append(
-                f"Source: {r['source_url']}\n"
-                f"Relevance Score: {score:.3f} (Distance: {distance:.3f})\n"
-                f"Content: {r['content']}"
-            )
-        
-        context = "\n\n---\n\n".join(context_parts)
-        logger.info(f"Built context with {len(context_parts)} chunks")
+        # Build a deduplicated, token-budgeted context string
+        with self.tracer.span("rag.context_build") as span:
+            context, context_stats = self.context_builder.build(results)
+            span.set_attribute("context_tokens", context_stats['context_tokens'])
         
         return context, sources
         
+    def diversify(
+        self, query_embedding: np.ndarray, results: List[Dict],
+        top_k: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Select a diverse subset of results with MMR and a per-source cap
+        
+        Args:
+            query_embedding (np.ndarray): Query embedding vector
+            results (List[Dict]): Retrieved chunks, best first
+            top_k (Optional[int]): Chunks to keep, defaults to MMR_TOP_K
+            
+        Returns:
+            List[Dict]: At most ``top_k`` chunks, in MMR pick order
+        """
+        if not all('index_id' in r for r in results):
+            return results
+            
+        embeddings = self.index.get_embeddings([r['index_id'] for r in results])
+        order = mmr_select(
+            query_embedding,
+            embeddings,
+            k=len(results),
+            lambda_mult=self.config.MMR_LAMBDA
+        )
+        selected = cap_per_source(
+            [results[i] for i in order],
+            self.config.MAX_CHUNKS_PER_SOURCE
+        )[:top_k or self.config.MMR_TOP_K]
+        logger.info(
+            f"Selected {len(selected)} diverse chunks from "
+            f"{len(set(r.get('source_file') for r in selected))} sources"
+        )
+        return selected
+        
+    def build_messages(
+        self, question: str, context: str
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Build the chat messages for a question and its context
+        
+        Args:
+            question (str): User question
+            context (str): Retrieved context
+            
+        Returns:
+            Tuple containing:
+                - List[Dict[str, str]]: System and user messages
+                - int: Prompt size in tokens
+        """
+        messages = [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": f"Context:\n{context}\n\nQuestion: {question}"
+            }
+        ]
+        
+        # The system prompt never changes, count its tokens once
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = self.context_builder.count_tokens(SYSTEM_PROMPT)
+        prompt_tokens = self._system_prompt_tokens + self.context_builder.count_tokens(
+            messages[1]["content"]
+        )
+        logger.info(f"Prompt size: {prompt_tokens} tokens")
+        return messages, prompt_tokens
+        
+    @staticmethod
+    def _answer_has_no_info(answer: str) -> bool:
+        """Whether the answer says the context had nothing relevant."""
+        return any(phrase in answer.lower() for phrase in [
+            "i apologize",
+            "i'm sorry",
+            "i am sorry",
+            "no relevant information",
+            "cannot find",
+            "don't have information",
+            "do not have information"
+        ])
+        
     def get_answer_with_sources(
-        self, question: str
+        self,
+        question: str,
+        query_embedding: Optional[np.ndarray] = None,
+        use_faq: bool = True
     ) -> Tuple[Optional[str], List[str]]:
         """
         Get answer and source documents for a question using RAG
         
         Args:
             question (str): User question
+            query_embedding (Optional[np.ndarray]): Precomputed query embedding
+            use_faq (bool): Answer from the FAQ index when the question is
+                close to a precomputed one
             
         Returns:
             Tuple containing:
                 - Optional[str]: Generated answer
                 - List[str]: List of source URLs
         """
+        with self.tracer.span("rag.answer"):
+            return self._get_answer_with_sources(
+                question, query_embedding, use_faq
+            )
+            
+    def _get_answer_with_sources(
+        self,
+        question: str,
+        query_embedding: Optional[np.ndarray],
+        use_faq: bool
+    ) -> Tuple[Optional[str], List[str]]:
         try:
+            if use_faq and len(self.faq):
+                if query_embedding is None:
+                    with self.tracer.span("rag.embed_query"):
+                        query_embedding = self.embedder.generate_embedding(question)
+                hit = self.lookup_faq(query_embedding, question)
+                if hit is not None:
+                    return hit['answer'], hit['sources']
+                    
             # Get relevant context and sources
-            context, sources = self.get_relevant_context(question)
+            context, sources = self.get_relevant_context(
+                question, query_embedding=query_embedding
+            )
             if not context:
-                return (
-                    "I apologize, but I couldn't find any relevant information "
-                    "in the available documents to answer your question.",
-                    []  # Return empty sources list when no context found
-                )
+                return NO_CONTEXT_ANSWER, []
                 
             # Create messages for Mistral chat
-            system_msg = (
-                "You are a helpful assistant that answers questions about "
-                "UDST policies. Use the provided context to answer questions "
-                "accurately. If you don't find relevant information in the "
-                "context to answer the question, say so and don't include "
-                "any source documents."
-            )
-            messages = [
-                {
-                    "role": "system",
-                    "content": system_msg
-                },
-                {
-                    "role": "user",
-                    "content": f"Context:\n{context}\n\nQuestion: {question}"
-                }
-            ]
+            messages, prompt_tokens = self.build_messages(question, context)
             
             # Generate answer using Mistral AI
-            response = self.client.chat.complete(
-                model=self.config.MISTRAL_MODEL,
-                messages=messages,
-                temperature=self.config.TEMPERATURE,
-                max_tokens=self.config.MAX_TOKENS
-            )
+            with self.tracer.span(
+                "rag.llm", model=self.config.MISTRAL_MODEL,
+                prompt_tokens=prompt_tokens
+            ):
+                response = self.llm.complete(
+                    model=self.config.MISTRAL_MODEL,
+                    messages=messages,
+                    temperature=self.config.TEMPERATURE,
+                    max_tokens=self.config.MAX_TOKENS
+                )
             
             answer = response.choices[0].message.content.strip()
             
             # Only return sources if the answer indicates we found relevant information
-            if any(phrase in answer.lower() for phrase in [
-                "i apologize",
-                "i'm sorry",
-                "i am sorry",
-                "no relevant information",
-                "cannot find",
-                "don't have information",
-                "do not have information"
-            ]):
+            if self._answer_has_no_info(answer):
                 return answer, []
             
             return answer, sources
             
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
+            self.tracer.incr("rag.errors")
             return None, []
             
+    def stream_answer_with_sources(
+        self,
+        question: str,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[Iterator[str], List[str]]:
+        """
+        Retrieve context, then stream the answer as it is generated
+        
+        Args:
+            question (str): User question
+            query_embedding (Optional[np.ndarray]): Precomputed query embedding
+            
+        Returns:
+            Tuple containing:
+                - Iterator[str]: Answer text deltas
+                - List[str]: List of source URLs
+        """
+        if len(self.faq):
+            if query_embedding is None:
+                query_embedding = self.embedder.generate_embedding(question)
+            hit = self.lookup_faq(query_embedding, question)
+            if hit is not None:
+                return iter([hit['answer']]), hit['sources']
+                
+        context, sources = self.get_relevant_context(
+            question, query_embedding=query_embedding
+        )
+        if not context:
+            return iter([NO_CONTEXT_ANSWER]), []
+            
+        messages, _ = self.build_messages(question, context)
+        
+        def deltas() -> Iterator[str]:
+            with self.tracer.span("rag.llm_stream", model=self.config.MISTRAL_MODEL):
+                stream = self.llm.stream(
+                    model=self.config.MISTRAL_MODEL,
+                    messages=messages,
+                    temperature=self.config.TEMPERATURE,
+                    max_tokens=self.config.MAX_TOKENS
+                )
+                for event in stream:
+                    delta = event.data.choices[0].delta.content
+                    if delta:
+                        yield delta
+                        
+        return deltas(), sources
+        
+    def profile_answer(
+        self, question: str, mode: str = "cprofile"
+    ) -> Tuple[Optional[str], List[str], str]:
+        """
+        Answer a question while capturing a CPU profile of the request
+        
+        Args:
+            question (str): User question
+            mode (str): "cprofile" or "pyinstrument"
+            
+        Returns:
+            Tuple containing the answer, the sources and the profile report
+        """
+        with profile(mode) as capture:
+            answer, sources = self.get_answer_with_sources(question)
+        return answer, sources, capture['report']
+            
     def get_answer(self, question: str) -> Optional[str]:
         """
         Get answer for a question using RAG (legacy method)
@@ -0,0 +1,218 @@
+import re
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep dotted section numbers ("4.2", "1.1.3") together as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into lexical tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> List[Tuple[int, float]]:
+    """
+    Fuse several ranked lists of ids with reciprocal rank fusion
+
+    Args:
+        rankings (Sequence[Sequence[int]]): Ranked id lists, best first
+        k (int): RRF damping constant
+
+    Returns:
+        List[Tuple[int, float]]: (id, fused score) pairs, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+class BM25Index:
+    def __init__(self, k1: float = None, b: float = None):
+        """Initialize an empty BM25 inverted index."""
+        self.config = Config()
+        self.k1 = self.config.BM25_K1 if k1 is None else k1
+        self.b = self.config.BM25_B if b is None else b
+        self.vocab: Dict[str, int] = {}
+        # Postings are stored CSR-style: the postings of term t are
+        # doc_ids[offsets[t]:offsets[t + 1]] with matching weights
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_lens)
+
+    def build(self, texts: Sequence[str]):
+        """
+        Build the inverted index over a list of texts
+
+        Document ids are positions in ``texts``, so they line up with the
+        row ids of a FAISS index built from the same chunks.
+
+        Args:
+            texts (Sequence[str]): Chunk texts in index order
+        """
+        term_docs: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lens = np.zeros(len(texts), dtype=np.int32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens[doc_id] = len(tokens)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_docs.setdefault(token, []).append((doc_id, tf))
+
+        num_docs = len(texts)
+        avg_len = float(doc_lens.mean()) if num_docs else 0.0
+        terms = sorted(term_docs)
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        idf = np.zeros(len(terms), dtype=np.float32)
+        doc_ids = []
+        tfs = []
+        for term_id, term in enumerate(terms):
+            postings = term_docs[term]
+            offsets[term_id + 1] = offsets[term_id] + len(postings)
+            df = len(postings)
+            idf[term_id] = np.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings:
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # Precompute the full BM25 term weight of every posting so that a
+        # query only has to add up a few slices
+        norm = self.k1 * (
+            1.0 - self.b + self.b * doc_lens[doc_ids] / max(avg_len, 1e-9)
+        )
+        posting_idf = np.repeat(idf, np.diff(offsets))
+        weights = posting_idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights.astype(np.float32)
+        self.idf = idf
+        self.doc_lens = doc_lens
+        logger.info(
+            f"Built BM25 index with {num_docs} documents "
+            f"and {len(terms)} terms"
+        )
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query
+
+        Args:
+            query (str): Query text
+            top_k (int): Number of results to return
+            allowed (Optional[np.ndarray]): Only rank these document ids
+
+        Returns:
+            List[Tuple[int, float]]: (doc id, BM25 score) pairs, best first
+        """
+        if not self.num_docs:
+            return []
+
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # A term appears at most once per document, so fancy-index
+            # addition is safe here
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+
+        if allowed is not None:
+            mask = np.zeros(self.num_docs, dtype=bool)
+            mask[allowed] = True
+            scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def save(self, path: str) -> bool:
+        """
+        Save the inverted index to a compressed ``.npz`` file
+
+        Args:
+            path (str): Target file path
+
+        Returns:
+            bool: True if saving was successful
+        """
+        try:
+            terms = sorted(self.vocab, key=self.vocab.get)
+            with open(path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    vocab=np.array(terms, dtype=str),
+                    offsets=self.offsets,
+                    doc_ids=self.doc_ids,
+                    weights=self.weights,
+                    idf=self.idf,
+                    doc_lens=self.doc_lens,
+                    params=np.array([self.k1, self.b], dtype=np.float64),
+                )
+            logger.info(f"Saved BM25 index to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving BM25 index: {str(e)}")
+            return False
+
+    def load(self, path: str) -> bool:
+        """
+        Load an inverted index saved with :meth:`save`
+
+        Args:
+            path (str): Source file path
+
+        Returns:
+            bool: True if loading was successful
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                self.vocab = {
+                    str(term): i for i, term in enumerate(data['vocab'])
+                }
+                self.offsets = data['offsets']
+                self.doc_ids = data['doc_ids']
+                self.weights = data['weights']
+                self.idf = data['idf']
+                self.doc_lens = data['doc_lens']
+                self.k1, self.b = (float(x) for x in data['params'])
+            logger.info(f"Loaded BM25 index from {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading BM25 index: {str(e)}")
+            return False
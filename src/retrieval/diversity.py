@@ -0,0 +1,81 @@
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr_select(
+    query_embedding: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """
+    Pick a relevant but diverse subset with maximal marginal relevance
+
+    Args:
+        query_embedding (np.ndarray): Query vector
+        embeddings (np.ndarray): Candidate vectors, one row per candidate
+        k (int): Number of candidates to select
+        lambda_mult (float): 1.0 is pure relevance, 0.0 pure diversity
+
+    Returns:
+        List[int]: Row positions of the selected candidates, in pick order
+    """
+    n = len(embeddings)
+    if n == 0 or k <= 0:
+        return []
+
+    candidates = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32).ravel())
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything selected so far
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+def cap_per_source(
+    results: List[Dict], max_per_source: Optional[int]
+) -> List[Dict]:
+    """
+    Keep at most ``max_per_source`` results from each source document
+
+    Args:
+        results (List[Dict]): Results, best first
+        max_per_source (Optional[int]): Cap per ``source_file``; None disables
+
+    Returns:
+        List[Dict]: Results that fit the cap, in their original order
+    """
+    if not max_per_source:
+        return results
+    counts: Dict[str, int] = {}
+    kept = []
+    for result in results:
+        source = result.get('source_file', '')
+        if counts.get(source, 0) < max_per_source:
+            counts[source] = counts.get(source, 0) + 1
+            kept.append(result)
+    return kept
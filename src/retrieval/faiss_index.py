@@ -1,15 +1,30 @@
+import hashlib
+import os
 import faiss
 import numpy as np
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Union
 import json
 import logging
 from src.config.config import Config
+from src.retrieval.bm25_index import BM25Index, reciprocal_rank_fusion
+from src.utils.chunk_batch import ChunkBatch
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def content_version(chunk_ids: List[str], metadata: Dict[str, Dict]) -> str:
+    """Hash chunk metadata in row order; any document change alters it."""
+    digest = hashlib.sha256()
+    for chunk_id in chunk_ids:
+        digest.update(chunk_id.encode('utf-8'))
+        digest.update(
+            json.dumps(metadata.get(chunk_id, {}), sort_keys=True).encode('utf-8')
+        )
+    return digest.hexdigest()[:16]
+
+
 class FAISSIndex:
     def __init__(self):
         """Initialize FAISS index manager."""
@@ -17,32 +32,88 @@ class FAISSIndex:
         self.index = None
         self.metadata = {}
         self.id_mapping = {}  # Map FAISS indices to chunk IDs
+        self.sparse_index = BM25Index()  # Lexical index over chunk text
+        self.source_ranges = {}  # Map source_file to its FAISS id ranges
+        self._merged_ids = {}  # Map source_file to deduplicated chunks kept elsewhere
+        self._field_ids = {}  # Lazily built value -> ids tables per field
+        self.index_info = {}  # Embedding model the loaded index was built with
+        self.incompatible = False  # Last load found an index from another model
+        self.version = ''  # Hash of the indexed chunks, changes with the documents
+        self.doc_index = None  # Normalized per-document centroids, one row per source
+        self.doc_sources = []  # source_file of each doc_index row
+        self._doc_of_id = np.zeros(0, dtype='int64')  # doc_index row of each chunk
         
-    def create_index(self, embeddings_dict: Dict[str, Dict]):
+    def create_index(self, embeddings_dict: Union[Dict[str, Dict], ChunkBatch]):
         """Create FAISS index from embeddings.
         
         Args:
-            embeddings_dict: Dictionary of embeddings and metadata
+            embeddings_dict: Dictionary of embeddings and metadata, or a
+                ChunkBatch with its embedding matrix
         """
-        chunk_ids = list(embeddings_dict.keys())
-        embeddings = np.array([
-            embeddings_dict[chunk_id]['embedding'] 
-            for chunk_id in chunk_ids
-        ])
+        if isinstance(embeddings_dict, ChunkBatch):
+            batch = embeddings_dict
+            chunk_ids = [batch.chunk_id(row) for row in range(len(batch))]
+            embeddings = np.ascontiguousarray(batch.embeddings, dtype='float32')
+            metadata = [batch.metadata(row) for row in range(len(batch))]
+        else:
+            chunk_ids = list(embeddings_dict.keys())
+            embeddings = np.array([
+                embeddings_dict[chunk_id]['embedding'] 
+                for chunk_id in chunk_ids
+            ], dtype='float32')
+            metadata = [embeddings_dict[chunk_id]['metadata'] for chunk_id in chunk_ids]
         
         # Create and populate index
-        self.index = faiss.IndexFlatL2(self.config.EMBEDDING_DIMENSION)
-        self.index.add(embeddings.astype('float32'))
+        self.index = self._new_index(embeddings)
         
         # Store metadata and mapping
-        self.metadata = {}
-        for i, chunk_id in enumerate(chunk_ids):
-            self.metadata[chunk_id] = embeddings_dict[chunk_id]['metadata']
-            self.id_mapping[i] = chunk_id
+        self.metadata = dict(zip(chunk_ids, metadata))
+        self.id_mapping = dict(enumerate(chunk_ids))
+        
+        # Build the lexical index and filter tables over the same rows
+        self._build_sparse_index()
+        self._build_filter_tables()
+        self._reset_document_index()
+        self.version = self._content_version()
         
         # Save index and metadata
         self.save_index()
         
+    def _new_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Build a FAISS index of the configured INDEX_TYPE over embeddings
+        
+        Args:
+            embeddings (np.ndarray): float32 matrix, one row per chunk
+            
+        Returns:
+            faiss.Index: Populated index
+        """
+        dimension = self.config.EMBEDDING_DIMENSION
+        index_type = self.config.INDEX_TYPE
+        
+        if index_type == 'flat':
+            index = faiss.IndexFlatL2(dimension)
+        elif index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dimension, self.config.HNSW_M)
+            index.hnsw.efSearch = self.config.HNSW_EF_SEARCH
+        elif index_type == 'ivf':
+            # FAISS wants ~39 training points per list
+            nlist = max(1, min(self.config.IVF_NLIST, len(embeddings) // 39))
+            quantizer = faiss.IndexFlatL2(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            index.train(embeddings)
+            index.nprobe = min(self.config.IVF_NPROBE, nlist)
+        else:
+            raise ValueError(f"Unknown index type: {index_type}")
+            
+        index.add(embeddings)
+        if index_type == 'ivf':
+            # Needed to reconstruct vectors for hybrid search and MMR
+            index.make_direct_map()
+        logger.info(f"Built {index_type} index with {index.ntotal} vectors")
+        return index
+        
     def save_index(self):
         """Save FAISS index and metadata to disk."""
         if self.index is None:
@@ -55,12 +126,17 @@ class FAISSIndex:
             
             # Save metadata and mapping
             metadata_path = f"{self.config.INDEX_PATH}_metadata.json"
+            self.index_info = self._current_index_info()
             save_data = {
+                'index_info': self.index_info,
                 'metadata': self.metadata,
                 'id_mapping': self.id_mapping
             }
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(save_data, f, ensure_ascii=False, indent=2)
+            
+            # Save lexical index
+            self.sparse_index.save(self.config.SPARSE_INDEX_PATH)
                 
             logger.info("Successfully saved index and metadata")
             
@@ -74,6 +150,7 @@ class FAISSIndex:
         Returns:
             bool: True if loading was successful, False otherwise
         """
+        self.incompatible = False
         try:
             # Load FAISS index
             self.index = faiss.read_index(self.config.INDEX_PATH)
@@ -82,8 +159,33 @@ class FAISSIndex:
             metadata_path = f"{self.config.INDEX_PATH}_metadata.json"
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 save_data = json.load(f)
-                self.metadata = save_data['metadata']
-                self.id_mapping = {int(k): v for k, v in save_data['id_mapping'].items()}
+            
+            # Refuse vectors from another embedding model
+            index_info = save_data.get('index_info') or self._legacy_index_info()
+            mismatch = self.compatibility_error(index_info)
+            if mismatch:
+                logger.error(f"Saved index does not match the embedding model: {mismatch}")
+                self.index = None
+                self.incompatible = True
+                return False
+            self.index_info = index_info
+            self.metadata = save_data['metadata']
+            self.id_mapping = {int(k): v for k, v in save_data['id_mapping'].items()}
+            
+            # Load lexical index, rebuilding it for indexes saved without one
+            sparse_path = self.config.SPARSE_INDEX_PATH
+            if (
+                not os.path.exists(sparse_path)
+                or not self.sparse_index.load(sparse_path)
+                or self.sparse_index.num_docs != self.index.ntotal
+            ):
+                logger.info("Rebuilding lexical index from metadata")
+                self._build_sparse_index()
+            self._build_filter_tables()
+            self.version = self._content_version()
+            if isinstance(self.index, faiss.IndexIVF):
+                self.index.make_direct_map()
+            self._reset_document_index()
                 
             logger.info("Successfully loaded index and metadata")
             return True
@@ -92,12 +194,245 @@ class FAISSIndex:
             logger.error(f"Error loading index: {str(e)}")
             return False
             
-    def search(self, query_embedding: np.ndarray) -> List[Dict[str, str]]:
+    def _content_version(self) -> str:
+        """Hash the chunk metadata in row order."""
+        return content_version(
+            [self.id_mapping[i] for i in range(len(self.id_mapping))], self.metadata
+        )
+        
+    def _current_index_info(self) -> Dict[str, Any]:
+        """Describe the embedding model and index stamped into saved metadata."""
+        return {
+            'embedding_profile': self.config.EMBEDDING_PROFILE,
+            'embedding_model': self.config.EMBEDDING_MODEL,
+            'embedding_dimension': self.config.EMBEDDING_DIMENSION,
+            'index_type': self.config.INDEX_TYPE,
+            'num_vectors': int(self.index.ntotal) if self.index is not None else 0,
+        }
+        
+    def _legacy_index_info(self) -> Dict[str, Any]:
+        """Stamp for indexes saved before stamping; all used the default model."""
+        profile = self.config.DEFAULT_EMBEDDING_PROFILE
+        return {
+            'embedding_profile': profile,
+            'embedding_model': self.config.EMBEDDING_PROFILES[profile]['model'],
+            'embedding_dimension': int(self.index.d),
+        }
+        
+    def compatibility_error(self, index_info: Dict[str, Any]) -> Optional[str]:
+        """
+        Check a saved index against the configured embedding model
+        
+        Args:
+            index_info (Dict[str, Any]): Stamp read from the saved metadata
+            
+        Returns:
+            Optional[str]: Why the index cannot be used, None if it can
+        """
+        if index_info.get('embedding_model') != self.config.EMBEDDING_MODEL:
+            return (
+                f"built with {index_info.get('embedding_model')}, "
+                f"configured {self.config.EMBEDDING_MODEL}"
+            )
+        dimension = self.config.EMBEDDING_DIMENSION
+        if self.index is not None and self.index.d != dimension:
+            return f"index dimension {self.index.d}, configured {dimension}"
+        if index_info.get('embedding_dimension') != dimension:
+            return (
+                f"stamped dimension {index_info.get('embedding_dimension')}, "
+                f"configured {dimension}"
+            )
+        return None
+        
+    def _build_sparse_index(self):
+        """Build the BM25 index over chunk text in FAISS row order."""
+        texts = [
+            self.metadata.get(self.id_mapping.get(i), {}).get('content', '')
+            for i in range(self.index.ntotal)
+        ]
+        self.sparse_index.build(texts)
+        
+    def _build_filter_tables(self):
+        """Precompute contiguous FAISS id ranges for every source_file."""
+        self.source_ranges = {}
+        self._merged_ids = {}
+        self._field_ids = {}
+        for i in range(self.index.ntotal):
+            meta = self.metadata.get(self.id_mapping.get(i), {})
+            source = meta.get('source_file', '')
+            ranges = self.source_ranges.setdefault(source, [])
+            if ranges and ranges[-1][1] == i:
+                ranges[-1] = (ranges[-1][0], i + 1)
+            else:
+                ranges.append((i, i + 1))
+            # A deduplicated chunk also belongs to the other documents it came from
+            for location in meta.get('locations', []):
+                if location['source_file'] != source:
+                    self._merged_ids.setdefault(location['source_file'], []).append(i)
+        logger.info(
+            f"Computed id ranges for {len(self.source_ranges)} source files"
+        )
+        
+    def _reset_document_index(self):
+        """Drop centroids of the previous index; build them now only when
+        hierarchical search is on, otherwise on first use."""
+        self.doc_index = None
+        if self.config.HIERARCHICAL_SEARCH:
+            self._build_document_index()
+        
+    def _build_document_index(self):
+        """Build the top-level index of per-document centroid vectors."""
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        doc_sources = list(self.source_ranges)
+        doc_of_id = np.zeros(self.index.ntotal, dtype='int64')
+        centroids = np.zeros((len(doc_sources), self.index.d), dtype='float32')
+        for row, source in enumerate(doc_sources):
+            for start, end in self.source_ranges[source]:
+                centroids[row] += vectors[start:end].sum(axis=0)
+                doc_of_id[start:end] = row
+        # Cosine to the centroid ranks documents by their overall topic
+        faiss.normalize_L2(centroids)
+        doc_index = faiss.IndexFlatIP(self.index.d)
+        doc_index.add(centroids)
+        # Publish the index last, so a concurrent first search that sees it
+        # also sees its tables
+        self.doc_sources = doc_sources
+        self._doc_of_id = doc_of_id
+        self.doc_index = doc_index
+        logger.info(f"Built document index with {len(doc_sources)} centroids")
+        
+    @staticmethod
+    def _source_name(path: str) -> str:
+        """Basename that also handles paths saved on Windows."""
+        return path.replace('\\', '/').rsplit('/', 1)[-1]
+        
+    def _ids_for_field(self, field: str, value: Any) -> np.ndarray:
+        """FAISS ids whose metadata ``field`` equals ``value``."""
+        if field == 'source_file':
+            sources = [value] if (
+                value in self.source_ranges or value in self._merged_ids
+            ) else [
+                # Allow filtering by file name instead of the stored path
+                source
+                for source in set(self.source_ranges) | set(self._merged_ids)
+                if self._source_name(source) == value
+            ]
+            ids = [
+                np.arange(start, end)
+                for source in sources
+                for start, end in self.source_ranges.get(source, [])
+            ] + [
+                np.asarray(self._merged_ids[source])
+                for source in sources if source in self._merged_ids
+            ]
+            return np.unique(np.concatenate(
+                ids or [np.zeros(0, dtype='int64')]
+            ).astype('int64'))
+            
+        if field not in self._field_ids:
+            table = {}
+            for i in range(self.index.ntotal):
+                meta = self.metadata.get(self.id_mapping.get(i), {})
+                if field in meta:
+                    table.setdefault(str(meta[field]), []).append(i)
+            self._field_ids[field] = {
+                k: np.asarray(v, dtype='int64') for k, v in table.items()
+            }
+        return self._field_ids[field].get(str(value), np.zeros(0, dtype='int64'))
+        
+    def matching_ids(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Resolve a metadata filter expression to FAISS ids
+        
+        The expression maps metadata fields to a value or a list of
+        accepted values, e.g. ``{'source_file': 'examination-policy.txt'}``
+        or ``{'category': ['policy', 'procedure'], 'source_url': url}``.
+        Fields are AND-ed, values of one field are OR-ed.
+        
+        Args:
+            filters (Dict[str, Any]): Filter expression
+            
+        Returns:
+            np.ndarray: Sorted matching FAISS ids
+        """
+        ids = None
+        for field, values in filters.items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            field_ids = np.unique(np.concatenate(
+                [self._ids_for_field(field, v) for v in values]
+                or [np.zeros(0, dtype='int64')]
+            ))
+            ids = field_ids if ids is None else np.intersect1d(ids, field_ids)
+        if ids is None:
+            return np.arange(self.index.ntotal, dtype='int64')
+        return ids
+        
+    def _selector(self, ids: np.ndarray) -> faiss.IDSelector:
+        """Build the cheapest FAISS selector for a sorted id array."""
+        if ids[-1] - ids[0] + 1 == len(ids):
+            return faiss.IDSelectorRange(int(ids[0]), int(ids[-1]) + 1)
+        return faiss.IDSelectorBatch(ids)
+        
+    def get_embeddings(self, index_ids: List[int]) -> np.ndarray:
+        """
+        Fetch stored vectors for FAISS rows without re-embedding
+        
+        Args:
+            index_ids (List[int]): FAISS row ids, e.g. ``index_id`` of results
+            
+        Returns:
+            np.ndarray: Matrix with one vector per id
+        """
+        if self.index is None or not index_ids:
+            return np.zeros((0, self.config.EMBEDDING_DIMENSION), dtype='float32')
+        return self.index.reconstruct_batch(
+            np.asarray(index_ids, dtype='int64')
+        )
+        
+    def _build_result(self, idx: int, distance: float) -> Optional[Dict]:
+        """Build a search result dict for a FAISS row."""
+        # Get original chunk ID from mapping
+        chunk_id = self.id_mapping.get(int(idx))
+        if chunk_id is None:
+            logger.warning(f"No mapping found for index {idx}")
+            return None
+            
+        # Get metadata for chunk
+        if chunk_id not in self.metadata:
+            logger.warning(f"No metadata found for chunk_id {chunk_id}")
+            return None
+            
+        result = self.metadata[chunk_id].copy()
+        result['index_id'] = int(idx)
+        result['similarity_score'] = float(1.0 / (1.0 + distance))
+        result['distance'] = float(distance)
+        return result
+            
+    def _search_params(self, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        """Search parameters of the right type for the current index."""
+        if isinstance(self.index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        if isinstance(self.index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(
+                sel=selector, efSearch=self.index.hnsw.efSearch
+            )
+        return faiss.SearchParameters(sel=selector)
+        
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
         """
         Search for similar documents using query embedding
         
         Args:
             query_embedding (np.ndarray): Query embedding vector
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression,
+                applied inside the FAISS scan (see :meth:`matching_ids`)
             
         Returns:
             List[Dict[str, str]]: List of similar documents with metadata
@@ -110,42 +445,238 @@ class FAISSIndex:
         if len(query_embedding.shape) == 1:
             query_embedding = query_embedding.reshape(1, -1)
             
+        results = self.search_batch(query_embedding[:1], top_k, filters)[0]
+        for result in results:
+            logger.info(
+                f"Added result from {result.get('source_url', 'unknown')}"
+            )
+        
+        logger.info(f"Returning {len(results)} results after filtering")
+        if not results:
+            logger.warning("No results found after filtering!")
+            
+        return results
+        
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Search for several queries in one FAISS call
+        
+        Args:
+            query_embeddings (np.ndarray): Matrix with one query per row
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression
+            
+        Returns:
+            List[List[Dict[str, str]]]: Results for each query
+        """
+        if self.index is None:
+            logger.error("No index available for search")
+            return [[] for _ in range(len(query_embeddings))]
+        if self.config.HIERARCHICAL_SEARCH:
+            return self.hierarchical_search_batch(query_embeddings, top_k, filters)
+            
+        # Restrict the scan to matching ids when filtering
+        params = None
+        if filters:
+            ids = self.matching_ids(filters)
+            if not len(ids):
+                logger.warning(f"No chunks match filters {filters}")
+                return [[] for _ in range(len(query_embeddings))]
+            selector = self._selector(ids)
+            params = self._search_params(selector)
+            
         # Search index
         distances, indices = self.index.search(
-            query_embedding.astype('float32'),
-            self.config.TOP_K_MATCHES
+            np.asarray(query_embeddings, dtype='float32'),
+            top_k or self.config.TOP_K_MATCHES,
+            params=params
         )
         
         # Log search results for debugging
-        logger.info(f"Found {len(indices[0])} matches")
-        logger.info(f"Distances: {distances[0]}")
-        logger.info(f"Indices: {indices[0]}")
+        logger.info(f"Found {indices.shape[1]} matches for {len(indices)} queries")
+        logger.info(f"Distances: {distances}")
+        logger.info(f"Indices: {indices}")
         
         # Get metadata for results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            distance = distances[0][i]
+        batch_results = []
+        for row_indices, row_distances in zip(indices, distances):
+            results = []
+            for idx, distance in zip(row_indices, row_distances):
+                if idx < 0:
+                    continue
+                result = self._build_result(idx, distance)
+                if result is not None:
+                    results.append(result)
+            batch_results.append(results)
+            
+        return batch_results
+        
+    def search_documents(
+        self,
+        query_embeddings: np.ndarray,
+        top_docs: Optional[int] = None,
+        allowed_ids: Optional[np.ndarray] = None
+    ) -> List[List[str]]:
+        """
+        Rank source documents by the similarity of their centroid
+        
+        Args:
+            query_embeddings (np.ndarray): Matrix with one query per row
+            top_docs (Optional[int]): Documents per query, defaults to
+                HIERARCHICAL_TOP_DOCS
+            allowed_ids (Optional[np.ndarray]): Only rank documents with at
+                least one of these FAISS ids
             
-            # Get original chunk ID from mapping
-            chunk_id = self.id_mapping.get(int(idx))
-            if chunk_id is None:
-                logger.warning(f"No mapping found for index {idx}")
+        Returns:
+            List[List[str]]: source_file of the best documents per query
+        """
+        if self.doc_index is None:
+            self._build_document_index()
+        top_docs = min(
+            top_docs or self.config.HIERARCHICAL_TOP_DOCS, self.doc_index.ntotal
+        )
+        queries = np.array(query_embeddings, dtype='float32').reshape(
+            -1, self.doc_index.d
+        )
+        faiss.normalize_L2(queries)
+        params = None
+        if allowed_ids is not None:
+            doc_rows = np.unique(self._doc_of_id[allowed_ids])
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(doc_rows))
+        _, rows = self.doc_index.search(queries, top_docs, params=params)
+        return [
+            [self.doc_sources[row] for row in query_rows if row >= 0]
+            for query_rows in rows
+        ]
+        
+    def hierarchical_search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        top_docs: Optional[int] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Two-stage search: pick the top documents by centroid, then rank
+        only their chunks exactly
+        
+        The chunk stage reads the vectors of the selected documents'
+        contiguous id ranges, so its cost grows with ``top_docs`` rather
+        than with the corpus.
+        
+        Args:
+            query_embeddings (np.ndarray): Matrix with one query per row
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression
+            top_docs (Optional[int]): Documents searched per query, defaults
+                to HIERARCHICAL_TOP_DOCS
+            
+        Returns:
+            List[List[Dict[str, str]]]: Results for each query
+        """
+        top_k = top_k or self.config.TOP_K_MATCHES
+        queries = np.asarray(query_embeddings, dtype='float32').reshape(
+            -1, self.index.d
+        )
+        allowed = None
+        if filters:
+            allowed = self.matching_ids(filters)
+            if not len(allowed):
+                logger.warning(f"No chunks match filters {filters}")
+                return [[] for _ in range(len(queries))]
+                
+        batch_sources = self.search_documents(queries, top_docs, allowed)
+        batch_results = []
+        for query, sources in zip(queries, batch_sources):
+            ids = np.unique(np.concatenate([
+                self._ids_for_field('source_file', source) for source in sources
+            ] or [np.zeros(0, dtype='int64')]))
+            if allowed is not None:
+                ids = np.intersect1d(ids, allowed, assume_unique=True)
+            if not len(ids):
+                batch_results.append([])
                 continue
                 
-            # Get metadata for chunk
-            if chunk_id in self.metadata:
-                result = self.metadata[chunk_id].copy()
-                result['similarity_score'] = float(1.0 / (1.0 + distance))
-                result['distance'] = float(distance)
-                results.append(result)
-                logger.info(
-                    f"Added result from {result.get('source_url', 'unknown')}"
-                )
-            else:
-                logger.warning(f"No metadata found for chunk_id {chunk_id}")
+            # Exact L2 over the candidate chunks, same distances as IndexFlatL2
+            distances, positions = faiss.knn(
+                query.reshape(1, -1), self.index.reconstruct_batch(ids), min(top_k, len(ids))
+            )
+            results = []
+            for position, distance in zip(positions[0], distances[0]):
+                if position < 0:
+                    continue
+                result = self._build_result(ids[position], distance)
+                if result is not None:
+                    results.append(result)
+            batch_results.append(results)
+            
+        logger.info(
+            f"Hierarchical search over {len(batch_sources[0]) if batch_sources else 0} "
+            f"documents for {len(queries)} queries"
+        )
+        return batch_results
         
-        logger.info(f"Returning {len(results)} results after filtering")
-        if not results:
-            logger.warning("No results found after filtering!")
+    def hybrid_search(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Search with both the dense and the lexical index and fuse the
+        rankings with reciprocal rank fusion
+        
+        Args:
+            query (str): Query text for the lexical index
+            query_embedding (np.ndarray): Query embedding vector
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression
+            
+        Returns:
+            List[Dict[str, str]]: Fused results, best first, with
+                ``rrf_score`` and ``bm25_score`` added
+        """
+        if self.index is None:
+            logger.error("No index available for search")
+            return []
             
-        return results 
\ No newline at end of file
+        top_k = top_k or self.config.TOP_K_MATCHES
+        candidates = max(top_k, self.config.HYBRID_CANDIDATES)
+        
+        allowed = self.matching_ids(filters) if filters else None
+        dense_results = self.search(query_embedding, candidates, filters)
+        sparse_hits = self.sparse_index.search(query, candidates, allowed)
+        
+        dense_by_id = {r['index_id']: r for r in dense_results}
+        bm25_scores = dict(sparse_hits)
+        fused = reciprocal_rank_fusion(
+            [list(dense_by_id), [doc_id for doc_id, _ in sparse_hits]],
+            k=self.config.RRF_K
+        )
+        
+        query_vector = np.asarray(query_embedding, dtype='float32').ravel()
+        results = []
+        for idx, rrf_score in fused[:top_k]:
+            result = dense_by_id.get(idx)
+            if result is None:
+                # Lexical-only hit: compute its distance from the stored vector
+                vector = self.index.reconstruct(int(idx))
+                distance = float(np.sum((vector - query_vector) ** 2))
+                result = self._build_result(idx, distance)
+                if result is None:
+                    continue
+            result['rrf_score'] = rrf_score
+            result['bm25_score'] = bm25_scores.get(idx, 0.0)
+            results.append(result)
+            
+        logger.info(
+            f"Hybrid search fused {len(dense_results)} dense and "
+            f"{len(sparse_hits)} lexical hits into {len(results)} results"
+        )
+        return results
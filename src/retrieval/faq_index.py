@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+import faiss
+import numpy as np
+import logging
+from src.config.config import Config
+from src.retrieval.bm25_index import tokenize
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words that phrase a question without changing what it asks about
+QUESTION_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'be', 'do', 'does', 'can', 'could',
+    'should', 'must', 'may', 'will', 'would', 'i', 'my', 'me', 'we', 'our',
+    'you', 'your', 'it', 'its', 'their', 'there', 'what', 'which', 'who',
+    'whom', 'when', 'where', 'why', 'how', 'many', 'much', 'of', 'to', 'in',
+    'on', 'for', 'at', 'by', 'with', 'about', 'from', 'and', 'or', 'if',
+    'any', 'this', 'that', 'get', 'have', 'has', 'please', 'tell',
+}
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(embedding, dtype='float32').reshape(1, -1).copy()
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def content_terms(text: str) -> Set[str]:
+    """Lexical terms of a question without question words, plurals folded."""
+    return {
+        term[:-1] if len(term) > 3 and term.endswith('s') else term
+        for term in tokenize(text) if term not in QUESTION_WORDS
+    }
+
+
+def swaps_terms(query: str, question: str) -> bool:
+    """
+    Whether each question names something the other does not, as "annual
+    leave" against "sick leave" or "article 4.2" against "article 4.3"
+    
+    Such near-paraphrases embed almost identically but ask different
+    things; rewordings that only add or drop words are not swaps.
+    """
+    query_terms, question_terms = content_terms(query), content_terms(question)
+    return bool(query_terms - question_terms) and bool(question_terms - query_terms)
+
+
+class FAQIndex:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: Optional[float] = None
+    ):
+        """
+        Precomputed answers to frequent questions, looked up by query
+        embedding so close paraphrases are answered without an LLM call.
+
+        Args:
+            path (Optional[str]): File prefix, defaults to FAQ_INDEX_PATH
+            threshold (Optional[float]): Minimum cosine similarity to reuse
+                an answer, defaults to FAQ_SIMILARITY_THRESHOLD
+        """
+        self.config = Config()
+        self.path = path or self.config.FAQ_INDEX_PATH
+        self.threshold = (
+            self.config.FAQ_SIMILARITY_THRESHOLD if threshold is None
+            else threshold
+        )
+        self.entries: List[Dict] = []
+        self.index = None  # Inner product over normalized query embeddings
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        """Replace the lock, which a forking thread may have held."""
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(
+        self,
+        question: str,
+        embedding: np.ndarray,
+        answer: str,
+        sources: List[str],
+        index_version: str
+    ):
+        """
+        Store or replace the answer to one question
+
+        Args:
+            question (str): The frequent question
+            embedding (np.ndarray): Its query embedding
+            answer (str): Generated answer
+            sources (List[str]): Source URLs of the answer
+            index_version (str): FAISSIndex.version the answer was built on
+        """
+        entry = {
+            'question': question,
+            'answer': answer,
+            'sources': list(sources),
+            'index_version': index_version,
+            'created_at': time.time(),
+        }
+        vector = _normalize(embedding)
+        with self._lock:
+            for i, existing in enumerate(self.entries):
+                if existing['question'] == question:
+                    self.entries[i] = entry
+                    embeddings = self._embeddings()
+                    embeddings[i] = vector[0]
+                    self._rebuild(embeddings)
+                    return
+            self.entries.append(entry)
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(vector.shape[1])
+            self.index.add(vector)
+
+    def _embeddings(self) -> np.ndarray:
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    def _rebuild(self, embeddings: np.ndarray):
+        self.index = faiss.IndexFlatIP(embeddings.shape[1])
+        self.index.add(np.ascontiguousarray(embeddings, dtype='float32'))
+
+    def lookup(
+        self,
+        query_embedding: np.ndarray,
+        index_version: str,
+        query: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Find a stored answer for a query
+
+        Args:
+            query_embedding (np.ndarray): Embedding of the incoming query
+            index_version (str): Current FAISSIndex.version; answers built on
+                other versions are never returned
+            query (Optional[str]): Text of the query; when given, stored
+                questions that swap one of its terms for another are skipped
+
+        Returns:
+            Optional[Dict]: The entry with its ``similarity``, or None
+        """
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            vector = _normalize(query_embedding)
+            if vector.shape[1] != self.index.d:
+                return None
+            k = min(5, self.index.ntotal)
+            scores, ids = self.index.search(vector, k)
+
+            for score, idx in zip(scores[0], ids[0]):
+                if idx < 0 or score < self.threshold:
+                    break
+                entry = self.entries[idx]
+                if entry['index_version'] != index_version:
+                    continue
+                if (
+                    query is not None
+                    and self.config.FAQ_REQUIRE_TERM_MATCH
+                    and swaps_terms(query, entry['question'])
+                ):
+                    continue
+                return dict(entry, similarity=float(score))
+        return None
+
+    def stale_questions(self, index_version: str) -> List[str]:
+        """Questions whose answers were built on another index version."""
+        with self._lock:
+            return [
+                entry['question'] for entry in self.entries
+                if entry['index_version'] != index_version
+            ]
+
+    def save(self):
+        """Save entries and embeddings next to the document index."""
+        with self._lock:
+            if self.index is None:
+                return
+            embeddings = self._embeddings()
+            entries = list(self.entries)
+        # Forked workers may save at once; each writes its own temporary
+        # file and swaps it in whole
+        suffix = f".{os.getpid()}.tmp"
+        try:
+            with open(f"{self.path}_embeddings.npy{suffix}", 'wb') as f:
+                np.save(f, embeddings)
+            with open(f"{self.path}.json{suffix}", 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f, ensure_ascii=False, indent=2)
+            os.replace(f"{self.path}_embeddings.npy{suffix}", f"{self.path}_embeddings.npy")
+            os.replace(f"{self.path}.json{suffix}", f"{self.path}.json")
+            logger.info(f"Saved {len(entries)} FAQ answers")
+        except Exception as e:
+            logger.error(f"Error saving FAQ index: {str(e)}")
+
+    def load(self) -> bool:
+        """
+        Load a saved FAQ index
+
+        Returns:
+            bool: True if loading was successful, False otherwise
+        """
+        entries_path = f"{self.path}.json"
+        if not os.path.exists(entries_path):
+            return False
+        try:
+            with open(entries_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)['entries']
+            embeddings = np.load(f"{self.path}_embeddings.npy")
+            if len(entries) != len(embeddings):
+                raise ValueError("entries and embeddings differ in length")
+            with self._lock:
+                self.entries = entries
+                self._rebuild(embeddings)
+            logger.info(f"Loaded {len(entries)} FAQ answers")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading FAQ index: {str(e)}")
+            return False
+
+
+def load_faq_questions(path: Optional[str] = None) -> List[str]:
+    """Read the curated list of frequent questions."""
+    with open(path or Config.FAQ_QUESTIONS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def mine_frequent_questions(
+    queries: Iterable[str], top_n: int = 50, min_count: int = 2
+) -> List[str]:
+    """
+    Pick the most frequent questions from a query log
+
+    Queries are grouped after lowercasing and dropping punctuation; each
+    group is represented by its most common original wording.
+
+    Args:
+        queries (Iterable[str]): Logged user queries
+        top_n (int): Maximum number of questions
+        min_count (int): Minimum occurrences to qualify
+
+    Returns:
+        List[str]: Questions, most frequent first
+    """
+    counts = Counter()
+    wordings: Dict[str, Counter] = {}
+    for query in queries:
+        query = ' '.join(query.split())
+        key = re.sub(r'[^\w\s]', '', query.lower()).strip()
+        if not key:
+            continue
+        counts[key] += 1
+        wordings.setdefault(key, Counter())[query] += 1
+    return [
+        wordings[key].most_common(1)[0][0]
+        for key, count in counts.most_common(top_n)
+        if count >= min_count
+    ]
+
+
+def answer_questions(rag, questions: List[str], faq: FAQIndex) -> int:
+    """
+    Answer questions with the full pipeline and store them in ``faq``
+
+    Answers without sources (nothing relevant found, or an error) are not
+    stored, so those questions keep going through retrieval.
+
+    Args:
+        rag: Initialized RAGModel
+        questions (List[str]): Questions to answer
+        faq (FAQIndex): Index to fill
+
+    Returns:
+        int: Number of answers stored
+    """
+    version = rag.index.version
+    stored = 0
+    for question in questions:
+        embedding = rag.embedder.generate_embedding(question)
+        answer, sources = rag.get_answer_with_sources(
+            question, embedding, use_faq=False
+        )
+        if not answer or not sources:
+            logger.info(f"No cacheable answer for: {question}")
+            continue
+        faq.add(question, embedding, answer, sources, version)
+        stored += 1
+    return stored
+
+
+def refresh_faq_index(rag, faq: FAQIndex) -> int:
+    """
+    Re-answer entries built on an older version of the documents
+
+    Returns:
+        int: Number of answers refreshed
+    """
+    stale = faq.stale_questions(rag.index.version)
+    if not stale:
+        return 0
+    logger.info(f"Refreshing {len(stale)} FAQ answers for new documents")
+    refreshed = answer_questions(rag, stale, faq)
+    faq.save()
+    return refreshed
+
+
+def main():
+    from src.models.rag_model import RAGModel
+
+    parser = argparse.ArgumentParser(description="Build the FAQ answer index")
+    parser.add_argument("--questions", default=Config.FAQ_QUESTIONS_PATH,
+                        help="JSON list of curated questions")
+    parser.add_argument("--mine-log",
+                        help="Text file with one logged query per line")
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--min-count", type=int, default=2)
+    args = parser.parse_args()
+
+    questions = load_faq_questions(args.questions)
+    if args.mine_log:
+        with open(args.mine_log, 'r', encoding='utf-8') as f:
+            mined = mine_frequent_questions(f, args.top_n, args.min_count)
+        questions += [q for q in mined if q not in questions]
+
+    rag = RAGModel()
+    if not rag.initialize():
+        raise SystemExit("Failed to initialize RAG model")
+    faq = FAQIndex()
+    stored = answer_questions(rag, questions, faq)
+    faq.save()
+    logger.info(f"Stored {stored} of {len(questions)} FAQ answers")
+
+
+if __name__ == "__main__":
+    main()
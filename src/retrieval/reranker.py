@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, List, Optional, Tuple
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    def __init__(self):
+        """Initialize the re-ranker; the cross-encoder is loaded by
+        ``warm_up`` or in the background on first use."""
+        self.config = Config()
+        self._model = None
+        self._cache: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._start_workers()
+
+    def _start_workers(self):
+        # Scoring runs off the caller's thread so the time budget can be
+        # enforced without killing the forward pass. A call that overruns
+        # keeps its worker busy, so requests finding every worker busy
+        # fall back instead of queueing behind it.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.RERANK_WORKERS, thread_name_prefix="rerank"
+        )
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self._loading = None
+        self._load_lock = threading.Lock()
+
+    def after_fork(self):
+        """Replace the scoring threads, which do not survive a fork."""
+        self._start_workers()
+
+    @property
+    def model(self):
+        """Load the cross-encoder on first use, once even when warm-up and
+        a background load race."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.config.RERANK_MODEL)
+                    logger.info(f"Loaded re-ranking model {self.config.RERANK_MODEL}")
+        return self._model
+
+    def warm_up(self):
+        """Load the cross-encoder and run one forward pass, outside any
+        request's time budget."""
+        self.model.predict(
+            [["warm-up query", "warm-up passage"]], show_progress_bar=False
+        )
+
+    def _submit(self, fn, *args):
+        """Run ``fn`` on a free worker, or return None if all are busy."""
+        with self._busy_lock:
+            if self._busy >= self.config.RERANK_WORKERS:
+                return None
+            self._busy += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._busy_lock:
+            self._busy -= 1
+
+    @staticmethod
+    def _cache_key(query: str, result: Dict) -> Tuple[str, str, int]:
+        return (
+            query,
+            result.get('source_file', ''),
+            int(result.get('chunk_index', -1))
+        )
+
+    def _score(self, query: str, results: List[Dict]) -> List[float]:
+        """
+        Score (query, chunk) pairs, running all cache misses in one batch
+
+        Args:
+            query (str): User query
+            results (List[Dict]): Candidate chunks
+
+        Returns:
+            List[float]: Cross-encoder score per candidate
+        """
+        keys = [self._cache_key(query, r) for r in results]
+
+        with self._cache_lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._cache]
+
+        fresh = {}
+        if missing:
+            pairs = [[query, results[i]['content']] for i in missing]
+            scores = self.model.predict(
+                pairs, batch_size=len(pairs), show_progress_bar=False
+            )
+            fresh = {keys[i]: float(score) for i, score in zip(missing, scores)}
+
+        with self._cache_lock:
+            self._cache.update(fresh)
+            scores = []
+            for key in keys:
+                score = self._cache.get(key, fresh.get(key))
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            while len(self._cache) > self.config.RERANK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return scores
+
+    def rerank(
+        self, query: str, results: List[Dict], top_k: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Re-rank retrieved chunks and keep only the best few
+
+        Falls back to the incoming (dense) order if scoring exceeds
+        ``RERANK_TIME_BUDGET_MS`` or fails, if every worker is busy, and
+        while the model is still loading when ``warm_up`` was not called.
+
+        Args:
+            query (str): User query
+            results (List[Dict]): Retrieved chunks, best first
+            top_k (Optional[int]): Chunks to keep, defaults to RERANK_TOP_K
+
+        Returns:
+            List[Dict]: Selected chunks with ``rerank_score`` added
+        """
+        top_k = top_k or self.config.RERANK_TOP_K
+        candidates = results[:self.config.RERANK_CANDIDATES]
+        if not candidates:
+            return []
+
+        if self._model is None:
+            # Loading takes seconds; do it in the background, not in
+            # this request's budget
+            if self._loading is None or self._loading.done():
+                self._loading = self._submit(self.warm_up)
+            logger.info("Re-ranking model not loaded yet, keeping retrieval order")
+            return candidates[:top_k]
+
+        budget = self.config.RERANK_TIME_BUDGET_MS / 1000.0
+        future = self._submit(self._score, query, candidates)
+        if future is None:
+            logger.warning("All re-ranking workers busy, keeping retrieval order")
+            return candidates[:top_k]
+        try:
+            scores = future.result(timeout=budget)
+        except TimeoutError:
+            logger.warning(
+                f"Re-ranking exceeded {self.config.RERANK_TIME_BUDGET_MS} ms "
+                f"budget, falling back to retrieval order"
+            )
+            return candidates[:top_k]
+        except Exception as e:
+            logger.error(f"Error re-ranking results: {str(e)}")
+            return candidates[:top_k]
+
+        for result, score in zip(candidates, scores):
+            result['rerank_score'] = score
+        reranked = sorted(
+            candidates, key=lambda x: x['rerank_score'], reverse=True
+        )
+        logger.info(
+            f"Re-ranked {len(candidates)} candidates, keeping {top_k}"
+        )
+        return reranked[:top_k]
@@ -0,0 +1,610 @@
+import argparse
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import logging
+from src.config.config import Config
+from src.retrieval.bm25_index import reciprocal_rank_fusion
+from src.retrieval.faiss_index import FAISSIndex, content_version
+from src.utils.rpc import RPCClient, make_server, parse_address
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+METADATA = "metadata.json"
+
+
+def shard_path(shard_dir: str, shard: int) -> str:
+    """FAISS index path of one shard inside ``shard_dir``."""
+    return os.path.join(shard_dir, f"shard_{shard}", "faiss_index")
+
+
+def _configure_shard(index: FAISSIndex, path: str) -> FAISSIndex:
+    index.config.INDEX_PATH = path
+    index.config.SPARSE_INDEX_PATH = f"{path}_bm25.npz"
+    return index
+
+
+def assign_shards(embeddings_dict: Dict[str, Dict], num_shards: int) -> List[List[str]]:
+    """
+    Partition chunks by document into balanced shards
+
+    Documents are kept whole, so source filters and per-document id
+    ranges work inside each shard. The largest documents are placed first,
+    each on the shard with the fewest chunks so far.
+
+    Args:
+        embeddings_dict (Dict[str, Dict]): Output of DocumentEmbedder.embed_chunks
+        num_shards (int): Number of shards
+
+    Returns:
+        List[List[str]]: Chunk ids of every shard, in their original order
+    """
+    by_source: Dict[str, List[str]] = {}
+    for chunk_id, item in embeddings_dict.items():
+        by_source.setdefault(item['metadata'].get('source_file', ''), []).append(chunk_id)
+
+    sizes = [0] * num_shards
+    shard_of_source = {}
+    for source in sorted(by_source, key=lambda s: (-len(by_source[s]), s)):
+        shard = min(range(num_shards), key=lambda i: (sizes[i], i))
+        shard_of_source[source] = shard
+        sizes[shard] += len(by_source[source])
+
+    shards = [[] for _ in range(num_shards)]
+    for chunk_id, item in embeddings_dict.items():
+        shards[shard_of_source[item['metadata'].get('source_file', '')]].append(chunk_id)
+    return shards
+
+
+def _build_shard(path: str, embeddings_dict: Dict[str, Dict]) -> Dict[str, Any]:
+    """Build and save one shard; runs in a worker process."""
+    logging.disable(logging.INFO)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index = _configure_shard(FAISSIndex(), path)
+    index.config.EMBEDDING_DIMENSION = len(
+        next(iter(embeddings_dict.values()))['embedding']
+    )
+    index.create_index(embeddings_dict)
+    return index.index_info
+
+
+def build_shards(
+    embeddings_dict: Dict[str, Dict],
+    num_shards: Optional[int] = None,
+    shard_dir: Optional[str] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Split an embedded corpus into shards and build them in parallel
+
+    Writes one FAISS index per shard plus a manifest with the chunk
+    placement and a metadata file for the coordinator.
+
+    Args:
+        embeddings_dict (Dict[str, Dict]): Output of DocumentEmbedder.embed_chunks
+        num_shards (Optional[int]): Defaults to SHARD_COUNT
+        shard_dir (Optional[str]): Defaults to SHARD_DIR
+        workers (Optional[int]): Build processes, defaults to one per shard
+            up to the number of cores
+
+    Returns:
+        Dict[str, Any]: The manifest
+    """
+    config = Config()
+    num_shards = num_shards or config.SHARD_COUNT
+    shard_dir = shard_dir or config.SHARD_DIR
+    groups = [group for group in assign_shards(embeddings_dict, num_shards) if group]
+    if len(groups) < num_shards:
+        logger.warning(f"Only {len(groups)} shards have documents")
+    workers = workers or min(len(groups), os.cpu_count() or 1)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                _build_shard, shard_path(shard_dir, shard),
+                {chunk_id: embeddings_dict[chunk_id] for chunk_id in group}
+            )
+            for shard, group in enumerate(groups)
+        ]
+        infos = [future.result() for future in futures]
+
+    position = {
+        chunk_id: (shard, local_id)
+        for shard, group in enumerate(groups)
+        for local_id, chunk_id in enumerate(group)
+    }
+    chunk_ids = list(embeddings_dict)
+    metadata = {chunk_id: embeddings_dict[chunk_id]['metadata'] for chunk_id in chunk_ids}
+    manifest = {
+        'index_info': dict(infos[0], num_vectors=len(chunk_ids)),
+        'version': content_version(chunk_ids, metadata),
+        'num_shards': len(groups),
+        'shards': [
+            {
+                'path': os.path.relpath(shard_path(shard_dir, shard), shard_dir),
+                'sources': sorted({metadata[c].get('source_file', '') for c in group}),
+                'num_vectors': len(group),
+            }
+            for shard, group in enumerate(groups)
+        ],
+        # Global row order: [chunk_id, shard, row in shard]
+        'chunks': [[chunk_id, *position[chunk_id]] for chunk_id in chunk_ids],
+    }
+    with open(os.path.join(shard_dir, METADATA), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    with open(os.path.join(shard_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logger.info(
+        f"Built {len(groups)} shards with {len(chunk_ids)} vectors in "
+        f"{time.perf_counter() - start:.1f}s"
+    )
+    return manifest
+
+
+def embeddings_from_index(index: FAISSIndex) -> Dict[str, Dict]:
+    """Turn a loaded single index back into an embeddings dict for resharding."""
+    vectors = index.get_embeddings(list(range(index.index.ntotal)))
+    return {
+        index.id_mapping[i]: {
+            'embedding': vectors[i],
+            'metadata': index.metadata[index.id_mapping[i]],
+        }
+        for i in range(index.index.ntotal)
+    }
+
+
+class ShardServer:
+    def __init__(
+        self,
+        shard_path: str,
+        address: str,
+        index: Optional[FAISSIndex] = None
+    ):
+        """
+        Serve one shard's FAISSIndex over the RPC protocol of src.utils.rpc.
+
+        Args:
+            shard_path (str): Shard index path, see ``shard_path``
+            address (str): Unix socket path or host:port (port 0 picks a
+                free one; ``address`` holds the bound one after ``start``)
+            index (Optional[FAISSIndex]): Unloaded index to configure and
+                load, for a non-default Config
+
+        Raises:
+            RuntimeError: If the shard cannot be loaded
+        """
+        self.index = _configure_shard(index or FAISSIndex(), shard_path)
+        if not self.index.load_index():
+            raise RuntimeError(f"Could not load shard {shard_path}")
+        self.address = address
+        self._server = None
+        self._thread = None
+
+    def _handle(self, message: Dict) -> Dict:
+        """Answer one request; shard-local FAISS ids identify chunks."""
+        try:
+            op = message['op']
+            if op == 'search':
+                batch = self.index.search_batch(
+                    message['queries'], message['top_k'], message.get('filters')
+                )
+                return {'hits': [
+                    [(r['distance'], r['index_id']) for r in results]
+                    for results in batch
+                ]}
+            if op == 'hybrid':
+                # Rank fusion only compares ranks within one ranking, so the
+                # shard returns both candidate lists and the coordinator fuses
+                filters = message.get('filters')
+                query_vector = np.asarray(
+                    message['query_embedding'], dtype='float32'
+                ).ravel()
+                dense = self.index.search(query_vector, message['top_k'], filters)
+                allowed = self.index.matching_ids(filters) if filters else None
+                sparse = self.index.sparse_index.search(
+                    message['query'], message['top_k'], allowed
+                )
+                vectors = self.index.get_embeddings([row for row, _ in sparse])
+                distances = np.sum((vectors - query_vector) ** 2, axis=1)
+                return {
+                    'dense': [(r['distance'], r['index_id']) for r in dense],
+                    'sparse': [
+                        (score, row, float(distance))
+                        for (row, score), distance in zip(sparse, distances)
+                    ],
+                }
+            if op == 'vectors':
+                return {'vectors': self.index.get_embeddings(message['ids'])}
+            if op == 'info':
+                return {
+                    'num_vectors': int(self.index.index.ntotal),
+                    'version': self.index.version,
+                }
+            return {'error': f"unknown op {op!r}"}
+        except Exception as e:
+            logger.error(f"Error handling shard request: {str(e)}")
+            return {'error': str(e)}
+
+    def start(self):
+        """Bind the address and serve in a background thread."""
+        self._server = make_server(self.address, self._handle)
+        if isinstance(self._server.server_address, tuple):
+            host, port = self._server.server_address[:2]
+            self.address = f"{host}:{port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Shard with {self.index.index.ntotal} vectors listening on {self.address}"
+        )
+
+    def serve_forever(self):
+        """Start serving and block until interrupted."""
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop serving and remove a Unix socket file."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        family, path = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(path):
+            os.unlink(path)
+
+
+class ShardedIndex:
+    def __init__(
+        self,
+        addresses: Optional[List[str]] = None,
+        shard_dir: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Coordinator for an index split across shard servers.
+
+        Queries fan out to every shard in parallel; the per-shard top-k are
+        merged with a heap and joined with the chunk metadata here. Offers
+        the search interface of FAISSIndex used by RAGModel.
+
+        Args:
+            addresses (Optional[List[str]]): Shard server addresses in shard
+                order, defaults to SHARD_ADDRESSES
+            shard_dir (Optional[str]): Directory with the manifest, defaults
+                to SHARD_DIR
+            timeout (Optional[float]): Seconds per shard call, defaults to
+                SHARD_TIMEOUT_S
+        """
+        self.config = Config()
+        self.addresses = list(addresses or self.config.SHARD_ADDRESSES)
+        self.shard_dir = shard_dir or self.config.SHARD_DIR
+        self.timeout = timeout or self.config.SHARD_TIMEOUT_S
+        self.metadata = {}
+        self.index_info = {}
+        self.incompatible = False
+        self.version = ''
+        self._clients: List[RPCClient] = []
+        self._chunk_ids: List[str] = []
+        self._positions: List[Tuple[int, int]] = []  # (shard, row) of each global id
+        self._global_ids: Dict[Tuple[int, int], int] = {}
+        self._pool = None
+
+    def load_index(self) -> bool:
+        """
+        Read the manifest and check every shard server
+
+        Returns:
+            bool: True if all shards answered with the size and content
+                version of the chunks the manifest places on them
+        """
+        self.incompatible = False
+        try:
+            with open(os.path.join(self.shard_dir, MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            index_info = manifest['index_info']
+            if (
+                index_info.get('embedding_model') != self.config.EMBEDDING_MODEL
+                or index_info.get('embedding_dimension') != self.config.EMBEDDING_DIMENSION
+            ):
+                logger.error(
+                    f"Shards were built with {index_info.get('embedding_model')} "
+                    f"({index_info.get('embedding_dimension')} dimensions)"
+                )
+                self.incompatible = True
+                return False
+            if len(self.addresses) != manifest['num_shards']:
+                raise ValueError(
+                    f"{len(self.addresses)} shard addresses for "
+                    f"{manifest['num_shards']} shards"
+                )
+            with open(os.path.join(self.shard_dir, METADATA), 'r', encoding='utf-8') as f:
+                self.metadata = json.load(f)
+
+            self._clients = [RPCClient(a, self.timeout) for a in self.addresses]
+            self._pool = ThreadPoolExecutor(
+                max_workers=len(self._clients), thread_name_prefix="shard"
+            )
+            # A shard rebuilt from other documents can keep the same size;
+            # its version must hash the chunks the manifest placed on it
+            shard_chunks = [[] for _ in manifest['shards']]
+            for chunk_id, shard, _ in sorted(manifest['chunks'], key=lambda c: c[1:]):
+                shard_chunks[shard].append(chunk_id)
+            infos = self._scatter([{'op': 'info'}] * len(self._clients))
+            for shard, (info, expected, chunk_ids) in enumerate(
+                zip(infos, manifest['shards'], shard_chunks)
+            ):
+                if (
+                    info is None
+                    or info['num_vectors'] != expected['num_vectors']
+                    or info['version'] != content_version(chunk_ids, self.metadata)
+                ):
+                    raise ValueError(f"Shard {shard} at {self.addresses[shard]} does not match the manifest")
+
+            self._chunk_ids = [chunk_id for chunk_id, _, _ in manifest['chunks']]
+            self._positions = [(shard, row) for _, shard, row in manifest['chunks']]
+            self._global_ids = {
+                position: i for i, position in enumerate(self._positions)
+            }
+            self.index_info = index_info
+            self.version = manifest['version']
+            logger.info(
+                f"Connected to {len(self._clients)} shards with "
+                f"{len(self._chunk_ids)} vectors"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading sharded index: {str(e)}")
+            return False
+
+    def _scatter(self, messages: List[Dict]) -> List[Optional[Dict]]:
+        """Send one message to every shard in parallel; None for failed shards."""
+        def call(shard: int) -> Optional[Dict]:
+            try:
+                reply = self._clients[shard].call(messages[shard])
+            except Exception as e:
+                logger.error(f"Shard {shard} at {self.addresses[shard]} failed: {str(e)}")
+                return None
+            if 'error' in reply:
+                logger.error(f"Shard {shard} error: {reply['error']}")
+                return None
+            return reply
+
+        return list(self._pool.map(call, range(len(self._clients))))
+
+    def _build_result(self, global_id: int, distance: float) -> Dict:
+        result = self.metadata[self._chunk_ids[global_id]].copy()
+        result['index_id'] = global_id
+        result['similarity_score'] = float(1.0 / (1.0 + distance))
+        result['distance'] = float(distance)
+        return result
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Search every shard and merge the rankings
+
+        Args:
+            query_embeddings (np.ndarray): Matrix with one query per row
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression,
+                applied by each shard
+
+        Returns:
+            List[List[Dict[str, str]]]: Results for each query; shards that
+                failed are left out
+        """
+        top_k = top_k or self.config.TOP_K_MATCHES
+        queries = np.asarray(query_embeddings, dtype='float32').reshape(
+            -1, self.config.EMBEDDING_DIMENSION
+        )
+        message = {'op': 'search', 'queries': queries, 'top_k': top_k, 'filters': filters}
+        replies = self._scatter([message] * len(self._clients))
+
+        batch_results = []
+        for q in range(len(queries)):
+            # Each shard's hits are sorted by distance already
+            rankings = [
+                [(distance, self._global_ids[(shard, row)]) for distance, row in reply['hits'][q]]
+                for shard, reply in enumerate(replies) if reply is not None
+            ]
+            merged = itertools.islice(heapq.merge(*rankings), top_k)
+            batch_results.append([
+                self._build_result(global_id, distance) for distance, global_id in merged
+            ])
+        return batch_results
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """Search for one query, see ``search_batch``."""
+        return self.search_batch(query_embedding, top_k, filters)[0]
+
+    def hybrid_search(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Hybrid search over every shard, fused once here
+
+        Each shard returns its dense and BM25 candidates; both lists are
+        merged across shards and the merged rankings are fused with
+        reciprocal rank fusion. BM25 scores use each shard's own statistics.
+
+        Args:
+            query (str): Query text for the lexical indexes
+            query_embedding (np.ndarray): Query embedding vector
+            top_k (Optional[int]): Number of results, defaults to TOP_K_MATCHES
+            filters (Optional[Dict[str, Any]]): Metadata filter expression
+
+        Returns:
+            List[Dict[str, str]]: Fused results, best first
+        """
+        top_k = top_k or self.config.TOP_K_MATCHES
+        candidates = max(top_k, self.config.HYBRID_CANDIDATES)
+        message = {
+            'op': 'hybrid', 'query': query, 'top_k': candidates, 'filters': filters,
+            'query_embedding': np.asarray(query_embedding, dtype='float32'),
+        }
+        replies = [
+            (shard, reply)
+            for shard, reply in enumerate(self._scatter([message] * len(self._clients)))
+            if reply is not None
+        ]
+        # Each shard's candidates are sorted already
+        dense = list(itertools.islice(heapq.merge(*[
+            [(distance, self._global_ids[(shard, row)]) for distance, row in reply['dense']]
+            for shard, reply in replies
+        ]), candidates))
+        sparse = list(itertools.islice(heapq.merge(*[
+            [(score, self._global_ids[(shard, row)], distance)
+             for score, row, distance in reply['sparse']]
+            for shard, reply in replies
+        ], reverse=True), candidates))
+
+        distances = {global_id: distance for distance, global_id in dense}
+        bm25_scores = {}
+        for score, global_id, distance in sparse:
+            bm25_scores[global_id] = score
+            distances.setdefault(global_id, distance)
+        fused = reciprocal_rank_fusion(
+            [[global_id for _, global_id in dense], [global_id for _, global_id, _ in sparse]],
+            k=self.config.RRF_K
+        )
+        results = []
+        for global_id, rrf_score in fused[:top_k]:
+            result = self._build_result(global_id, distances[global_id])
+            result['rrf_score'] = rrf_score
+            result['bm25_score'] = bm25_scores.get(global_id, 0.0)
+            results.append(result)
+        return results
+
+    def get_embeddings(self, index_ids: List[int]) -> np.ndarray:
+        """
+        Fetch stored vectors for global ids from their shards
+
+        Args:
+            index_ids (List[int]): ``index_id`` of results
+
+        Returns:
+            np.ndarray: Matrix with one vector per id
+        """
+        vectors = np.zeros((len(index_ids), self.config.EMBEDDING_DIMENSION), dtype='float32')
+        if not len(index_ids):
+            return vectors
+        rows = [[] for _ in self._clients]
+        slots = [[] for _ in self._clients]
+        for slot, global_id in enumerate(index_ids):
+            shard, row = self._positions[int(global_id)]
+            rows[shard].append(row)
+            slots[shard].append(slot)
+        replies = self._scatter([{'op': 'vectors', 'ids': r} for r in rows])
+        for shard, reply in enumerate(replies):
+            if reply is not None and slots[shard]:
+                vectors[slots[shard]] = reply['vectors']
+        return vectors
+
+    def after_fork(self):
+        """Replace the scatter threads, which do not survive a fork."""
+        if self._pool is not None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=len(self._clients), thread_name_prefix="shard"
+            )
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def _serve_shard(path: str, address: str):
+    ShardServer(path, address).serve_forever()
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Build and serve index shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Split the saved index into shards")
+    build.add_argument("--shards", type=int, default=config.SHARD_COUNT)
+    build.add_argument("--workers", type=int)
+    build.add_argument("--shard-dir", default=config.SHARD_DIR)
+
+    serve = commands.add_parser("serve", help="Serve one shard")
+    serve.add_argument("--shard", type=int, required=True)
+    serve.add_argument("--address", required=True,
+                       help="Unix socket path or host:port")
+    serve.add_argument("--shard-dir", default=config.SHARD_DIR)
+
+    serve_all = commands.add_parser("serve-all", help="Serve every shard on this host")
+    serve_all.add_argument("--socket-dir", default="/tmp")
+    serve_all.add_argument("--shard-dir", default=config.SHARD_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = FAISSIndex()
+        if not index.load_index():
+            raise SystemExit("No saved index to shard; build it first")
+        build_shards(embeddings_from_index(index), args.shards, args.shard_dir, args.workers)
+    elif args.command == "serve":
+        ShardServer(shard_path(args.shard_dir, args.shard), args.address).serve_forever()
+    else:
+        with open(os.path.join(args.shard_dir, MANIFEST), 'r', encoding='utf-8') as f:
+            num_shards = json.load(f)['num_shards']
+        addresses = [
+            os.path.join(args.socket_dir, f"udst_rag_shard_{shard}.sock")
+            for shard in range(num_shards)
+        ]
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_serve_shard, args=(shard_path(args.shard_dir, shard), address))
+            for shard, address in enumerate(addresses)
+        ]
+        for process in processes:
+            process.start()
+        print(f"SHARD_ADDRESSES={','.join(addresses)}")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+
+if __name__ == "__main__":
+    main()
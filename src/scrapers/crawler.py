@@ -0,0 +1,392 @@
+import json
+import os
+import posixpath
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+import requests
+from bs4 import BeautifulSoup
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid')
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normal form of a URL, so that links to the same page compare equal
+
+    Lower-cases the scheme and host, drops the default port, fragment,
+    tracking parameters and trailing slash, resolves dot segments,
+    normalizes percent-encoding and sorts the query.
+
+    Args:
+        url (str): Absolute URL
+
+    Returns:
+        str: Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port is not None and DEFAULT_PORTS.get(scheme) != parts.port:
+        netloc = f"{netloc}:{parts.port}"
+    path = posixpath.normpath(unquote(parts.path)) if parts.path else '/'
+    if path.startswith('//'):
+        path = '/' + path.lstrip('/')
+    path = quote(path, safe="/:@!$&'()*+,;=~")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def seed_prefix(url: str, parent: bool = False) -> str:
+    """Path a seed page's links must stay under: the page's own path, or its
+    directory when it names a file or is itself a policy (``parent``)."""
+    path = urlsplit(url).path.rstrip('/')
+    if parent or '.' in posixpath.basename(path):
+        path = posixpath.dirname(path)
+    return path.rstrip('/') or '/'
+
+
+class HostLimiter:
+    def __init__(self, delay_s: float, concurrency: int):
+        """
+        Politeness limit for one host: at most ``concurrency`` requests in
+        flight and ``delay_s`` between the starts of consecutive requests
+
+        Args:
+            delay_s (float): Minimum spacing of request starts
+            concurrency (int): Requests in flight at once
+        """
+        self.delay_s = delay_s
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        """Wait for a free slot and this request's turn."""
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self.delay_s
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class PolicyCrawler:
+    def __init__(
+        self, scraper, seeds: Optional[Sequence[str]] = None,
+        state_path: Optional[str] = None
+    ):
+        """
+        Concurrent breadth-first crawl of the policy section of a site.
+
+        Starting from seed index pages, follows links whose host is a
+        seed's host and whose path lies under an allowed prefix, up to
+        CRAWL_MAX_DEPTH links away and CRAWL_MAX_PAGES pages. URLs are
+        canonicalized before entering the frontier, so each page is
+        fetched once. Every page but the index seeds is a document; when
+        no index pages are configured the POLICY_URLS pages are the seeds,
+        and they are documents too, scoped by their parent path. The
+        frontier and finished pages are checkpointed to ``state_path``
+        so an interrupted crawl resumes where it stopped; the file is
+        removed once the crawl finishes.
+
+        Args:
+            scraper (PolicyScraper): Supplies the configuration, text
+                extraction and, when enabled, the document store
+            seeds (Optional[Sequence[str]]): Index pages, defaults to
+                CRAWL_SEEDS or else POLICY_URLS
+            state_path (Optional[str]): Checkpoint file, defaults to
+                CRAWL_STATE_PATH
+        """
+        self.scraper = scraper
+        self.config = scraper.config
+        index_seeds = seeds or self.config.CRAWL_SEEDS
+        self.seeds = [
+            canonicalize_url(url) for url in (index_seeds or self.config.POLICY_URLS)
+        ]
+        # Seeds that only list policies; POLICY_URLS seeds are policies
+        self.index_pages = set(self.seeds) if index_seeds else set()
+        self.state_path = state_path or self.config.CRAWL_STATE_PATH
+        self.hosts = {urlsplit(url).netloc for url in self.seeds}
+        self.prefixes = list(dict.fromkeys(
+            prefix.rstrip('/') or '/'
+            for prefix in (
+                self.config.CRAWL_ALLOWED_PREFIXES
+                or [seed_prefix(url, parent=not index_seeds) for url in self.seeds]
+            )
+        ))
+        self.frontier: Deque[Tuple[str, int]] = deque()
+        self.seen = set()
+        self.done: Dict[str, Tuple[str, int]] = {}  # url -> (status, depth)
+        self.documents_found = 0
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._robots: Dict[str, Future] = {}  # host -> RobotFileParser
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def allowed(self, url: str) -> bool:
+        """Whether a canonical URL is inside the crawl scope."""
+        parts = urlsplit(url)
+        if parts.scheme not in DEFAULT_PORTS or parts.netloc not in self.hosts:
+            return False
+        return any(
+            prefix == '/' or parts.path == prefix or parts.path.startswith(prefix + '/')
+            for prefix in self.prefixes
+        )
+
+    def extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+        """
+        In-scope links of a page, canonicalized, in page order
+
+        Args:
+            soup (BeautifulSoup): Parsed page
+            base_url (str): URL the page was served from, for relative links
+
+        Returns:
+            List[str]: Distinct canonical URLs
+        """
+        links = {}
+        for anchor in soup.find_all('a', href=True):
+            href = anchor['href'].strip()
+            if not href or href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+                continue
+            url = canonicalize_url(urljoin(base_url, href))
+            if self.allowed(url):
+                links[url] = None
+        return list(links)
+
+    def _enqueue(self, url: str, depth: int):
+        if url in self.seen or depth > self.config.CRAWL_MAX_DEPTH:
+            return
+        self.seen.add(url)
+        self.frontier.append((url, depth))
+
+    def load_state(self) -> bool:
+        """
+        Resume from the checkpoint of an interrupted crawl of the same seeds
+
+        Returns:
+            bool: Whether a checkpoint was loaded
+        """
+        if not os.path.exists(self.state_path):
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.error(f"Error reading crawl state {self.state_path}: {str(e)}")
+            return False
+        if state.get('seeds') != self.seeds:
+            logger.info("Crawl state is for other seeds, starting over")
+            return False
+        self.frontier = deque((url, depth) for url, depth in state['frontier'])
+        self.done = {url: (status, depth) for url, (status, depth) in state['done'].items()}
+        self.seen = set(self.done) | {url for url, _ in self.frontier}
+        logger.info(
+            f"Resuming crawl: {len(self.done)} pages done, "
+            f"{len(self.frontier)} in the frontier"
+        )
+        return True
+
+    def save_state(self):
+        """Write the checkpoint atomically."""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'seeds': self.seeds,
+            'frontier': list(self.frontier),
+            'done': self.done,
+        }
+        with open(self.state_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def _resumed_documents(self) -> Iterator[Tuple[str, str]]:
+        """Documents finished before an interruption, read from the
+        document store; those it does not hold go back to the frontier."""
+        store = self.scraper.store
+        for url, (status, depth) in list(self.done.items()):
+            if status != 'document':
+                continue
+            if store is not None and url in store.documents:
+                self.documents_found += 1
+                yield url, store.read(store.documents[url]['hash'])
+            else:
+                del self.done[url]
+                self.frontier.appendleft((url, depth))
+
+    def _session(self) -> requests.Session:
+        """One connection pool per worker thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = self.config.CRAWL_USER_AGENT
+            self._local.session = session
+        return session
+
+    def _limiter(self, host: str) -> HostLimiter:
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(
+                    self.config.CRAWL_DELAY_S, self.config.CRAWL_MAX_PER_HOST
+                )
+            return self._limiters[host]
+
+    def _can_fetch(self, url: str) -> bool:
+        """Check robots.txt, fetched once per host; unreadable means allowed."""
+        if not self.config.CRAWL_RESPECT_ROBOTS:
+            return True
+        parts = urlsplit(url)
+        # The first worker to reach a host fetches its robots.txt; the
+        # others wait on that host's future without holding the lock
+        with self._lock:
+            robots_future = self._robots.get(parts.netloc)
+            owner = robots_future is None
+            if owner:
+                robots_future = self._robots[parts.netloc] = Future()
+        if owner:
+            robots = RobotFileParser()
+            robots.parse([])
+            limiter = self._limiter(parts.netloc)
+            try:
+                with limiter.slot():
+                    response = self._session().get(
+                        f"{parts.scheme}://{parts.netloc}/robots.txt",
+                        timeout=self.config.CRAWL_TIMEOUT_S
+                    )
+                if response.ok:
+                    robots.parse(response.text.splitlines())
+                delay = robots.crawl_delay(self.config.CRAWL_USER_AGENT)
+                if delay:
+                    limiter.delay_s = max(limiter.delay_s, float(delay))
+            except requests.RequestException as e:
+                logger.warning(f"Could not read robots.txt of {parts.netloc}: {str(e)}")
+            finally:
+                robots_future.set_result(robots)
+        return robots_future.result().can_fetch(self.config.CRAWL_USER_AGENT, url)
+
+    def fetch_page(self, url: str, depth: int) -> Dict:
+        """
+        Fetch one page and pull out its text and in-scope links
+
+        Args:
+            url (str): Canonical URL
+            depth (int): Links between the page and its seed
+
+        Returns:
+            Dict: ``status`` (document, index, skipped, disallowed or
+                failed), ``content`` and ``links``
+        """
+        page = {'status': 'failed', 'content': '', 'links': []}
+        if not self._can_fetch(url):
+            logger.info(f"robots.txt disallows {url}")
+            page['status'] = 'disallowed'
+            return page
+        try:
+            with self._limiter(urlsplit(url).netloc).slot():
+                response = self._session().get(url, timeout=self.config.CRAWL_TIMEOUT_S)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(
+                f"Error crawling {url}. "
+                f"Error type: {type(e).__name__}, Details: {str(e)}"
+            )
+            return page
+        if 'html' not in response.headers.get('content-type', ''):
+            logger.info(f"Skipping {url}: not an HTML page")
+            page['status'] = 'skipped'
+            return page
+        soup = BeautifulSoup(response.text, 'html.parser')
+        if depth < self.config.CRAWL_MAX_DEPTH:
+            page['links'] = self.extract_links(soup, response.url)
+        if url in self.index_pages:
+            page['status'] = 'index'
+        else:
+            page['status'] = 'document'
+            page['content'] = self.scraper.extract_text(soup)
+        return page
+
+    def crawl(self) -> Iterator[Tuple[str, str]]:
+        """
+        Crawl from the seeds, resuming an interrupted crawl if there is one
+
+        Pages are fetched by CRAWL_WORKERS threads; the frontier, dedupe
+        and checkpoints stay on the calling thread. Closing the iterator
+        early keeps the checkpoint for the next call.
+
+        Returns:
+            Iterator[Tuple[str, str]]: (url, text) of each document found
+        """
+        if not self.load_state():
+            self.frontier.clear()
+            self.seen.clear()
+            self.done.clear()
+            for url in self.seeds:
+                self._enqueue(url, 0)
+        self.documents_found = 0
+        yield from self._resumed_documents()
+
+        pending = {}
+        finished = False
+        since_checkpoint = 0
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, self.config.CRAWL_WORKERS), thread_name_prefix="crawl"
+        )
+        try:
+            while self.frontier or pending:
+                while (
+                    self.frontier and len(pending) < self.config.CRAWL_WORKERS
+                    and len(self.done) + len(pending) < self.config.CRAWL_MAX_PAGES
+                ):
+                    url, depth = self.frontier.popleft()
+                    pending[pool.submit(self.fetch_page, url, depth)] = (url, depth)
+                if not pending:
+                    break
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    url, depth = pending.pop(future)
+                    page = future.result()
+                    self.done[url] = (page['status'], depth)
+                    for link in page['links']:
+                        self._enqueue(link, depth + 1)
+                    since_checkpoint += 1
+                    if since_checkpoint >= self.config.CRAWL_CHECKPOINT_EVERY:
+                        self.save_state()
+                        since_checkpoint = 0
+                    if page['status'] == 'document':
+                        self.documents_found += 1
+                        yield url, page['content']
+            finished = True
+        finally:
+            for future, (url, depth) in pending.items():
+                future.cancel()
+                self.frontier.appendleft((url, depth))
+            pool.shutdown(wait=True)
+            if finished:
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+                logger.info(
+                    f"Crawl finished: {len(self.done)} pages fetched, "
+                    f"{self.documents_found} documents, "
+                    f"{len(self.frontier)} left over the page limit"
+                )
+            else:
+                self.save_state()
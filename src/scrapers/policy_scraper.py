@@ -1,9 +1,11 @@
 import os
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
 import logging
 from src.config.config import Config
+from src.scrapers.crawler import PolicyCrawler
+from src.utils.document_store import DocumentStore
 from tqdm import tqdm
 
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +14,41 @@ logger = logging.getLogger(__name__)
 class PolicyScraper:
     def __init__(self):
         self.config = Config()
+        self.store = DocumentStore() if self.config.DOC_STORE_ENABLED else None
+        
+    def extract_text(self, soup: BeautifulSoup) -> str:
+        """
+        Text of a page's main content area, without navigation or scripts
+        
+        Args:
+            soup (BeautifulSoup): Parsed page, modified in place
+            
+        Returns:
+            str: Whitespace-normalized text
+        """
+        # Find the main content area (adjust selector based on website structure)
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
+        if main_content:
+            soup = main_content
+            logger.info("Found main content area")
+        else:
+            logger.warning("Could not find main content area, using entire page")
+        
+        # Remove script and style elements
+        for element in soup(["script", "style", "nav", "header", "footer"]):
+            element.decompose()
+            
+        # Get text content
+        text = soup.get_text()
+        
+        # Clean up text (breaking long line)
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (
+            phrase.strip() 
+            for line in lines 
+            for phrase in line.split("  ")
+        )
+        return ' '.join(chunk for chunk in chunks if chunk)
         
     def fetch_document(self, url: str) -> str:
         """
@@ -32,31 +69,7 @@ class PolicyScraper:
             logger.info(f"Response status: {response.status_code}")
             logger.info(f"Content type: {response.headers.get('content-type', 'unknown')}")
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find the main content area (adjust selector based on website structure)
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-            if main_content:
-                soup = main_content
-                logger.info("Found main content area")
-            else:
-                logger.warning("Could not find main content area, using entire page")
-            
-            # Remove script and style elements
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-                
-            # Get text content
-            text = soup.get_text()
-            
-            # Clean up text (breaking long line)
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (
-                phrase.strip() 
-                for line in lines 
-                for phrase in line.split("  ")
-            )
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            text = self.extract_text(BeautifulSoup(response.text, 'html.parser'))
             
             logger.info(
                 f"Successfully fetched document from {url} "
@@ -94,6 +107,18 @@ class PolicyScraper:
         filename = url.split('/')[-1].replace('.', '_') + '.txt'
         filepath = os.path.join(self.config.RAW_DOCS_DIR, filename)
         
+        if self.store is not None:
+            try:
+                entry = self.store.put_document(url, content, filepath)
+                logger.info(
+                    f"Stored document {entry['hash'][:12]} as "
+                    f"{entry['source_file']} (size: {len(content)} characters)"
+                )
+                return entry['source_file']
+            except (IOError, ImportError) as e:
+                logger.error(f"Error storing document from {url}: {str(e)}")
+                return ""
+        
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
@@ -106,28 +131,39 @@ class PolicyScraper:
             logger.error(f"Error saving document to {filepath}: {str(e)}")
             return ""
             
+    def _fetch_configured(self) -> Iterator[Tuple[str, str]]:
+        """(url, content) for each URL in POLICY_URLS."""
+        for url in self.config.POLICY_URLS:
+            if not url:
+                logger.warning("Empty URL found, skipping")
+                continue
+            yield url, self.fetch_document(url)
+            
     def scrape_policies(self) -> List[Dict[str, str]]:
         """
-        Scrape all policy documents from configured URLs
+        Scrape all policy documents from configured URLs, or from the
+        pages discovered by crawling CRAWL_SEEDS when CRAWL_ENABLED is set
         
         Returns:
             List[Dict[str, str]]: List of dictionaries containing document info
         """
         documents = []
-        total_urls = len(self.config.POLICY_URLS)
-        logger.info(f"Starting to scrape {total_urls} URLs")
+        if self.config.CRAWL_ENABLED:
+            crawler = PolicyCrawler(self)
+            pages = crawler.crawl()
+            total_urls = "?"
+            logger.info(f"Starting to crawl from {len(crawler.seeds)} seed pages")
+        else:
+            pages = self._fetch_configured()
+            total_urls = len(self.config.POLICY_URLS)
+            logger.info(f"Starting to scrape {total_urls} URLs")
         
-        for i, url in enumerate(
-            tqdm(self.config.POLICY_URLS, desc="Scraping policy documents"),
+        for i, (url, content) in enumerate(
+            tqdm(pages, desc="Scraping policy documents"),
             1
         ):
             logger.info(f"\nProcessing URL {i}/{total_urls}: {url}")
             
-            if not url:
-                logger.warning("Empty URL found, skipping")
-                continue
-                
-            content = self.fetch_document(url)
             if not content:
                 logger.warning(f"No content fetched from {url}, skipping")
                 continue
@@ -139,14 +175,20 @@ class PolicyScraper:
                     'filepath': filepath,
                     'content': content
                 }
+                if self.store is not None:
+                    doc_info['content_hash'] = self.store.documents[url]['hash']
                 documents.append(doc_info)
                 logger.info(
                     f"Successfully processed document {i}: "
                     f"{url} (size: {len(content)} chars)"
                 )
             
+        if self.store is not None:
+            self.store.save()
+        if self.config.CRAWL_ENABLED:
+            total_urls = crawler.documents_found
         logger.info(
             f"\nScraping complete. Successfully processed "
             f"{len(documents)}/{total_urls} documents"
         )
-        return documents 
\ No newline at end of file
+        return documents
\ No newline at end of file
@@ -0,0 +1,260 @@
+import argparse
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+import logging
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from src.config.config import Config
+from src.models.rag_model import RAGModel
+from src.serving.batcher import EmbeddingBatcher
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _not_ready() -> JSONResponse:
+    return JSONResponse({"error": "model is not ready"}, status_code=503)
+
+
+async def _read_text(request: Request, field: str):
+    """Read a required string field from a JSON body."""
+    try:
+        body = await request.json()
+    except ValueError:
+        return None, None, JSONResponse(
+            {"error": "request body must be JSON"}, status_code=400
+        )
+    text = body.get(field) if isinstance(body, dict) else None
+    if not isinstance(text, str) or not text.strip():
+        return None, None, JSONResponse(
+            {"error": f"'{field}' must be a non-empty string"}, status_code=400
+        )
+    return text.strip(), body, None
+
+
+def _read_filters(body: dict):
+    """Validate the optional metadata filter: field names mapped to a value
+    or a list of accepted values, all strings."""
+    filters = body.get("filters")
+    if filters is None:
+        return None, None
+    valid = isinstance(filters, dict) and all(
+        isinstance(value, str)
+        or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+        for value in filters.values()
+    )
+    if not valid:
+        return None, JSONResponse(
+            {"error": "'filters' must map field names to a string or a list of strings"},
+            status_code=400
+        )
+    return filters, None
+
+
+async def _embed(request: Request, text: str):
+    """Embed a query through the batcher; an encoder failure becomes 503."""
+    try:
+        return await request.app.state.batcher.embed(text), None
+    except Exception:
+        return None, JSONResponse(
+            {"error": "could not embed the query"}, status_code=503
+        )
+
+
+async def health(request: Request) -> JSONResponse:
+    """Liveness: the process is up."""
+    return JSONResponse({"status": "ok"})
+
+
+async def ready(request: Request) -> JSONResponse:
+    """Readiness: the model and index are loaded and warmed up."""
+    if not request.app.state.ready:
+        return JSONResponse({"ready": False}, status_code=503)
+    return JSONResponse({
+        "ready": True, "latency_ms": request.app.state.rag.latency_stats()
+    })
+
+
+async def retrieve(request: Request) -> JSONResponse:
+    """Return the assembled context and sources for a query."""
+    if not request.app.state.ready:
+        return _not_ready()
+    query, body, error = await _read_text(request, "query")
+    if error:
+        return error
+    filters, error = _read_filters(body)
+    if error:
+        return error
+
+    rag = request.app.state.rag
+    embedding, error = await _embed(request, query)
+    if error:
+        return error
+    context, sources = await run_in_threadpool(
+        rag.get_relevant_context, query, filters, embedding
+    )
+    return JSONResponse({"context": context, "sources": sources})
+
+
+async def answer(request: Request) -> JSONResponse:
+    """Answer a question with its sources."""
+    if not request.app.state.ready:
+        return _not_ready()
+    question, _, error = await _read_text(request, "question")
+    if error:
+        return error
+
+    rag = request.app.state.rag
+    embedding, error = await _embed(request, question)
+    if error:
+        return error
+    text, sources = await run_in_threadpool(
+        rag.get_answer_with_sources, question, embedding
+    )
+    if text is None:
+        return JSONResponse(
+            {"error": "could not generate an answer"}, status_code=502
+        )
+    return JSONResponse({"answer": text, "sources": sources})
+
+
+async def answer_stream(request: Request):
+    """Stream an answer as server-sent events, sources last."""
+    if not request.app.state.ready:
+        return _not_ready()
+    question, _, error = await _read_text(request, "question")
+    if error:
+        return error
+
+    rag = request.app.state.rag
+    embedding, error = await _embed(request, question)
+    if error:
+        return error
+    deltas, sources = await run_in_threadpool(
+        rag.stream_answer_with_sources, question, embedding
+    )
+
+    async def events():
+        parts = []
+        try:
+            async for delta in iterate_in_threadpool(deltas):
+                parts.append(delta)
+                yield f"event: token\ndata: {json.dumps({'text': delta})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        final_sources = [] if rag._answer_has_no_info("".join(parts)) else sources
+        yield f"event: done\ndata: {json.dumps({'sources': final_sources})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def create_app(rag: Optional[RAGModel] = None) -> Starlette:
+    """
+    Create the ASGI application around one shared RAGModel
+
+    Args:
+        rag (Optional[RAGModel]): Model to serve; created and initialized
+            at startup when not given
+
+    Returns:
+        Starlette: The application
+    """
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        app.state.ready = False
+        if app.state.rag is None:
+            app.state.rag = await run_in_threadpool(RAGModel)
+        if not app.state.rag.index.version:
+            app.state.ready = await run_in_threadpool(app.state.rag.initialize)
+        elif not app.state.rag.ready:
+            app.state.ready = await run_in_threadpool(app.state.rag.warm_up)
+        else:
+            app.state.ready = True
+        app.state.batcher = EmbeddingBatcher(app.state.rag.embedder)
+        await app.state.batcher.start()
+        logger.info(f"Serving API ready: {app.state.ready}")
+        yield
+        await app.state.batcher.stop()
+
+    app = Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/ready", ready, methods=["GET"]),
+            Route("/retrieve", retrieve, methods=["POST"]),
+            Route("/answer", answer, methods=["POST"]),
+            Route("/answer/stream", answer_stream, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.rag = rag
+    app.state.ready = False
+    return app
+
+
+def _run_embedding_server(socket_path: str):
+    from src.embeddings.embedding_server import EmbeddingServer
+    EmbeddingServer(socket_path=socket_path).serve_forever()
+
+
+def main():
+    import multiprocessing
+    import os
+    import uvicorn
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="UDST policy RAG HTTP API")
+    parser.add_argument("--host", default=config.SERVING_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVING_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--prefork", action="store_true", default=config.SERVING_PREFORK,
+        help="Load the model once and fork the workers from it, sharing "
+             "weights and index pages copy-on-write"
+    )
+    parser.add_argument(
+        "--embedding-server", metavar="SOCKET",
+        help="Start one shared embedding process on this Unix socket; "
+             "workers embed through it instead of loading the model"
+    )
+    args = parser.parse_args()
+
+    server = None
+    if args.embedding_server:
+        server = multiprocessing.get_context("spawn").Process(
+            target=_run_embedding_server,
+            args=(args.embedding_server,),
+            daemon=True
+        )
+        server.start()
+        # Workers re-import Config and read the environment, this process
+        # uses the class attribute
+        os.environ['EMBEDDING_SERVER_SOCKET'] = args.embedding_server
+        Config.EMBEDDING_SERVER_SOCKET = args.embedding_server
+
+    try:
+        if args.workers > 1 and args.prefork:
+            from src.serving.prefork import PreforkServer, load_shared_model
+            PreforkServer(
+                load_shared_model(), args.host, args.port, args.workers
+            ).serve_forever()
+        elif args.workers > 1:
+            uvicorn.run(
+                "src.serving.api:create_app", factory=True,
+                host=args.host, port=args.port, workers=args.workers
+            )
+        else:
+            uvicorn.run(create_app(), host=args.host, port=args.port)
+    finally:
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
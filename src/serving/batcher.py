@@ -0,0 +1,117 @@
+import asyncio
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+import logging
+import numpy as np
+from src.config.config import Config
+from src.embeddings.embedder import DocumentEmbedder
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embedder: DocumentEmbedder,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        """
+        Coalesce concurrent query embeddings into single encode calls.
+
+        Args:
+            embedder (DocumentEmbedder): Embedder shared by all requests
+            window_ms (Optional[float]): How long the first request of a
+                batch waits for others, defaults to SERVING_BATCH_WINDOW_MS
+            max_batch_size (Optional[int]): Flush as soon as this many
+                requests are waiting, defaults to SERVING_MAX_BATCH_SIZE
+        """
+        self.config = Config()
+        self.embedder = embedder
+        self.window_ms = (
+            self.config.SERVING_BATCH_WINDOW_MS if window_ms is None
+            else window_ms
+        )
+        self.max_batch_size = (
+            max_batch_size or self.config.SERVING_MAX_BATCH_SIZE
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Encoding runs on one thread so batches never compete for cores
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.batch_sizes: Deque[int] = deque(maxlen=self.config.SERVING_BATCH_HISTORY)
+
+    async def start(self):
+        """Start the batching loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed one query, sharing a forward pass with concurrent callers
+
+        Args:
+            text (str): Query text
+
+        Returns:
+            np.ndarray: Embedding vector
+            
+        Raises:
+            Exception: The encoder's error if the batch failed
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.window_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            self.batch_sizes.append(len(texts))
+            try:
+                embeddings = await loop.run_in_executor(
+                    self._executor, functools.partial(
+                        self.embedder.generate_embeddings, texts, raise_errors=True
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Error embedding batch: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
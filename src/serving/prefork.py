@@ -0,0 +1,173 @@
+import gc
+import os
+import signal
+import socket
+from typing import Callable, List, Optional
+import logging
+from src.config.config import Config
+from src.models.rag_model import RAGModel
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_shared_model(rag: Optional[RAGModel] = None) -> RAGModel:
+    """
+    Load and warm up the model and index in the launcher process, so
+    lazily created state exists before workers fork
+
+    Args:
+        rag (Optional[RAGModel]): Model to prepare, created when not given
+
+    Returns:
+        RAGModel: The loaded model
+
+    Raises:
+        RuntimeError: If the index can neither be loaded nor built
+    """
+    rag = rag or RAGModel()
+    # Workers start the FAQ refresh after the fork, see RAGModel.after_fork
+    rag.background_refresh = False
+    if not rag.index.version:
+        ready = rag.initialize()
+    else:
+        ready = rag.ready or rag.warm_up()
+    if not ready:
+        raise RuntimeError("Could not load, build or warm up the index")
+    return rag
+
+
+def serve_http(rag: RAGModel, sock: socket.socket):
+    """Run the HTTP API on an inherited listening socket."""
+    import uvicorn
+    from src.serving.api import create_app
+
+    uvicorn.Server(uvicorn.Config(create_app(rag))).run(sockets=[sock])
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        rag: RAGModel,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        serve: Callable[[RAGModel, socket.socket], None] = serve_http
+    ):
+        """
+        Serve one loaded RAGModel from several forked worker processes.
+
+        The parent binds the listening socket and forks the workers, which
+        share the model weights, index and metadata pages copy-on-write
+        and accept connections on the same socket. Workers that exit are
+        replaced until ``stop``.
+
+        Args:
+            rag (RAGModel): Loaded model, see ``load_shared_model``
+            host (Optional[str]): Defaults to SERVING_HOST
+            port (Optional[int]): Defaults to SERVING_PORT, 0 picks a free port
+            workers (int): Worker processes
+            threads_per_worker (Optional[int]): Encoder threads per worker,
+                defaults to SERVING_WORKER_THREADS or else the cores divided
+                by the workers
+            serve (Callable[[RAGModel, socket.socket], None]): Worker body,
+                the HTTP API by default
+        """
+        self.config = Config()
+        self.rag = rag
+        self.host = self.config.SERVING_HOST if host is None else host
+        self.port = self.config.SERVING_PORT if port is None else port
+        self.workers = workers
+        self.threads_per_worker = (
+            threads_per_worker
+            or self.config.SERVING_WORKER_THREADS
+            or max(1, (os.cpu_count() or 1) // workers)
+        )
+        self.serve = serve
+        self.sock: Optional[socket.socket] = None
+        self.pids: List[int] = []
+        self._stopping = False
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def start(self):
+        """Bind the socket and fork the workers."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(self.config.SERVING_BACKLOG)
+        # Keep everything loaded so far out of the collector, whose
+        # reference updates would otherwise copy the shared pages
+        gc.collect()
+        gc.freeze()
+        self.pids = [self._fork() for _ in range(self.workers)]
+        logger.info(
+            f"Forked {self.workers} workers on {self.address[0]}:{self.address[1]} "
+            f"with {self.threads_per_worker} encoder threads each"
+        )
+
+    def _fork(self) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.rag.after_fork(self.threads_per_worker)
+            self.serve(self.rag, self.sock)
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {str(e)}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def serve_forever(self):
+        """Start the workers and replace any that exit until SIGTERM/SIGINT."""
+        def handle(signum, frame):
+            self._stopping = True
+            for pid in self.pids:
+                self._kill(pid)
+
+        signal.signal(signal.SIGTERM, handle)
+        signal.signal(signal.SIGINT, handle)
+        if self.sock is None:
+            self.start()
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.pids:
+                continue
+            self.pids.remove(pid)
+            if not self._stopping:
+                logger.warning(
+                    f"Worker {pid} exited with status {status}, forking a replacement"
+                )
+                self.pids.append(self._fork())
+        self.sock.close()
+
+    def _kill(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        """Terminate the workers and wait for them."""
+        self._stopping = True
+        for pid in self.pids:
+            self._kill(pid)
+        for pid in self.pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.pids = []
+        if self.sock is not None:
+            self.sock.close()
@@ -0,0 +1,142 @@
+import html
+import sys
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (question, answer or None while pending/failed, source URLs)
+Exchange = Tuple[str, Optional[str], Tuple[str, ...]]
+
+
+def deep_size(obj, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by a structure of containers and strings."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_size(getattr(obj, name), seen) for name in obj.__slots__)
+    return size
+
+
+def source_link(source: str) -> str:
+    """A source as a link opening in a new tab; non-web sources stay text."""
+    text = html.escape(source)
+    if not source.startswith(('http://', 'https://')):
+        return text
+    return f'<a href="{html.escape(source, quote=True)}" target="_blank" rel="noopener">{text}</a>'
+
+
+def render_exchange(exchange: Exchange) -> str:
+    """
+    HTML of one question and its answer, with the app's chat styles
+
+    Args:
+        exchange (Exchange): (question, answer, sources)
+
+    Returns:
+        str: Markup for one ``st.markdown`` call
+    """
+    question, answer, sources = exchange
+    parts = [
+        '<div class="message-group user-group"><div class="message">'
+        '<div class="avatar user-avatar">👤</div>'
+        f'<div class="content">{html.escape(question)}</div></div></div>'
+    ]
+    if answer is not None:
+        parts.append(
+            '<div class="message-group assistant-group"><div class="message">'
+            '<div class="avatar assistant-avatar">🤖</div>'
+            f'<div class="content">{html.escape(answer)}</div></div>'
+        )
+        if sources:
+            parts.append('<div class="source-document"><p>📚 Sources Referenced</p>')
+            parts.extend(f'• {source_link(source)}<br>' for source in sources)
+            parts.append('</div>')
+        parts.append('</div>')
+    return ''.join(parts)
+
+
+class ChatHistory:
+    __slots__ = ('max_exchanges', 'page_size', 'exchanges', 'dropped', '_rendered')
+
+    def __init__(
+        self, max_exchanges: Optional[int] = None, page_size: Optional[int] = None
+    ):
+        """
+        Bounded chat history for one session, rendered a window at a time.
+
+        Exchanges are stored as tuples with interned source URLs and the
+        oldest are dropped past ``max_exchanges``. The HTML of the visible
+        window is cached per exchange, so a rerun only formats new ones.
+
+        Args:
+            max_exchanges (Optional[int]): Defaults to CHAT_MAX_EXCHANGES
+            page_size (Optional[int]): Exchanges per page, defaults to
+                CHAT_PAGE_SIZE
+        """
+        config = Config()
+        self.max_exchanges = max_exchanges or config.CHAT_MAX_EXCHANGES
+        self.page_size = page_size or config.CHAT_PAGE_SIZE
+        self.exchanges: deque = deque(maxlen=self.max_exchanges)
+        self.dropped = 0
+        # id of the exchange tuple -> HTML; tuples are immutable, so a
+        # changed exchange gets a new id and a new entry
+        self._rendered: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.exchanges)
+
+    def add_question(self, question: str):
+        """Start an exchange; its answer is filled in by ``set_answer``."""
+        if len(self.exchanges) == self.max_exchanges:
+            self._rendered.pop(id(self.exchanges[0]), None)
+            self.dropped += 1
+        self.exchanges.append((question, None, ()))
+
+    def set_answer(self, answer: str, sources: List[str]):
+        """Answer the newest exchange."""
+        question, _, _ = self.exchanges[-1]
+        self._rendered.pop(id(self.exchanges[-1]), None)
+        self.exchanges[-1] = (
+            question, answer, tuple(sys.intern(source) for source in sources)
+        )
+
+    def clear(self):
+        self.exchanges.clear()
+        self._rendered.clear()
+        self.dropped = 0
+
+    def has_older(self, pages: int) -> bool:
+        """Whether exchanges exist before the newest ``pages`` pages."""
+        return len(self.exchanges) > pages * self.page_size
+
+    def window(self, pages: int = 1) -> List[Exchange]:
+        """The newest ``pages`` pages of exchanges, oldest first."""
+        start = max(0, len(self.exchanges) - pages * self.page_size)
+        return list(islice(self.exchanges, start, None))
+
+    def render(self, pages: int = 1) -> str:
+        """HTML of ``window(pages)`` for a single ``st.markdown`` call."""
+        rendered = {}
+        for exchange in self.window(pages):
+            key = id(exchange)
+            rendered[key] = self._rendered.get(key) or render_exchange(exchange)
+        # Only the visible window stays cached
+        self._rendered = rendered
+        return ''.join(rendered.values())
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by this session's history."""
+        return deep_size(self)
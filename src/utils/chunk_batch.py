@@ -0,0 +1,140 @@
+import os
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class ChunkBatch:
+    __slots__ = (
+        'contents', 'chunk_indexes', 'doc_ids', 'documents', 'locations',
+        'embeddings',
+    )
+
+    def __init__(self):
+        """
+        Columnar store for the chunks of an ingest run.
+
+        Chunk text is kept in one list and everything else in parallel
+        integer arrays; per-document strings (URL, path, title, category)
+        are stored once per document and interned. Rows become metadata
+        dicts only when they are saved into an index.
+        """
+        self.contents: List[str] = []
+        self.chunk_indexes = array('l')  # Chunk position in its document
+        self.doc_ids = array('l')  # Row -> position in ``documents``
+        # (source_url, source_file, title, category, total_chunks)
+        self.documents: List[Tuple[str, str, str, str, int]] = []
+        # Rows standing for near-duplicates: row -> [(doc id, chunk index)]
+        self.locations: Dict[int, List[Tuple[int, int]]] = {}
+        self.embeddings: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def add_document(self, metadata: Dict, chunks: List[str]) -> int:
+        """
+        Append the chunks of one document
+
+        Args:
+            metadata (Dict): Document metadata with ``source_url`` (or
+                ``url``), ``source_file`` (or ``filepath``), and optionally
+                ``title`` and ``category``
+            chunks (List[str]): Chunk texts in document order
+
+        Returns:
+            int: Id of the document in this batch
+        """
+        doc_id = len(self.documents)
+        self.documents.append((
+            sys.intern(metadata.get('source_url', metadata.get('url', ''))),
+            sys.intern(metadata.get('source_file', metadata.get('filepath', ''))),
+            sys.intern(metadata.get('title', '')),
+            sys.intern(metadata.get('category', '')),
+            len(chunks),
+        ))
+        self.contents.extend(chunks)
+        self.chunk_indexes.extend(range(len(chunks)))
+        self.doc_ids.extend([doc_id] * len(chunks))
+        return doc_id
+
+    def chunk_id(self, row: int) -> str:
+        """``<file name>_<chunk index>``, as TextProcessor names chunks."""
+        source_file = self.documents[self.doc_ids[row]][1]
+        return f"{os.path.basename(source_file)}_{self.chunk_indexes[row]}"
+
+    def row_locations(self, row: int) -> List[Tuple[int, int]]:
+        """(doc id, chunk index) of every place the row's text appears."""
+        return self.locations.get(row) or [(self.doc_ids[row], self.chunk_indexes[row])]
+
+    def metadata(self, row: int) -> Dict:
+        """
+        Metadata dict of one row, with the keys of
+        ``TextProcessor.process_document`` output except ``chunk_id``
+        """
+        source_url, source_file, title, category, total = self.documents[self.doc_ids[row]]
+        metadata = {
+            'chunk_index': self.chunk_indexes[row],
+            'total_chunks': total,
+            'content': self.contents[row],
+            'source_url': source_url,
+            'source_file': source_file,
+            'title': title,
+            'category': category,
+        }
+        if row in self.locations:
+            metadata['locations'] = [
+                {
+                    'source_url': self.documents[doc_id][0],
+                    'source_file': self.documents[doc_id][1],
+                    'chunk_index': chunk_index,
+                }
+                for doc_id, chunk_index in self.locations[row]
+            ]
+        return metadata
+
+    def to_dicts(self) -> List[Dict]:
+        """Rows as chunk dicts, as returned by ``process_document``."""
+        return [
+            {'chunk_id': self.chunk_id(row), **self.metadata(row)}
+            for row in range(len(self))
+        ]
+
+    @classmethod
+    def from_dicts(cls, chunks: List[Dict]) -> 'ChunkBatch':
+        """Build a batch from chunk dicts, grouping consecutive chunks of a file."""
+        batch = cls()
+        start = 0
+        while start < len(chunks):
+            end = start + 1
+            while (
+                end < len(chunks)
+                and chunks[end].get('source_file') == chunks[start].get('source_file')
+            ):
+                end += 1
+            batch.add_document(chunks[start], [c['content'] for c in chunks[start:end]])
+            start = end
+        return batch
+
+    def take(self, rows: Sequence[int]) -> 'ChunkBatch':
+        """
+        New batch with the given rows, sharing the document table
+
+        Args:
+            rows (Sequence[int]): Row positions to keep, in their new order
+
+        Returns:
+            ChunkBatch: The selected rows
+        """
+        batch = ChunkBatch()
+        batch.documents = self.documents
+        batch.contents = [self.contents[row] for row in rows]
+        batch.chunk_indexes = array('l', (self.chunk_indexes[row] for row in rows))
+        batch.doc_ids = array('l', (self.doc_ids[row] for row in rows))
+        batch.locations = {
+            new_row: self.locations[row]
+            for new_row, row in enumerate(rows) if row in self.locations
+        }
+        if self.embeddings is not None:
+            batch.embeddings = self.embeddings[np.asarray(rows, dtype='int64')]
+        return batch
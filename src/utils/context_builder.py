@@ -0,0 +1,201 @@
+import re
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+from src.config.config import Config
+from src.utils.dedup import source_urls
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ContextBuilder:
+    def __init__(self, max_tokens: Optional[int] = None):
+        """Initialize the context builder with a prompt token budget."""
+        self.config = Config()
+        self.max_tokens = max_tokens or self.config.CONTEXT_MAX_TOKENS
+        self._encoding = None
+        self._encoding_failed = False
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens with tiktoken, falling back to a character estimate
+        when the encoding cannot be loaded (e.g. offline)
+
+        Args:
+            text (str): Text to measure
+
+        Returns:
+            int: Number of tokens
+        """
+        if self._encoding is None and not self._encoding_failed:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding(
+                    self.config.CONTEXT_TOKENIZER
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Could not load tiktoken encoding, estimating token "
+                    f"counts from characters: {str(e)}"
+                )
+                self._encoding_failed = True
+
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to at most ``max_tokens`` tokens."""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            return self._encoding.decode(
+                self._encoding.encode(text, disallowed_special=())[:max_tokens]
+            )
+        return text[:max_tokens * 4]
+
+    @staticmethod
+    def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < size:
+            return {tuple(words)}
+        return {
+            tuple(words[i:i + size]) for i in range(len(words) - size + 1)
+        }
+
+    def drop_near_duplicates(self, results: List[Dict]) -> List[Dict]:
+        """
+        Drop chunks whose word shingles mostly repeat a better-ranked chunk
+
+        Args:
+            results (List[Dict]): Retrieved chunks, best first
+
+        Returns:
+            List[Dict]: Chunks without near-duplicates
+        """
+        kept = []
+        kept_shingles = []
+        for result in results:
+            shingles = self._shingles(result['content'])
+            is_duplicate = any(
+                len(shingles & other) / max(len(shingles | other), 1)
+                >= self.config.CONTEXT_DEDUP_THRESHOLD
+                for other in kept_shingles
+            )
+            if is_duplicate:
+                logger.debug(
+                    f"Dropping near-duplicate chunk {result.get('chunk_index')} "
+                    f"of {result.get('source_file')}"
+                )
+                continue
+            kept.append(result)
+            kept_shingles.append(shingles)
+        return kept
+
+    @staticmethod
+    def strip_overlap(previous: str, following: str) -> str:
+        """
+        Remove the prefix of ``following`` that repeats the end of
+        ``previous`` (the chunk overlap)
+
+        Args:
+            previous (str): Earlier chunk text
+            following (str): Next chunk text of the same document
+
+        Returns:
+            str: ``following`` without the overlapping prefix
+        """
+        for size in range(min(len(previous), len(following)), 0, -1):
+            at_boundary = size == len(following) or following[size] == ' '
+            if at_boundary and previous.endswith(following[:size]):
+                return following[size:].lstrip()
+        return following
+
+    def merge_adjacent(self, results: List[Dict]) -> List[Dict]:
+        """
+        Merge consecutive chunks of the same document into one passage
+
+        Passages keep the rank of their best chunk.
+
+        Args:
+            results (List[Dict]): Retrieved chunks, best first
+
+        Returns:
+            List[Dict]: Passages, best first
+        """
+        by_source: Dict[str, List[Tuple[int, Dict]]] = {}
+        for rank, result in enumerate(results):
+            by_source.setdefault(result.get('source_file', ''), []).append(
+                (rank, result)
+            )
+
+        passages = []
+        for items in by_source.values():
+            items.sort(key=lambda x: int(x[1].get('chunk_index', 0)))
+            current = None
+            for rank, result in items:
+                index = int(result.get('chunk_index', 0))
+                if current is not None and index == current['last_index'] + 1:
+                    current['content'] += ' ' + self.strip_overlap(
+                        current['content'], result['content']
+                    )
+                    current['last_index'] = index
+                    current['rank'] = min(current['rank'], rank)
+                    continue
+                if current is not None:
+                    passages.append(current)
+                current = dict(result, rank=rank, last_index=index)
+            if current is not None:
+                passages.append(current)
+
+        passages.sort(key=lambda x: x['rank'])
+        for passage in passages:
+            del passage['rank'], passage['last_index']
+        return passages
+
+    def build(self, results: List[Dict]) -> Tuple[str, Dict[str, int]]:
+        """
+        Assemble a context string that fits the token budget
+
+        Args:
+            results (List[Dict]): Retrieved chunks, best first
+
+        Returns:
+            Tuple containing:
+                - str: Context string
+                - Dict[str, int]: Chunk and token counts for reporting
+        """
+        passages = self.merge_adjacent(self.drop_near_duplicates(results))
+
+        separator = "\n\n---\n\n"
+        separator_tokens = self.count_tokens(separator)
+        parts = []
+        used_tokens = 0
+        for passage in passages:
+            part = f"Source: {', '.join(source_urls(passage))}\n{passage['content']}"
+            tokens = self.count_tokens(part)
+            if parts:
+                tokens += separator_tokens
+            if used_tokens + tokens > self.max_tokens:
+                if parts:
+                    continue
+                # Never return an empty context just because the best
+                # passage alone is over budget
+                part = self.truncate(part, self.max_tokens)
+                tokens = self.count_tokens(part)
+            parts.append(part)
+            used_tokens += tokens
+
+        stats = {
+            'chunks_retrieved': len(results),
+            'passages': len(passages),
+            'passages_used': len(parts),
+            'context_tokens': used_tokens,
+        }
+        logger.info(
+            f"Built context with {stats['passages_used']}/{stats['passages']} "
+            f"passages from {stats['chunks_retrieved']} chunks "
+            f"({used_tokens}/{self.max_tokens} tokens)"
+        )
+        return separator.join(parts), stats
@@ -0,0 +1,218 @@
+import re
+import zlib
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+from src.config.config import Config
+from src.utils.chunk_batch import ChunkBatch
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mersenne prime above the 32-bit shingle hashes for the permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """
+    Hash the word shingles of a text
+
+    Args:
+        text (str): Chunk text
+        size (int): Words per shingle
+
+    Returns:
+        np.ndarray: Unique 32-bit shingle hashes as uint64
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [
+            ' '.join(words[i:i + size]) for i in range(len(words) - size + 1)
+        ]
+    return np.unique(np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    ))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        MinHash signatures over word shingles; the fraction of equal
+        signature entries estimates the Jaccard similarity of two texts.
+
+        Args:
+            num_perm (int): Signature length
+            shingle_size (int): Words per shingle
+            seed (int): Seed of the hash permutations
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # a < 2**31 keeps a * hash below 2**63, so uint64 never overflows
+        self._a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of one text."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """Signature matrix with one row per text."""
+        if not texts:
+            return np.zeros((0, self.num_perm), dtype=np.uint64)
+        return np.stack([self.signature(text) for text in texts])
+
+
+def locations(chunk: Dict) -> List[Dict]:
+    """Every place a chunk's text appears, for citation."""
+    return chunk.get('locations') or [{
+        'source_url': chunk.get('source_url', ''),
+        'source_file': chunk.get('source_file', ''),
+        'chunk_index': chunk.get('chunk_index'),
+    }]
+
+
+def source_urls(chunk: Dict) -> List[str]:
+    """Unique source URLs of a chunk, in order of appearance."""
+    return list(dict.fromkeys(
+        location['source_url'] for location in locations(chunk)
+    ))
+
+
+class ChunkDeduplicator:
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        shingle_size: Optional[int] = None
+    ):
+        """
+        Collapse near-identical chunks before embedding, using MinHash
+        signatures bucketed by locality sensitive hashing.
+
+        Args:
+            threshold (Optional[float]): Minimum estimated Jaccard similarity
+                of word shingles, defaults to DEDUP_THRESHOLD
+            num_perm (Optional[int]): Signature length, defaults to
+                DEDUP_NUM_PERM
+            bands (Optional[int]): LSH bands, must divide num_perm; defaults
+                to DEDUP_BANDS
+            shingle_size (Optional[int]): Defaults to DEDUP_SHINGLE_SIZE
+        """
+        self.config = Config()
+        self.threshold = (
+            self.config.DEDUP_THRESHOLD if threshold is None else threshold
+        )
+        num_perm = num_perm or self.config.DEDUP_NUM_PERM
+        self.bands = bands or self.config.DEDUP_BANDS
+        if num_perm % self.bands:
+            raise ValueError(f"{self.bands} bands do not divide {num_perm} permutations")
+        self.hasher = MinHasher(
+            num_perm, shingle_size or self.config.DEDUP_SHINGLE_SIZE
+        )
+
+    def duplicate_groups(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group near-identical texts
+
+        Texts sharing an LSH band become candidates; candidates whose
+        signatures agree on at least ``threshold`` of their entries are
+        merged, transitively.
+
+        Args:
+            texts (List[str]): Chunk texts
+
+        Returns:
+            List[List[int]]: Groups of text positions, each sorted, ordered
+                by their first position; singletons included
+        """
+        signatures = self.hasher.signatures(texts)
+        parent = list(range(len(texts)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows = signatures.shape[1] // self.bands
+        for band in range(self.bands):
+            buckets: Dict[bytes, int] = {}
+            for i, signature in enumerate(signatures):
+                key = signature[band * rows:(band + 1) * rows].tobytes()
+                first = buckets.setdefault(key, i)
+                if first == i:
+                    continue
+                root_first, root_i = find(first), find(i)
+                if root_first == root_i:
+                    continue
+                agreement = np.mean(signatures[first] == signature)
+                if agreement >= self.threshold:
+                    # Lower position stays the representative
+                    parent[max(root_first, root_i)] = min(root_first, root_i)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return sorted(groups.values(), key=lambda group: group[0])
+
+    def deduplicate(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        Keep one chunk per group of near-duplicates
+
+        The first chunk of each group is kept in place, so chunks of one
+        document stay contiguous; merged chunks get ``locations`` listing
+        every source they appeared in.
+
+        Args:
+            chunks (List[Dict]): Chunks from TextProcessor.process_document
+
+        Returns:
+            List[Dict]: Deduplicated chunks in their original order
+        """
+        groups = self.duplicate_groups([chunk['content'] for chunk in chunks])
+        kept = []
+        for group in groups:
+            chunk = chunks[group[0]]
+            if len(group) > 1:
+                chunk = dict(chunk)
+                chunk['locations'] = [
+                    location for i in group for location in locations(chunks[i])
+                ]
+            kept.append(chunk)
+        logger.info(
+            f"Deduplicated {len(chunks)} chunks to {len(kept)} "
+            f"({len(chunks) - len(kept)} near-duplicates merged)"
+        )
+        return kept
+
+    def deduplicate_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        ``deduplicate`` over a columnar batch
+
+        Args:
+            batch (ChunkBatch): Chunks from TextProcessor.add_to_batch
+
+        Returns:
+            ChunkBatch: Kept rows, with merged rows in ``batch.locations``
+        """
+        groups = self.duplicate_groups(batch.contents)
+        kept = batch.take([group[0] for group in groups])
+        for row, group in enumerate(groups):
+            if len(group) > 1:
+                kept.locations[row] = [
+                    location for i in group for location in batch.row_locations(i)
+                ]
+        logger.info(
+            f"Deduplicated {len(batch)} chunks to {len(kept)} "
+            f"({len(batch) - len(kept)} near-duplicates merged)"
+        )
+        return kept
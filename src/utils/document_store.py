@@ -0,0 +1,239 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a document's UTF-8 text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def chunk_spans(text: str, chunks: List[str]) -> Optional[List[Tuple[int, int]]]:
+    """
+    Offsets of each chunk in the cleaned text it was cut from
+
+    Chunks are runs of whole sentences joined by single spaces, so each
+    is a substring of the cleaned text at or after the previous chunk's
+    start.
+
+    Args:
+        text (str): Cleaned document text
+        chunks (List[str]): Chunks in document order
+
+    Returns:
+        Optional[List[Tuple[int, int]]]: (start, end) per chunk, or None if
+            a chunk is not a substring
+    """
+    spans = []
+    position = 0
+    for chunk in chunks:
+        start = text.find(chunk, position)
+        if start < 0:
+            return None
+        spans.append((start, start + len(chunk)))
+        position = start
+    return spans
+
+
+class DocumentStore:
+    def __init__(self, root: Optional[str] = None, compression: Optional[str] = None):
+        """
+        Compressed, content-addressed store of raw and cleaned documents.
+
+        Blobs live at ``<root>/<kind>/<hash[:2]>/<hash><ext>`` and are never
+        rewritten; ``manifest.json`` maps each URL to the hash of its raw
+        text, its logical source file name and the spans of its chunks in
+        the cleaned text, so unchanged documents skip cleaning and chunking.
+
+        Args:
+            root (Optional[str]): Store directory, defaults to DOC_STORE_DIR
+            compression (Optional[str]): "gzip" or "zstd" (needs the
+                zstandard package) for new blobs, defaults to
+                DOC_STORE_COMPRESSION; existing blobs are read either way
+        """
+        self.config = Config()
+        self.root = root or self.config.DOC_STORE_DIR
+        self.compression = compression or self.config.DOC_STORE_COMPRESSION
+        if self.compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression: {self.compression}")
+        self.documents: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Read the manifest, if there is one."""
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.documents = json.load(f)['documents']
+        except (IOError, ValueError, KeyError) as e:
+            logger.error(f"Error reading document store manifest {path}: {str(e)}")
+            self.documents = {}
+
+    def save(self):
+        """Write the manifest atomically."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({'documents': self.documents}, f, separators=(',', ':'), sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def _blob_path(self, kind: str, digest: str, extension: str) -> str:
+        return os.path.join(self.root, kind, digest[:2], digest + extension)
+
+    def _find_blob(self, kind: str, digest: str) -> Optional[str]:
+        for extension in EXTENSIONS.values():
+            path = self._blob_path(kind, digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write_blob(self, kind: str, text: str) -> str:
+        """Store text under its hash unless it is already there."""
+        digest = content_hash(text)
+        if self._find_blob(kind, digest):
+            return digest
+        path = self._blob_path(kind, digest, EXTENSIONS[self.compression])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode('utf-8')
+        if self.compression == 'zstd':
+            import zstandard
+            data = zstandard.ZstdCompressor(level=self.config.DOC_STORE_LEVEL).compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=self.config.DOC_STORE_LEVEL)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        return digest
+
+    def open(self, digest: str, kind: str = "raw") -> TextIO:
+        """
+        Stream a stored text without reading it into memory at once
+
+        Args:
+            digest (str): Content hash
+            kind (str): "raw" or "clean"
+
+        Returns:
+            TextIO: Decompressing text stream, to be closed by the caller
+
+        Raises:
+            FileNotFoundError: If no blob has that hash
+        """
+        path = self._find_blob(kind, digest)
+        if path is None:
+            raise FileNotFoundError(f"No {kind} document {digest} in {self.root}")
+        if path.endswith(EXTENSIONS['zstd']):
+            import zstandard
+            return io.TextIOWrapper(
+                zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True),
+                encoding='utf-8'
+            )
+        return gzip.open(path, 'rt', encoding='utf-8')
+
+    def read(self, digest: str, kind: str = "raw") -> str:
+        with self.open(digest, kind) as f:
+            return f.read()
+
+    def _source_file(self, url: str, filepath: str) -> str:
+        """Keep the given name unless another URL already uses it."""
+        taken = {
+            entry['source_file'] for other, entry in self.documents.items()
+            if other != url
+        }
+        if filepath not in taken:
+            return filepath
+        stem, extension = os.path.splitext(filepath)
+        return f"{stem}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}{extension}"
+
+    def put_document(self, url: str, content: str, filepath: str) -> Dict:
+        """
+        Store a fetched document
+
+        Args:
+            url (str): Source URL, the manifest key
+            content (str): Raw text
+            filepath (str): Preferred logical source file name
+
+        Returns:
+            Dict: The manifest entry; ``chunks`` is kept only when the
+                content is unchanged
+        """
+        digest = self._write_blob("raw", content)
+        entry = self.documents.get(url, {})
+        if entry.get('hash') != digest:
+            entry = {'hash': digest}
+        entry['source_file'] = self._source_file(url, filepath)
+        entry['size'] = len(content)
+        self.documents[url] = entry
+        return entry
+
+    def put_chunks(
+        self, url: str, clean_text: str, chunks: List[str],
+        chunk_size: int, chunk_overlap: int
+    ):
+        """Record the cleaned text and chunk spans of a stored document."""
+        spans = chunk_spans(clean_text, chunks)
+        if spans is None:
+            logger.warning(f"Chunks of {url} are not spans of its text, not caching them")
+            return
+        self.documents[url]['chunks'] = {
+            'clean_hash': self._write_blob("clean", clean_text),
+            'chunk_size': chunk_size,
+            'chunk_overlap': chunk_overlap,
+            'spans': spans,
+        }
+
+    def get_chunks(
+        self, url: str, digest: str, chunk_size: int, chunk_overlap: int
+    ) -> Optional[List[str]]:
+        """
+        Chunks of a document whose raw text and chunking are unchanged
+
+        Args:
+            url (str): Source URL
+            digest (str): Hash of the text just fetched
+            chunk_size (int): Current chunk size
+            chunk_overlap (int): Current chunk overlap
+
+        Returns:
+            Optional[List[str]]: Chunk texts, or None when they must be
+                recomputed
+        """
+        entry = self.documents.get(url, {})
+        chunks = entry.get('chunks')
+        if (
+            entry.get('hash') != digest or not chunks
+            or chunks['chunk_size'] != chunk_size
+            or chunks['chunk_overlap'] != chunk_overlap
+        ):
+            return None
+        try:
+            text = self.read(chunks['clean_hash'], "clean")
+        except FileNotFoundError:
+            return None
+        return [text[start:end] for start, end in chunks['spans']]
+
+    def iter_documents(self) -> Iterator[Dict[str, str]]:
+        """Stored documents shaped like ``scrape_policies`` output, read one
+        at a time."""
+        for url, entry in sorted(self.documents.items()):
+            yield {
+                'url': url,
+                'filepath': entry['source_file'],
+                'content': self.read(entry['hash']),
+                'content_hash': entry['hash'],
+            }
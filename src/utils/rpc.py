@@ -0,0 +1,258 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import logging
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('!QQ')  # JSON length, array data length
+_MAX_MESSAGE_BYTES = 64 << 20  # Largest message a peer can make us buffer
+_ARRAY_KINDS = 'biuf'  # bool, integer and float arrays only
+
+
+def _encode(obj: Any) -> Tuple[bytes, List[memoryview]]:
+    """JSON for ``obj`` with each numpy array replaced by a reference to
+    its raw bytes, which follow the JSON on the wire."""
+    buffers = []
+    offset = 0
+
+    def default(value):
+        nonlocal offset
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind not in _ARRAY_KINDS:
+                raise TypeError(f"Cannot send arrays of dtype {value.dtype}")
+            data = memoryview(np.ascontiguousarray(value)).cast('B')
+            buffers.append(data)
+            offset += data.nbytes
+            return {'__ndarray__': [offset - data.nbytes, value.dtype.str, list(value.shape)]}
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Cannot send {type(value).__name__}")
+
+    return json.dumps(obj, default=default, separators=(',', ':')).encode('utf-8'), buffers
+
+
+def _decode(header: bytes, data: bytearray) -> Any:
+    def object_hook(value: Dict) -> Any:
+        if '__ndarray__' not in value:
+            return value
+        offset, dtype, shape = value['__ndarray__']
+        dtype = np.dtype(dtype)
+        if dtype.kind not in _ARRAY_KINDS:
+            raise ValueError(f"Refusing array of dtype {dtype}")
+        count = int(np.prod(shape, dtype=np.int64))
+        if offset < 0 or offset + count * dtype.itemsize > len(data):
+            raise ValueError("Array reference outside the message")
+        return np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    return json.loads(header, object_hook=object_hook)
+
+
+def send_message(sock: socket.socket, obj: Any):
+    """
+    Send one length-prefixed message over a stream socket
+
+    The message is JSON, with numpy arrays sent as raw buffers after it,
+    so decoding a message never runs code chosen by the sender.
+
+    Args:
+        sock (socket.socket): Connected stream socket
+        obj (Any): JSON-compatible payload that may contain numpy arrays
+            and scalars, e.g. a dict of query vectors
+    """
+    header, buffers = _encode(obj)
+    sock.sendall(_HEADER.pack(len(header), sum(b.nbytes for b in buffers)) + header)
+    for buffer in buffers:
+        sock.sendall(buffer)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("socket closed mid-message")
+        received += count
+    return buffer
+
+
+def recv_message(sock: socket.socket) -> Any:
+    """
+    Receive one message written by ``send_message``
+
+    Args:
+        sock (socket.socket): Connected stream socket
+
+    Returns:
+        Any: The decoded payload; arrays are writable views of the
+            received bytes
+
+    Raises:
+        ConnectionError: If the peer closed the connection
+        ValueError: If the message is oversized or malformed
+    """
+    header_size, data_size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if header_size + data_size > _MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {header_size + data_size} bytes is too large")
+    header = _recv_exact(sock, header_size)
+    return _decode(header, _recv_exact(sock, data_size))
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """
+    Socket family and address for ``/path/to.sock`` or ``host:port``
+
+    Args:
+        address (str): Unix socket path, or host and port of a TCP server
+
+    Returns:
+        Tuple[int, Any]: Address family and the address to bind or connect
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and '/' not in address and port.isdigit():
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def connect(address: str, timeout: float) -> socket.socket:
+    """
+    Connect to an RPC server, waiting up to ``timeout`` for it to come up
+
+    Args:
+        address (str): See ``parse_address``
+        timeout (float): Seconds to keep retrying, also the socket timeout
+
+    Returns:
+        socket.socket: Connected socket
+    """
+    family, target = parse_address(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(target)
+            if family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return sock
+        except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+            sock.close()
+            # The server may still be loading
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+
+class RPCClient:
+    def __init__(self, address: str, timeout: float):
+        """
+        Request/reply client with one connection per calling thread, so
+        concurrent callers never interleave messages.
+
+        Args:
+            address (str): See ``parse_address``
+            timeout (float): Seconds to wait for the server and each reply
+        """
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def call(self, message: Any) -> Any:
+        """
+        Send one message and wait for its reply, reconnecting once if the
+        connection was dropped
+
+        Any failure closes the connection: after a timeout or a malformed
+        reply, a late answer may still be in flight on it.
+
+        Args:
+            message (Any): Request, see ``send_message``
+
+        Returns:
+            Any: The server's reply
+        """
+        if self._pid != os.getpid():
+            # Forked child: the inherited sockets belong to the parent
+            self._local = threading.local()
+            self._pid = os.getpid()
+        sock = getattr(self._local, 'sock', None)
+        for attempt in range(2):
+            if sock is None:
+                sock = self._local.sock = connect(self.address, self.timeout)
+            try:
+                send_message(sock, message)
+                return recv_message(sock)
+            except Exception as e:
+                sock.close()
+                sock = self._local.sock = None
+                if attempt or not isinstance(e, ConnectionError):
+                    raise
+
+    def close(self):
+        """Close the calling thread's connection."""
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Every client thread keeps a connection open
+    request_queue_size = 128
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def make_server(
+    address: str, handle: Callable[[Any], Any]
+) -> socketserver.BaseServer:
+    """
+    Bind a threaded server answering every message with ``handle(message)``
+
+    Unix sockets are created with mode 0600. Messages are plain data, but
+    TCP servers are not authenticated, so bind them on a private network.
+
+    Args:
+        address (str): See ``parse_address``
+        handle (Callable[[Any], Any]): Called once per request, in the
+            connection's thread
+
+    Returns:
+        socketserver.BaseServer: Bound server; run ``serve_forever`` on it
+    """
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    message = recv_message(self.request)
+                except (ConnectionError, OSError):
+                    return
+                except ValueError as e:
+                    logger.warning(f"Dropping connection after a bad message: {str(e)}")
+                    return
+                send_message(self.request, handle(message))
+
+    family, target = parse_address(address)
+    if family == socket.AF_INET:
+        return _TCPServer(target, Handler)
+    if os.path.exists(target):
+        os.unlink(target)
+    server = _UnixServer(target, Handler)
+    os.chmod(target, 0o600)
+    return server
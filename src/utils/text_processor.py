@@ -3,6 +3,7 @@ from typing import List, Dict
 import os
 import logging
 from src.config.config import Config
+from src.utils.chunk_batch import ChunkBatch
 
 
 logging.basicConfig(level=logging.INFO)
@@ -39,9 +40,10 @@ class TextProcessor:
         
     def split_into_chunks(self, text: str) -> List[str]:
         """Split text into overlapping chunks"""
-        # First clean the text
-        text = self.clean_text(text)
+        return self.split_clean_text(self.clean_text(text))
         
+    def split_clean_text(self, text: str) -> List[str]:
+        """Split text already passed through clean_text into overlapping chunks"""
         # Log the cleaned text length
         logger.info(f"Cleaned text length: {len(text)} characters")
         
@@ -93,6 +95,25 @@ class TextProcessor:
         
     def process_document(self, content: str, metadata: Dict) -> List[Dict]:
         """Process a document into chunks with metadata"""
+        batch = ChunkBatch()
+        self.add_to_batch(batch, content, metadata)
+        processed_chunks = batch.to_dicts()
+        
+        logger.info(f"Successfully processed {len(processed_chunks)} chunks")
+        return processed_chunks
+        
+    def add_to_batch(self, batch: ChunkBatch, content: str, metadata: Dict) -> int:
+        """
+        Chunk a document into a columnar batch
+        
+        Args:
+            batch (ChunkBatch): Batch receiving the chunks
+            content (str): Document text
+            metadata (Dict): Document metadata (source_url, source_file, ...)
+            
+        Returns:
+            int: Number of chunks added
+        """
         # Clean and split the text into chunks
         chunks = self.split_into_chunks(content)
         
@@ -100,30 +121,8 @@ class TextProcessor:
         logger.info(f"Processing document from {metadata.get('source_url', 'unknown')}")
         logger.info(f"Document split into {len(chunks)} chunks")
         
-        processed_chunks = []
-        for i, chunk in enumerate(chunks):
-            # Create unique chunk ID
-            chunk_id = f"{os.path.basename(metadata['source_file'])}_{i}"
-            
-            # Create chunk metadata
-            chunk_metadata = {
-                'chunk_id': chunk_id,
-                'chunk_index': i,
-                'total_chunks': len(chunks),
-                'content': chunk,
-                'source_url': metadata.get('source_url', metadata.get('url', '')),
-                'source_file': metadata.get('source_file', metadata.get('filepath', '')),
-                'title': metadata.get('title', ''),
-            }
-            
-            # Log chunk details
-            logger.debug(f"Created chunk {chunk_id} with {len(chunk)} characters")
-            logger.debug(f"Chunk preview: {chunk[:100]}...")
-            
-            processed_chunks.append(chunk_metadata)
-        
-        logger.info(f"Successfully processed {len(processed_chunks)} chunks")
-        return processed_chunks
+        batch.add_document(metadata, chunks)
+        return len(chunks)
         
     def _is_likely_navigation(self, text: str) -> bool:
         """
@@ -0,0 +1,263 @@
+import contextvars
+import io
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional
+import logging
+from src.config.config import Config
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class InMemorySink:
+    """Keep the most recent spans and counter updates, e.g. for tests or
+    benchmarks; older records are dropped once ``maxlen`` is reached."""
+    def __init__(self, maxlen: Optional[int] = None):
+        maxlen = maxlen or Config().TRACING_MEMORY_RECORDS
+        self.spans: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self.counters: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def emit_span(self, record: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(record)
+
+    def emit_counter(self, name: str, value: float, attributes: Dict[str, Any]):
+        with self._lock:
+            self.counters.append(
+                {'name': name, 'value': value, 'attributes': attributes}
+            )
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+class JSONLogSink:
+    """Write one JSON line per span or counter update to a file or a logger."""
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        if not self.path:
+            logger.info(line)
+            return
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def emit_span(self, record: Dict[str, Any]):
+        self._write(dict(record, type='span'))
+
+    def emit_counter(self, name: str, value: float, attributes: Dict[str, Any]):
+        self._write(
+            {'type': 'counter', 'name': name, 'value': value,
+             'attributes': attributes}
+        )
+
+
+class OpenTelemetrySink:
+    """Forward spans and counters to OpenTelemetry (requires opentelemetry-api)."""
+    def __init__(self, service_name: str = "udst-rag"):
+        from opentelemetry import metrics, trace
+        self._tracer = trace.get_tracer(service_name)
+        self._meter = metrics.get_meter(service_name)
+        self._counters = {}
+
+    def emit_span(self, record: Dict[str, Any]):
+        start_ns = int(record['start'] * 1e9)
+        span = self._tracer.start_span(
+            record['name'],
+            start_time=start_ns,
+            attributes={
+                k: v for k, v in record['attributes'].items()
+                if isinstance(v, (str, bool, int, float))
+            }
+        )
+        span.end(end_time=start_ns + int(record['duration_ms'] * 1e6))
+
+    def emit_counter(self, name: str, value: float, attributes: Dict[str, Any]):
+        if name not in self._counters:
+            self._counters[name] = self._meter.create_counter(name)
+        self._counters[name].add(value, attributes=attributes)
+
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = (
+        'tracer', 'name', 'attributes', 'trace_id', 'parent',
+        'start', '_start_perf', '_token', '_parent_span'
+    )
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self._parent_span = parent
+        self.parent = parent.name if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._start_perf) * 1000.0
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in another context, e.g. a generator resumed on a
+            # different thread; restore the parent explicitly
+            _current_span.set(self._parent_span)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.tracer.sink.emit_span({
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'parent': self.parent,
+            'start': self.start,
+            'duration_ms': duration_ms,
+            'attributes': self.attributes,
+        })
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+class Tracer:
+    def __init__(self, sink=None, enabled: Optional[bool] = None):
+        """
+        Initialize a tracer
+
+        Args:
+            sink: Object with ``emit_span``/``emit_counter``; defaults to an
+                in-memory sink
+            enabled (Optional[bool]): Defaults to Config.TRACING_ENABLED
+        """
+        self.config = Config()
+        self.sink = sink or InMemorySink()
+        self.enabled = (
+            self.config.TRACING_ENABLED if enabled is None else enabled
+        )
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes):
+        """
+        Time a block of code
+
+        Usage::
+
+            with tracer.span("rag.search", top_k=10) as span:
+                results = index.search(...)
+                span.set_attribute("results", len(results))
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def incr(self, name: str, value: float = 1, **attributes):
+        """Add ``value`` to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.sink.emit_counter(name, value, attributes)
+
+
+@contextmanager
+def profile(mode: str = "cprofile"):
+    """
+    Capture a CPU profile of the enclosed block
+
+    Args:
+        mode (str): "cprofile" or "pyinstrument" (if installed)
+
+    Yields:
+        Dict: Filled with a text ``report`` when the block exits
+    """
+    capture = {'mode': mode, 'report': ''}
+    if mode == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield capture
+        finally:
+            profiler.stop()
+            capture['report'] = profiler.output_text()
+    elif mode == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(
+                'cumulative'
+            ).print_stats(30)
+            capture['report'] = stream.getvalue()
+    else:
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+
+def create_sink(kind: str, path: Optional[str] = None):
+    """Build a sink by name: "memory", "json" or "otel"."""
+    if kind == "memory":
+        return InMemorySink()
+    if kind == "json":
+        return JSONLogSink(path)
+    if kind == "otel":
+        try:
+            return OpenTelemetrySink()
+        except ImportError:
+            logger.warning("opentelemetry is not installed, using JSON log sink")
+            return JSONLogSink(path)
+    raise ValueError(f"Unknown tracing sink: {kind}")
+
+
+_default_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer configured from Config."""
+    global _default_tracer
+    if _default_tracer is None:
+        config = Config()
+        _default_tracer = Tracer(
+            create_sink(config.TRACING_SINK, config.TRACING_LOG_PATH)
+        )
+    return _default_tracer
@@ -0,0 +1,123 @@
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.embeddings.embedder import DocumentEmbedder
+from src.retrieval.faiss_index import FAISSIndex
+from src.utils.tracing import InMemorySink, Tracer
+
+
+DIMENSION = 16
+
+TEXTS = [
+    ("a.txt", "Students on academic probation must meet their advisor."),
+    ("a.txt", "Probation ends after one semester in good standing."),
+    ("b.txt", "Article 4.2 defines the credit hour for every course."),
+    ("b.txt", "Credit hours are approved by the academic council."),
+    ("c.txt", "The examination policy covers final exams."),
+    ("c.txt", "Make-up exams require a medical certificate."),
+]
+
+
+class FakeEncoder:
+    """Offline stand-in for SentenceTransformer hashing words into a vector."""
+    def __init__(self, dimension=DIMENSION):
+        self.dimension = dimension
+        self.calls = 0
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        self.calls += 1
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+class FakeChatClient:
+    """Offline stand-in for the Mistral client's chat.complete call."""
+    def __init__(self, content="This is a mock answer."):
+        self.content = content
+        self.calls = []
+        self.chat = self
+
+    def complete(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        for word in self.content.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(
+                data=SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            )
+
+
+def make_chunks():
+    """Chunks shaped like TextProcessor.process_document output."""
+    chunks = []
+    counters = {}
+    for source_file, content in TEXTS:
+        chunk_index = counters.get(source_file, 0)
+        counters[source_file] = chunk_index + 1
+        chunks.append({
+            'chunk_id': f"{source_file}_{chunk_index}",
+            'chunk_index': chunk_index,
+            'total_chunks': 2,
+            'content': content,
+            'source_url': f"http://example.com/{source_file}",
+            'source_file': source_file,
+            'title': '',
+        })
+    return chunks
+
+
+def configure_index(index, tmp_path):
+    """Point an index at a temporary location with the test dimension."""
+    index.config.EMBEDDING_DIMENSION = DIMENSION
+    index.config.INDEX_PATH = str(tmp_path / "faiss_index")
+    index.config.SPARSE_INDEX_PATH = str(tmp_path / "faiss_index_bm25.npz")
+    return index
+
+
+@pytest.fixture
+def embeddings_dict():
+    """Random embeddings dict like DocumentEmbedder.embed_chunks returns."""
+    rng = np.random.default_rng(0)
+    embeddings_dict = {}
+    for chunk in make_chunks():
+        metadata = dict(chunk)
+        chunk_id = metadata.pop('chunk_id')
+        embeddings_dict[chunk_id] = {
+            'embedding': rng.normal(size=DIMENSION).astype('float32'),
+            'metadata': metadata,
+        }
+    return embeddings_dict
+
+
+@pytest.fixture
+def faiss_index(tmp_path, embeddings_dict):
+    """Create a small saved FAISS index for testing."""
+    index = configure_index(FAISSIndex(), tmp_path)
+    index.create_index(embeddings_dict)
+    return index
+
+
+@pytest.fixture
+def offline_rag(tmp_path):
+    """A RAGModel over the test chunks with no model download or API calls."""
+    from src.models.rag_model import RAGModel
+
+    tracer = Tracer(InMemorySink(), enabled=True)
+    embedder = DocumentEmbedder(model=FakeEncoder())
+    embedder.config.EMBEDDING_DIMENSION = DIMENSION
+    rag = RAGModel(embedder=embedder, client=FakeChatClient(), tracer=tracer)
+    configure_index(rag.index, tmp_path)
+    rag.index.create_index(rag.embedder.embed_chunks(make_chunks()))
+    rag.context_builder._encoding_failed = True
+    return rag
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from src.retrieval.bm25_index import (
+    BM25Index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+@pytest.fixture
+def bm25():
+    """Create a small BM25 index for testing."""
+    index = BM25Index()
+    index.build([
+        "Students on academic probation must meet their advisor.",
+        "Article 4.2 defines the credit hour for every course.",
+        "The examination policy covers final exams and make-up exams.",
+        "Annual leave for academic members is approved by the dean.",
+    ])
+    return index
+
+def test_tokenize_keeps_section_numbers():
+    """Test that dotted section numbers stay one token."""
+    assert tokenize("See Article 4.2, clause 1.1.3.") == [
+        "see", "article", "4.2", "clause", "1.1.3"
+    ]
+
+def test_search_exact_terms(bm25):
+    """Test that exact terms retrieve the right chunk first."""
+    assert bm25.search("article 4.2")[0][0] == 1
+    assert bm25.search("probation")[0][0] == 0
+    assert bm25.search("exams")[0][0] == 2
+
+def test_search_no_match(bm25):
+    """Test that unknown terms return no results."""
+    assert bm25.search("zebra") == []
+
+def test_search_top_k(bm25):
+    """Test that results are capped and sorted by score."""
+    results = bm25.search("academic exams credit", top_k=2)
+    assert len(results) == 2
+    assert results[0][1] >= results[1][1]
+
+def test_save_and_load(bm25, tmp_path):
+    """Test that a saved index gives identical scores after loading."""
+    path = str(tmp_path / "bm25.npz")
+    assert bm25.save(path)
+    
+    loaded = BM25Index()
+    assert loaded.load(path)
+    assert loaded.num_docs == bm25.num_docs
+    assert loaded.search("academic leave") == bm25.search("academic leave")
+
+def test_reciprocal_rank_fusion():
+    """Test that ids ranked well by both lists win."""
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    ids = [doc_id for doc_id, _ in fused]
+    assert ids[0] == 1
+    assert set(ids) == {1, 2, 3, 4}
+    assert np.isclose(fused[0][1], 1 / 61 + 1 / 62)
@@ -0,0 +1,56 @@
+from src.utils.chat_history import ChatHistory
+
+
+def ask(history, count, start=0):
+    """Add answered exchanges numbered from ``start``."""
+    for i in range(start, start + count):
+        history.add_question(f"question {i}")
+        history.set_answer(f"answer {i}", ["http://example.com/a.txt"])
+
+
+def test_history_is_capped():
+    """Test that the oldest exchanges are dropped past the cap."""
+    history = ChatHistory(max_exchanges=5, page_size=2)
+    ask(history, 8)
+    assert len(history) == 5
+    assert history.dropped == 3
+    assert history.window(pages=10)[0][0] == "question 3"
+    assert history.exchanges[0][2][0] is history.exchanges[4][2][0]
+
+def test_window_pages_back_from_newest():
+    """Test that rendering covers the newest pages only, with older ones
+    on demand."""
+    history = ChatHistory(max_exchanges=50, page_size=3)
+    ask(history, 7)
+    assert [e[0] for e in history.window()] == ["question 4", "question 5", "question 6"]
+    assert history.has_older(pages=2)
+    assert not history.has_older(pages=3)
+
+    html = history.render(pages=1)
+    assert "question 3" not in html and "question 6" in html
+    assert "question 1" in history.render(pages=3)
+
+def test_render_escapes_and_updates_answers():
+    """Test that message text is escaped and a pending question re-renders
+    once answered."""
+    history = ChatHistory(page_size=5)
+    history.add_question("<b>bold?</b>")
+    pending = history.render()
+    assert "&lt;b&gt;bold?&lt;/b&gt;" in pending
+    assert "assistant-group" not in pending
+
+    history.set_answer("Yes & no.", ["http://example.com/b.txt"])
+    answered = history.render()
+    assert "Yes &amp; no." in answered
+    assert '<a href="http://example.com/b.txt" target="_blank"' in answered
+    assert history.render() == answered
+
+def test_sources_link_only_web_urls():
+    """Test that web sources become escaped links and other sources stay
+    plain text."""
+    history = ChatHistory()
+    history.add_question("q")
+    history.set_answer("a", ['https://x.edu/p?a=1&b="2"', 'javascript:alert(1)'])
+    html = history.render()
+    assert '<a href="https://x.edu/p?a=1&amp;b=&quot;2&quot;"' in html
+    assert 'href="javascript' not in html
@@ -0,0 +1,54 @@
+import numpy as np
+from src.retrieval.faiss_index import FAISSIndex
+from src.utils.chunk_batch import ChunkBatch
+from src.utils.dedup import ChunkDeduplicator
+from conftest import configure_index, make_chunks
+from test_dedup import duplicated_chunks
+
+
+def with_category(chunks):
+    """Chunks with the category key the batch always fills in."""
+    return [dict(chunk, category='') for chunk in chunks]
+
+
+def test_round_trip_and_shared_document_strings():
+    """Test that rows convert back to the same chunk dicts and that a
+    document's strings are stored once."""
+    chunks = with_category(make_chunks())
+    batch = ChunkBatch.from_dicts(chunks)
+
+    assert len(batch) == 6
+    assert len(batch.documents) == 3
+    assert batch.to_dicts() == chunks
+    assert batch.metadata(0)['source_url'] is batch.metadata(1)['source_url']
+    assert [batch.chunk_id(row) for row in (0, 5)] == ["a.txt_0", "c.txt_1"]
+
+def test_deduplicate_batch_matches_dicts():
+    """Test that columnar dedup keeps the same rows and locations."""
+    chunks = with_category(duplicated_chunks())
+    deduplicator = ChunkDeduplicator(threshold=0.6)
+    kept = deduplicator.deduplicate_batch(ChunkBatch.from_dicts(chunks))
+
+    assert kept.to_dicts() == deduplicator.deduplicate(chunks)
+    assert list(kept.locations) == [3]
+
+def test_batch_index_matches_dict_index(tmp_path, offline_rag):
+    """Test that a batch embedded as one matrix builds the same index as
+    the per-chunk dicts."""
+    chunks = with_category(make_chunks())
+    embedder = offline_rag.embedder
+    batch = embedder.embed_batch(ChunkBatch.from_dicts(chunks))
+    assert batch.embeddings.dtype == np.float32
+
+    from_batch = configure_index(FAISSIndex(), tmp_path / "batch")
+    from_batch.create_index(batch)
+    from_dicts = configure_index(FAISSIndex(), tmp_path / "dicts")
+    from_dicts.create_index(embedder.embed_chunks(chunks))
+
+    assert from_batch.metadata == from_dicts.metadata
+    assert from_batch.id_mapping == from_dicts.id_mapping
+    assert from_batch.version == from_dicts.version
+    np.testing.assert_allclose(
+        from_batch.get_embeddings(list(range(6))),
+        from_dicts.get_embeddings(list(range(6)))
+    )
@@ -0,0 +1,72 @@
+import pytest
+from src.utils.context_builder import ContextBuilder
+
+
+def make_chunk(source_file, chunk_index, content):
+    return {
+        'source_file': source_file,
+        'source_url': f"http://example.com/{source_file}",
+        'chunk_index': chunk_index,
+        'content': content,
+    }
+
+
+@pytest.fixture
+def builder():
+    """Create a context builder that does not need the tiktoken download."""
+    builder = ContextBuilder(max_tokens=200)
+    builder._encoding_failed = True
+    return builder
+
+def test_strip_overlap():
+    """Test that the repeated sentence between chunks is removed."""
+    previous = "First sentence. Second sentence."
+    following = "Second sentence. Third sentence."
+    assert ContextBuilder.strip_overlap(previous, following) == "Third sentence."
+    assert ContextBuilder.strip_overlap("No overlap.", "Other text.") == "Other text."
+
+def test_merge_adjacent_chunks(builder):
+    """Test that consecutive chunks of one document become one passage."""
+    results = [
+        make_chunk("a.txt", 1, "Second sentence. Third sentence."),
+        make_chunk("b.txt", 0, "Unrelated policy text."),
+        make_chunk("a.txt", 0, "First sentence. Second sentence."),
+    ]
+    passages = builder.merge_adjacent(results)
+    
+    assert len(passages) == 2
+    assert passages[0]['content'] == (
+        "First sentence. Second sentence. Third sentence."
+    )
+    assert passages[1]['source_file'] == "b.txt"
+
+def test_drop_near_duplicates(builder):
+    """Test that boilerplate repeated across documents is kept once."""
+    text = "The following words and expressions shall have the meanings assigned"
+    results = [
+        make_chunk("a.txt", 0, text),
+        make_chunk("b.txt", 0, text + "."),
+        make_chunk("c.txt", 0, "Completely different content here"),
+    ]
+    kept = builder.drop_near_duplicates(results)
+    assert [r['source_file'] for r in kept] == ["a.txt", "c.txt"]
+
+def test_build_respects_token_budget(builder):
+    """Test that passages beyond the budget are left out and counted."""
+    results = [
+        make_chunk(f"{i}.txt", 0, f"policy {i} " + "word " * 100)
+        for i in range(5)
+    ]
+    context, stats = builder.build(results)
+    
+    assert stats['chunks_retrieved'] == 5
+    assert stats['passages_used'] < 5
+    assert stats['context_tokens'] <= 200
+    assert builder.count_tokens(context) <= 200
+    assert "policy 0" in context
+
+def test_build_truncates_single_oversized_passage(builder):
+    """Test that an oversized best passage is truncated, not dropped."""
+    context, stats = builder.build([make_chunk("a.txt", 0, "word " * 1000)])
+    assert context
+    assert stats['context_tokens'] <= 200
@@ -0,0 +1,171 @@
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.scrapers.crawler import PolicyCrawler, canonicalize_url
+from src.scrapers.policy_scraper import PolicyScraper
+from src.utils.document_store import DocumentStore
+
+
+SITE = {
+    "robots.txt": "User-agent: *\nDisallow: /policies/private\n",
+    "policies/index.html": (
+        '<a href="exams.html">Exams</a> <a href="exams.html#scope">Scope</a> '
+        '<a href="./probation.html?utm_source=news">Probation</a> '
+        '<a href="/policies/private/drafts.html">Drafts</a> '
+        '<a href="/news/today.html">News</a> <a href="http://example.com/">Out</a>'
+    ),
+    "policies/exams.html": (
+        '<main>Make-up exams require a medical certificate.</main>'
+        '<a href="/policies/procedures/appeals.html">Appeals</a>'
+    ),
+    "policies/probation.html": (
+        '<main>Probation ends after one semester in good standing.</main>'
+        '<a href="/policies/exams.html">Exams</a>'
+    ),
+    "policies/procedures/appeals.html": (
+        '<main>Appeals are heard within ten working days.</main>'
+        '<a href="/policies/procedures/forms.html">Forms</a>'
+    ),
+    "policies/procedures/forms.html": "<main>Appeal form.</main>",
+    "policies/private/drafts.html": "<main>Draft policy.</main>",
+    "news/today.html": "<main>News.</main>",
+}
+
+
+def serve_site(root, requested, robots_delay_s=0.0):
+    """Serve SITE from ``root`` on a local HTTP server, recording requested
+    paths and optionally answering robots.txt slowly."""
+    for path, body in SITE.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(body, encoding='utf-8')
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path == "/robots.txt":
+                time.sleep(robots_delay_s)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory=str(root))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def site(tmp_path):
+    """The fixture site's base URL and the paths requested from it."""
+    requested = []
+    server = serve_site(tmp_path / "site", requested)
+    yield f"http://127.0.0.1:{server.server_address[1]}", requested
+    server.shutdown()
+    server.server_close()
+
+
+def make_crawler(base, tmp_path, store=None, seeds=("/policies/index.html",), **settings):
+    """Crawler over the fixture site without delays."""
+    scraper = PolicyScraper()
+    scraper.store = store
+    scraper.config.CRAWL_DELAY_S = 0.0
+    scraper.config.CRAWL_ALLOWED_PREFIXES = []
+    scraper.config.CRAWL_SEEDS = []
+    for name, value in settings.items():
+        setattr(scraper.config, name, value)
+    return PolicyCrawler(
+        scraper, seeds=[url if url.startswith("http") else base + url for url in seeds],
+        state_path=str(tmp_path / "crawl_state.json")
+    )
+
+
+def test_canonicalize_url():
+    """Test that equivalent spellings of a URL compare equal."""
+    assert canonicalize_url("HTTPS://Example.EDU:443/a/./b/../c/?utm_source=x&z=1&a=2#top") == (
+        "https://example.edu/a/c?a=2&z=1"
+    )
+    assert canonicalize_url("http://example.edu") == "http://example.edu/"
+    assert canonicalize_url("http://example.edu:8080/a%7Eb") == "http://example.edu:8080/a~b"
+
+def test_crawl_discovers_in_scope_pages_once(site, tmp_path):
+    """Test that the crawl stays under the seed's path, honours robots.txt
+    and the depth cap, and fetches each canonical URL once."""
+    base, requested = site
+    crawler = make_crawler(base, tmp_path, CRAWL_MAX_DEPTH=2, CRAWL_WORKERS=3)
+    documents = dict(crawler.crawl())
+
+    assert set(documents) == {
+        f"{base}/policies/exams.html",
+        f"{base}/policies/probation.html",
+        f"{base}/policies/procedures/appeals.html",
+    }
+    assert documents[f"{base}/policies/exams.html"] == "Make-up exams require a medical certificate."
+    pages = [path for path in requested if path != "/robots.txt"]
+    assert sorted(pages) == sorted(set(pages))
+    assert "/policies/procedures/forms.html" not in pages
+    assert "/policies/private/drafts.html" not in pages
+    assert "/news/today.html" not in pages
+    assert crawler.done[f"{base}/policies/private/drafts.html"][0] == "disallowed"
+    assert not (tmp_path / "crawl_state.json").exists()
+
+def test_interrupted_crawl_resumes_from_state(site, tmp_path):
+    """Test that a crawl stopped early checkpoints its frontier and the
+    next crawl fetches only the remaining pages, taking finished documents
+    from the store."""
+    base, requested = site
+    store = DocumentStore(str(tmp_path / "store"))
+    crawler = make_crawler(base, tmp_path, store, CRAWL_MAX_DEPTH=3, CRAWL_WORKERS=1)
+    pages = crawler.crawl()
+    url, content = next(pages)
+    store.put_document(url, content, "first.txt")
+    pages.close()
+    assert (tmp_path / "crawl_state.json").exists()
+    fetched = len(requested)
+
+    crawler = make_crawler(base, tmp_path, store, CRAWL_MAX_DEPTH=3, CRAWL_WORKERS=1)
+    documents = dict(crawler.crawl())
+    assert documents[url] == content
+    assert f"{base}/policies/procedures/forms.html" in documents
+    assert "/policies/index.html" not in requested[fetched:]
+    assert url[len(base):] not in requested[fetched:]
+    assert not (tmp_path / "crawl_state.json").exists()
+
+def test_policy_urls_are_documents_when_no_index_seeds(site, tmp_path):
+    """Test that without CRAWL_SEEDS the POLICY_URLS pages are kept as
+    documents and their directory is crawled for more policies."""
+    base, _ = site
+    crawler = make_crawler(
+        base, tmp_path, seeds=(), CRAWL_MAX_DEPTH=2,
+        POLICY_URLS=[f"{base}/policies/exams.html", f"{base}/policies/probation.html"]
+    )
+    documents = dict(crawler.crawl())
+    assert set(documents) == {
+        f"{base}/policies/exams.html",
+        f"{base}/policies/probation.html",
+        f"{base}/policies/procedures/appeals.html",
+        f"{base}/policies/procedures/forms.html",
+    }
+    assert crawler.prefixes == ["/policies"]
+
+def test_slow_robots_txt_does_not_block_other_hosts(site, tmp_path):
+    """Test that a host with a slow robots.txt does not hold up the
+    workers crawling another host."""
+    base, _ = site
+    slow = serve_site(tmp_path / "slow", [], robots_delay_s=1.0)
+    slow_base = f"http://127.0.0.1:{slow.server_address[1]}"
+    try:
+        crawler = make_crawler(
+            base, tmp_path, seeds=(f"{slow_base}/policies/index.html", "/policies/index.html"),
+            CRAWL_MAX_DEPTH=1, CRAWL_WORKERS=2
+        )
+        start = time.monotonic()
+        arrivals = {url: time.monotonic() - start for url, _ in crawler.crawl()}
+    finally:
+        slow.shutdown()
+        slow.server_close()
+    assert arrivals[f"{base}/policies/exams.html"] < 0.5
+    assert arrivals[f"{slow_base}/policies/exams.html"] >= 1.0
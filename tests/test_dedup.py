@@ -0,0 +1,61 @@
+import numpy as np
+from src.utils.dedup import ChunkDeduplicator, MinHasher, source_urls
+from conftest import make_chunks
+
+
+BOILERPLATE = (
+    "Where the context requires, words importing the singular shall include "
+    "the plural and words importing the masculine gender shall include the "
+    "feminine gender and vice versa."
+)
+
+
+def duplicated_chunks():
+    """Test chunks where b.txt and c.txt repeat the same definitions text."""
+    chunks = make_chunks()
+    chunks[3]['content'] = BOILERPLATE
+    chunks[5]['content'] = BOILERPLATE.replace("shall include", "will include", 1)
+    return chunks
+
+
+def test_minhash_estimates_jaccard():
+    """Test that signature agreement tracks shingle overlap."""
+    hasher = MinHasher(num_perm=256, shingle_size=2)
+    same = hasher.signatures([BOILERPLATE, BOILERPLATE.upper()])
+    assert np.array_equal(same[0], same[1])
+
+    different = hasher.signatures([BOILERPLATE, "Make-up exams need a certificate."])
+    assert np.mean(different[0] == different[1]) < 0.1
+
+def test_deduplicate_keeps_first_and_all_locations():
+    """Test that near-duplicates collapse into the first chunk with every
+    source location for citation."""
+    chunks = duplicated_chunks()
+    kept = ChunkDeduplicator(threshold=0.6).deduplicate(chunks)
+
+    assert [c['chunk_id'] for c in kept] == [
+        "a.txt_0", "a.txt_1", "b.txt_0", "b.txt_1", "c.txt_0"
+    ]
+    merged = kept[3]
+    assert [(l['source_file'], l['chunk_index']) for l in merged['locations']] == [
+        ("b.txt", 1), ("c.txt", 1)
+    ]
+    assert source_urls(merged) == [
+        "http://example.com/b.txt", "http://example.com/c.txt"
+    ]
+    assert 'locations' not in kept[0]
+    assert 'locations' not in chunks[3]
+
+def test_merged_chunk_is_found_and_cited_for_every_source(offline_rag):
+    """Test that filters and sources cover all documents of a merged chunk."""
+    chunks = ChunkDeduplicator(threshold=0.6).deduplicate(duplicated_chunks())
+    offline_rag.index.create_index(offline_rag.embedder.embed_chunks(chunks))
+
+    c_ids = offline_rag.index.matching_ids({'source_file': 'c.txt'})
+    assert list(c_ids) == [3, 4]
+    context, sources = offline_rag.get_relevant_context(
+        "words importing the singular", filters={'source_file': 'c.txt'}
+    )
+    assert "http://example.com/b.txt" in sources
+    assert "http://example.com/c.txt" in sources
+    assert "Source: http://example.com/b.txt, http://example.com/c.txt" in context
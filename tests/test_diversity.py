@@ -0,0 +1,34 @@
+import numpy as np
+from src.retrieval.diversity import mmr_select, cap_per_source
+
+
+def test_mmr_prefers_diverse_candidates():
+    """Test that a near-copy of the best hit loses to a different hit."""
+    query = np.array([1.0, 0.0, 0.0])
+    embeddings = np.array([
+        [0.95, 0.31, 0.0],   # best match
+        [0.94, 0.34, 0.0],   # near-copy of the best match
+        [0.80, 0.0, 0.60],   # different direction, still relevant
+    ])
+    assert mmr_select(query, embeddings, k=2, lambda_mult=0.5) == [0, 2]
+
+def test_mmr_pure_relevance_matches_ranking():
+    """Test that lambda 1.0 reproduces the relevance order."""
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=8)
+    embeddings = rng.normal(size=(20, 8))
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = list(np.argsort(-(normalized @ query))[:5])
+    assert mmr_select(query, embeddings, k=5, lambda_mult=1.0) == expected
+
+def test_mmr_handles_small_inputs():
+    """Test edge cases for empty input and k larger than n."""
+    assert mmr_select(np.ones(3), np.zeros((0, 3)), k=3) == []
+    assert sorted(mmr_select(np.ones(3), np.eye(3), k=10)) == [0, 1, 2]
+
+def test_cap_per_source():
+    """Test that only the first results per source are kept."""
+    results = [{'source_file': s} for s in ["a", "a", "b", "a", "b"]]
+    kept = cap_per_source(results, 2)
+    assert [r['source_file'] for r in kept] == ["a", "a", "b", "b"]
+    assert cap_per_source(results, None) == results
@@ -0,0 +1,87 @@
+import gzip
+import os
+from src.utils.document_store import DocumentStore, content_hash
+from src.utils.text_processor import TextProcessor
+from conftest import configure_index
+
+
+POLICY = (
+    "Students on academic probation must meet their advisor every month. "
+    "Probation ends after one semester in good standing! Does a student on "
+    "probation keep their scholarship? Only if the scholarship terms allow it. "
+) * 6
+
+
+def test_documents_are_compressed_and_keyed_by_content(tmp_path):
+    """Test that raw text is stored once per hash, compressed, and that
+    same-named pages from different URLs keep distinct source names."""
+    store = DocumentStore(str(tmp_path), compression="gzip")
+    first = store.put_document("http://a.edu/policies/exam", POLICY, "raw/exam.txt")
+    second = store.put_document("http://b.edu/other/exam", POLICY, "raw/exam.txt")
+    store.save()
+
+    assert first['hash'] == second['hash'] == content_hash(POLICY)
+    assert first['source_file'] == "raw/exam.txt"
+    assert second['source_file'] != "raw/exam.txt"
+    blobs = [os.path.join(d, f) for d, _, files in os.walk(tmp_path / "raw") for f in files]
+    assert len(blobs) == 1
+    with open(blobs[0], 'rb') as f:
+        assert gzip.decompress(f.read()).decode('utf-8') == POLICY
+    assert os.path.getsize(blobs[0]) < len(POLICY)
+
+    reloaded = DocumentStore(str(tmp_path), compression="zstd")
+    assert reloaded.documents == store.documents
+    with reloaded.open(first['hash']) as stream:
+        assert stream.read(20) == POLICY[:20]
+
+def test_chunks_reused_only_for_unchanged_documents(tmp_path):
+    """Test that stored chunk spans give back the processor's chunks and
+    are invalidated by new content or chunking parameters."""
+    processor = TextProcessor(chunk_size=120, chunk_overlap=40)
+    url = "http://a.edu/policies/probation"
+    store = DocumentStore(str(tmp_path), compression="zstd")
+    store.put_document(url, POLICY, "probation.txt")
+    clean = processor.clean_text(POLICY)
+    chunks = processor.split_clean_text(clean)
+    store.put_chunks(url, clean, chunks, 120, 40)
+    store.save()
+
+    store = DocumentStore(str(tmp_path))
+    assert store.get_chunks(url, content_hash(POLICY), 120, 40) == chunks
+    assert store.get_chunks(url, content_hash(POLICY), 300, 40) is None
+    store.put_document(url, POLICY + " Amended.", "probation.txt")
+    assert store.get_chunks(url, content_hash(POLICY + " Amended."), 120, 40) is None
+
+def test_rebuild_skips_cleaning_unchanged_documents(tmp_path, offline_rag, monkeypatch):
+    """Test that a second index build only cleans documents that changed."""
+    pages = {
+        "http://a.edu/probation": POLICY,
+        "http://a.edu/exams": "Make-up exams require a medical certificate. " * 10,
+    }
+    scraper = offline_rag.scraper
+    scraper.config.POLICY_URLS = list(pages)
+    scraper.store = DocumentStore(str(tmp_path / "store"))
+    monkeypatch.setattr(scraper, "fetch_document", lambda url: pages[url])
+    cleaned = []
+    clean_text = offline_rag.processor.clean_text
+    monkeypatch.setattr(
+        offline_rag.processor, "clean_text",
+        lambda text: cleaned.append(text) or clean_text(text)
+    )
+
+    configure_index(offline_rag.index, tmp_path / "first")
+    assert offline_rag.initialize()
+    first = dict(offline_rag.index.metadata)
+    assert len(cleaned) == 2
+
+    pages["http://a.edu/exams"] += " Results are published within a week."
+    configure_index(offline_rag.index, tmp_path / "second")
+    assert offline_rag.initialize()
+    assert cleaned[2:] == [pages["http://a.edu/exams"]]
+    probation = [
+        m['content'] for m in offline_rag.index.metadata.values()
+        if m['source_url'].endswith('probation')
+    ]
+    assert probation == [
+        m['content'] for m in first.values() if m['source_url'].endswith('probation')
+    ]
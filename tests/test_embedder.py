@@ -0,0 +1,56 @@
+import threading
+import time
+from src.embeddings.embedder import DocumentEmbedder
+from conftest import FakeEncoder
+
+
+class SlowEncoder(FakeEncoder):
+    """Records how many encode calls overlap."""
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+        self._guard = threading.Lock()
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        with self._guard:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self._guard:
+            self.active -= 1
+        return super().encode(sentences, batch_size, **kwargs)
+
+
+def run_concurrently(embedder, count=8):
+    threads = [
+        threading.Thread(target=embedder.generate_embedding, args=(f"query {i}",))
+        for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_inference_lock_serializes_forward_passes():
+    """Test that concurrent queries never run the model at the same time."""
+    encoder = SlowEncoder()
+    run_concurrently(DocumentEmbedder(model=encoder))
+    assert encoder.calls == 8
+    assert encoder.max_active == 1
+
+
+def test_remote_encoders_skip_the_lock():
+    """Test that encoders batching on a server are called concurrently."""
+    encoder = SlowEncoder()
+    encoder.remote = True
+    run_concurrently(DocumentEmbedder(model=encoder))
+    assert encoder.max_active > 1
+
+
+def test_warm_up_runs_single_and_batch_passes():
+    """Test that warm-up exercises both embedding paths."""
+    encoder = FakeEncoder()
+    DocumentEmbedder(model=encoder).warm_up()
+    assert encoder.calls >= 2
@@ -0,0 +1,76 @@
+import threading
+import numpy as np
+import pytest
+from src.config.config import Config
+from src.embeddings.embedder import DocumentEmbedder
+from src.embeddings.embedding_server import EmbeddingServer, RemoteEncoder
+from conftest import FakeEncoder
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = EmbeddingServer(
+        model=FakeEncoder(), socket_path=str(tmp_path / "embed.sock"),
+        window_ms=20
+    )
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_remote_encoder_matches_local(server):
+    encoder = RemoteEncoder(server.socket_path, timeout=5)
+    texts = ["academic probation", "credit hour", "final exams"]
+
+    expected = FakeEncoder().encode(texts)
+    np.testing.assert_allclose(encoder.encode(texts), expected)
+    np.testing.assert_allclose(encoder.encode(texts[0]), expected[0])
+    encoder.close()
+
+
+def test_concurrent_clients_share_batches(server):
+    encoder = RemoteEncoder(server.socket_path, timeout=5)
+    texts = [f"question number {i}" for i in range(16)]
+    results = {}
+    barrier = threading.Barrier(len(texts))
+
+    def embed(text):
+        barrier.wait()
+        results[text] = encoder.encode(text)
+
+    threads = [threading.Thread(target=embed, args=(t,)) for t in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = FakeEncoder()
+    for text in texts:
+        np.testing.assert_allclose(results[text], expected.encode(text))
+    assert server.model.calls < len(texts)
+    assert sum(server.batch_sizes) == len(texts)
+
+
+def test_embedder_uses_server_when_configured(server, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_SERVER_SOCKET', server.socket_path)
+
+    embedder = DocumentEmbedder()
+    assert isinstance(embedder.model, RemoteEncoder)
+    embeddings = embedder.generate_embeddings(["credit hour", "final exams"])
+    assert embeddings.shape == (2, 16)
+
+
+def test_server_errors_reach_the_client(tmp_path):
+    class BrokenEncoder:
+        def encode(self, *args, **kwargs):
+            raise ValueError("model failed")
+
+    server = EmbeddingServer(
+        model=BrokenEncoder(), socket_path=str(tmp_path / "broken.sock")
+    )
+    server.start()
+    try:
+        with pytest.raises(RuntimeError, match="model failed"):
+            RemoteEncoder(server.socket_path, timeout=5).encode("question")
+    finally:
+        server.stop()
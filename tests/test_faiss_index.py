@@ -0,0 +1,180 @@
+import json
+import numpy as np
+import pytest
+from src.retrieval.faiss_index import FAISSIndex
+from conftest import DIMENSION, configure_index
+
+
+def test_search_returns_index_ids(faiss_index):
+    """Test that dense search returns metadata and row ids."""
+    query = faiss_index.index.reconstruct(2)
+    results = faiss_index.search(query, top_k=3)
+    
+    assert len(results) == 3
+    assert results[0]['index_id'] == 2
+    assert results[0]['distance'] == pytest.approx(0.0, abs=1e-5)
+    assert results[0]['content'].startswith("Article 4.2")
+
+def test_hybrid_search_promotes_exact_terms(faiss_index):
+    """Test that lexical matches are fused into the dense ranking."""
+    # A query vector close to the examination chunk, but an exact-term query
+    query_embedding = faiss_index.index.reconstruct(4)
+    results = faiss_index.hybrid_search("article 4.2", query_embedding, top_k=3)
+    
+    ids = [r['index_id'] for r in results]
+    assert 2 in ids
+    assert 4 in ids
+    assert all('rrf_score' in r and 'bm25_score' in r for r in results)
+    scores = [r['rrf_score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_load_rebuilds_missing_sparse_index(faiss_index, tmp_path):
+    """Test that an index saved without a lexical index still loads it."""
+    (tmp_path / "faiss_index_bm25.npz").unlink()
+    
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    assert loaded.sparse_index.num_docs == 6
+    assert loaded.sparse_index.search("probation")[0][0] in (0, 1)
+
+def test_get_embeddings(faiss_index):
+    """Test that stored vectors are returned for result ids."""
+    embeddings = faiss_index.get_embeddings([3, 1])
+    assert embeddings.shape == (2, DIMENSION)
+    assert np.allclose(embeddings[0], faiss_index.index.reconstruct(3))
+
+def test_source_ranges(faiss_index):
+    """Test that contiguous id ranges are precomputed per source file."""
+    assert faiss_index.source_ranges == {
+        "a.txt": [(0, 2)], "b.txt": [(2, 4)], "c.txt": [(4, 6)]
+    }
+
+def test_search_with_filters(faiss_index):
+    """Test that filtered search only returns matching chunks."""
+    query = faiss_index.index.reconstruct(0)
+    results = faiss_index.search(query, top_k=5, filters={'source_file': 'c.txt'})
+    assert {r['index_id'] for r in results} == {4, 5}
+    assert all(r['source_file'] == 'c.txt' for r in results)
+
+def test_filter_expressions(faiss_index):
+    """Test any-of values, AND across fields and unmatched filters."""
+    assert list(faiss_index.matching_ids(
+        {'source_file': ['a.txt', 'c.txt']}
+    )) == [0, 1, 4, 5]
+    assert list(faiss_index.matching_ids(
+        {'source_file': ['a.txt', 'b.txt'], 'chunk_index': 1}
+    )) == [1, 3]
+    query = faiss_index.index.reconstruct(0)
+    assert faiss_index.search(query, filters={'source_file': 'missing'}) == []
+
+def test_hybrid_search_with_filters(faiss_index):
+    """Test that both retrievers respect the filter."""
+    query_embedding = faiss_index.index.reconstruct(0)
+    results = faiss_index.hybrid_search(
+        "article 4.2 probation", query_embedding,
+        filters={'source_url': 'http://example.com/a.txt'}
+    )
+    assert {r['index_id'] for r in results} == {0, 1}
+
+def test_search_batch(faiss_index):
+    """Test that a batch search returns one ranking per query."""
+    queries = np.stack([faiss_index.index.reconstruct(i) for i in (1, 5)])
+    batch = faiss_index.search_batch(queries, top_k=2)
+    assert [results[0]['index_id'] for results in batch] == [1, 5]
+    assert all(len(results) == 2 for results in batch)
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+def test_approximate_index_types(tmp_path, embeddings_dict, index_type):
+    """Test that HNSW and IVF indexes support search, filters and MMR."""
+    index = configure_index(FAISSIndex(), tmp_path)
+    index.config.INDEX_TYPE = index_type
+    index.create_index(embeddings_dict)
+    
+    query = index.index.reconstruct(3)
+    assert index.search(query, top_k=1)[0]['index_id'] == 3
+    filtered = index.search(query, top_k=3, filters={'source_file': 'a.txt'})
+    assert {r['index_id'] for r in filtered} == {0, 1}
+    assert index.get_embeddings([3]).shape == (1, DIMENSION)
+    
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    assert loaded.get_embeddings([3]).shape == (1, DIMENSION)
+
+def test_saved_index_is_stamped(faiss_index, tmp_path):
+    """Test that the embedding model and dimension are saved with the index."""
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    assert loaded.index_info['embedding_model'] == loaded.config.EMBEDDING_MODEL
+    assert loaded.index_info['embedding_dimension'] == DIMENSION
+    assert loaded.index_info['num_vectors'] == 6
+
+@pytest.mark.parametrize("field,value", [
+    ("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+    ("EMBEDDING_DIMENSION", 384),
+])
+def test_load_refuses_other_embedding_model(faiss_index, tmp_path, field, value):
+    """Test that an index built with another model or dimension is rejected."""
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    setattr(loaded.config, field, value)
+    assert not loaded.load_index()
+    assert loaded.incompatible
+    assert loaded.index is None
+
+def test_load_accepts_unstamped_index(faiss_index, tmp_path):
+    """Test that indexes saved before stamping load as the default model."""
+    metadata_path = tmp_path / "faiss_index_metadata.json"
+    save_data = json.loads(metadata_path.read_text())
+    del save_data['index_info']
+    metadata_path.write_text(json.dumps(save_data))
+    
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    assert loaded.index_info['embedding_dimension'] == DIMENSION
+
+def test_document_index_ranks_sources(faiss_index):
+    """Test that documents are ranked by their chunk centroid."""
+    query = faiss_index.get_embeddings([2, 3]).mean(axis=0)
+    assert faiss_index.search_documents(query, top_docs=1) == [["b.txt"]]
+    assert faiss_index.doc_sources == ["a.txt", "b.txt", "c.txt"]
+    assert faiss_index.search_documents(
+        query, top_docs=3, allowed_ids=np.array([0, 5])
+    )[0] in (["a.txt", "c.txt"], ["c.txt", "a.txt"])
+
+def test_hierarchical_search(faiss_index):
+    """Test that the two-stage search only ranks chunks of the top documents
+    and matches the flat search when every document is selected."""
+    queries = np.stack([faiss_index.index.reconstruct(i) for i in (2, 5)])
+    flat = faiss_index.search_batch(queries, top_k=6)
+    full = faiss_index.hierarchical_search_batch(queries, top_k=6, top_docs=3)
+    assert [[r['index_id'] for r in rs] for rs in full] == \
+        [[r['index_id'] for r in rs] for rs in flat]
+    assert full[0][0]['distance'] == pytest.approx(0.0, abs=1e-5)
+    
+    narrow = faiss_index.hierarchical_search_batch(queries, top_k=6, top_docs=1)
+    assert [r['index_id'] for r in narrow[0]][0] == 2
+    assert {r['source_file'] for r in narrow[0]} == {"b.txt"}
+    assert all(len(results) == 2 for results in narrow)
+
+def test_hierarchical_search_from_config(faiss_index, tmp_path):
+    """Test that search uses the two-stage path when enabled, with filters
+    and after loading the index."""
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    loaded.config.HIERARCHICAL_SEARCH = True
+    loaded.config.HIERARCHICAL_TOP_DOCS = 1
+    
+    query = loaded.index.reconstruct(0)
+    assert {r['index_id'] for r in loaded.search(query, top_k=5)} == {0, 1}
+    filtered = loaded.search(query, top_k=5, filters={'source_file': 'c.txt'})
+    assert {r['index_id'] for r in filtered} == {4, 5}
+
+def test_document_index_built_only_when_needed(faiss_index, tmp_path):
+    """Test that loading skips the centroids with hierarchical search off
+    and the first document search builds them."""
+    loaded = configure_index(FAISSIndex(), tmp_path)
+    assert loaded.load_index()
+    assert loaded.doc_index is None
+    
+    query = loaded.index.reconstruct(0)
+    assert loaded.search_documents(query, top_docs=1) == [["a.txt"]]
+    assert loaded.doc_index.ntotal == 3
@@ -0,0 +1,113 @@
+import numpy as np
+from src.retrieval.faq_index import (
+    FAQIndex,
+    answer_questions,
+    mine_frequent_questions,
+    refresh_faq_index,
+    swaps_terms,
+)
+from conftest import make_chunks
+
+
+QUESTIONS = ["Who must meet their advisor on probation?", "What defines the credit hour?"]
+
+
+def build_faq(rag, tmp_path):
+    rag.faq = FAQIndex(path=str(tmp_path / "faq"), threshold=0.95)
+    assert answer_questions(rag, QUESTIONS, rag.faq) == 2
+    return rag.faq
+
+
+def test_faq_hit_skips_the_llm(offline_rag, tmp_path):
+    """Test that a stored question is answered without retrieval or LLM."""
+    build_faq(offline_rag, tmp_path)
+    calls = len(offline_rag.client.calls)
+
+    answer, sources = offline_rag.get_answer_with_sources(QUESTIONS[0])
+    assert answer == "This is a mock answer."
+    assert sources
+    assert len(offline_rag.client.calls) == calls
+    assert offline_rag.tracer.counters["rag.faq_hits"] == 1
+
+def test_faq_miss_falls_through(offline_rag, tmp_path):
+    """Test that unrelated questions still go through the pipeline."""
+    build_faq(offline_rag, tmp_path)
+    calls = len(offline_rag.client.calls)
+
+    offline_rag.get_answer_with_sources("Are make-up exams allowed?")
+    assert len(offline_rag.client.calls) == calls + 1
+
+def test_save_and_load(offline_rag, tmp_path):
+    """Test that answers and embeddings survive a round trip."""
+    build_faq(offline_rag, tmp_path).save()
+
+    loaded = FAQIndex(path=str(tmp_path / "faq"), threshold=0.95)
+    assert loaded.load()
+    embedding = offline_rag.embedder.generate_embedding(QUESTIONS[1])
+    hit = loaded.lookup(embedding, offline_rag.index.version)
+    assert hit['question'] == QUESTIONS[1]
+    assert hit['similarity'] > 0.99
+
+def test_stale_answers_are_refreshed(offline_rag, tmp_path):
+    """Test that answers built on old documents are not served and are
+    re-answered after the documents change."""
+    faq = build_faq(offline_rag, tmp_path)
+    old_version = offline_rag.index.version
+
+    chunks = make_chunks()
+    chunks[0]['content'] = "Students on academic probation must see the dean."
+    offline_rag.index.create_index(offline_rag.embedder.embed_chunks(chunks))
+    assert offline_rag.index.version != old_version
+
+    embedding = offline_rag.embedder.generate_embedding(QUESTIONS[0])
+    assert faq.lookup(embedding, offline_rag.index.version) is None
+    assert len(faq.stale_questions(offline_rag.index.version)) == 2
+
+    assert refresh_faq_index(offline_rag, faq) == 2
+    assert faq.stale_questions(offline_rag.index.version) == []
+    assert faq.lookup(embedding, offline_rag.index.version) is not None
+    assert len(faq) == 2
+
+def test_mine_frequent_questions():
+    """Test that logged queries are grouped and ranked by frequency."""
+    log = [
+        "What is the credit hour?",
+        "what is the credit hour",
+        "What is the  credit hour?",
+        "Who approves exams?",
+        "Who approves exams?",
+        "Is there a dress code?",
+    ]
+    assert mine_frequent_questions(log, top_n=5, min_count=2) == [
+        "What is the credit hour?",
+        "Who approves exams?",
+    ]
+
+def test_lookup_ignores_other_dimensions(tmp_path):
+    """Test that a query from another embedding model never matches."""
+    faq = FAQIndex(path=str(tmp_path / "faq"))
+    faq.add("q", np.ones(16), "a", ["s"], "v1")
+    assert faq.lookup(np.ones(8), "v1") is None
+    assert faq.lookup(np.ones(16), "v1")['answer'] == "a"
+
+def test_near_paraphrases_are_not_served(tmp_path):
+    """Test that a question swapping one term of a stored question misses
+    even at identical embeddings, while a rewording still hits."""
+    faq = FAQIndex(path=str(tmp_path / "faq"))
+    faq.add("How many days of annual leave do staff get?", np.ones(16), "a", ["s"], "v1")
+
+    for query in [
+        "How many days of sick leave do staff get?",
+        "How many days of annual leave do students get?",
+    ]:
+        assert faq.lookup(np.ones(16), "v1", query) is None
+    hit = faq.lookup(np.ones(16), "v1", "How many annual leave days does staff get?")
+    assert hit['answer'] == "a"
+
+def test_swaps_terms():
+    """Test that substituted terms and section numbers count as swaps and
+    added words do not."""
+    assert swaps_terms("What does article 4.2 cover?", "What does article 4.3 cover?")
+    assert swaps_terms("Can I appeal a grade?", "Can I appeal a suspension?")
+    assert not swaps_terms("Can I appeal a final grade?", "Can I appeal a grade?")
+    assert not swaps_terms("What are the exam rules?", "What is the exam rule?")
@@ -0,0 +1,225 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from mistralai import Mistral
+from src.models.llm_gateway import LLMGateway, LLMGatewayError, TokenBucket
+from src.utils.tracing import InMemorySink, Tracer
+
+
+class FakeMistralServer:
+    """Local HTTP server speaking the Mistral chat completions API.
+
+    ``script`` holds one behaviour per request, e.g. ``{'status': 503}`` or
+    ``{'delay': 0.5}``; requests past the script succeed immediately.
+    """
+    def __init__(self, content="Probation lasts one semester."):
+        self.content = content
+        self.script = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _next(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return self.script.pop(0) if self.script else {}
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                behaviour = fake._next()
+                try:
+                    time.sleep(behaviour.get('delay', 0))
+                    status = behaviour.get('status', 200)
+                    if status != 200:
+                        headers = {}
+                        if 'retry_after' in behaviour:
+                            headers['Retry-After'] = str(behaviour['retry_after'])
+                        self._send_json(status, {"message": "unavailable"}, headers)
+                    elif body.get("stream"):
+                        self._stream(body)
+                    else:
+                        self._send_json(200, fake.completion(body))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    fake._done()
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for word in fake.content.split(" "):
+                    chunk = {
+                        "id": "cmpl-1", "object": "chat.completion.chunk",
+                        "created": 0, "model": body["model"],
+                        "choices": [{
+                            "index": 0, "delta": {"content": word + " "},
+                            "finish_reason": None,
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+    def completion(self, body):
+        return {
+            "id": "cmpl-1", "object": "chat.completion", "created": 0,
+            "model": body["model"],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": self.content},
+            }],
+        }
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FakeMistralServer()
+    yield server
+    server.close()
+
+
+def make_gateway(server, **kwargs):
+    client = Mistral(api_key="test", server_url=server.url)
+    tracer = Tracer(InMemorySink(), enabled=True)
+    options = dict(rate_limit=0, max_concurrency=4, max_retries=3, deadline_s=5)
+    options.update(kwargs)
+    gateway = LLMGateway(client, tracer, **options)
+    gateway.backoff_base_s = 0.01
+    return gateway
+
+
+def ask(gateway):
+    response = gateway.complete(
+        model="mistral-medium",
+        messages=[{"role": "user", "content": "How long is probation?"}]
+    )
+    return response.choices[0].message.content
+
+
+def test_retries_transient_errors(server):
+    """Test that 503 and 429 responses are retried until one succeeds."""
+    server.script = [{'status': 503}, {'status': 429, 'retry_after': 0.01}]
+    gateway = make_gateway(server)
+
+    assert ask(gateway) == server.content
+    assert server.requests == 3
+    assert gateway.tracer.counters["llm.retries"] == 2
+
+def test_does_not_retry_client_errors(server):
+    """Test that a 400 fails immediately."""
+    server.script = [{'status': 400}]
+    gateway = make_gateway(server)
+
+    with pytest.raises(Exception) as error:
+        ask(gateway)
+    assert getattr(error.value, 'status_code', None) == 400
+    assert server.requests == 1
+
+def test_deadline_bounds_slow_calls(server):
+    """Test that a hung server cannot hold a call past its deadline."""
+    server.script = [{'delay': 2}, {'delay': 2}]
+    gateway = make_gateway(server, deadline_s=0.3)
+
+    start = time.monotonic()
+    with pytest.raises(LLMGatewayError):
+        ask(gateway)
+    assert time.monotonic() - start < 1.5
+
+def test_bounds_concurrency(server):
+    """Test that no more than max_concurrency requests are in flight."""
+    server.script = [{'delay': 0.1}] * 6
+    gateway = make_gateway(server, max_concurrency=2)
+
+    threads = [threading.Thread(target=ask, args=(gateway,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.requests == 6
+    assert server.max_in_flight == 2
+
+def test_rate_limit_spaces_requests(server):
+    """Test that the token bucket holds requests to the configured rate."""
+    gateway = make_gateway(server, rate_limit=20, burst=1)
+
+    start = time.monotonic()
+    for _ in range(4):
+        ask(gateway)
+    assert time.monotonic() - start >= 0.14
+
+def test_hedged_request_wins_over_slow_primary(server):
+    """Test that a slow first request is raced by a hedge."""
+    server.script = [{'delay': 1.5}]
+    gateway = make_gateway(server, hedge_after_ms=50)
+
+    start = time.monotonic()
+    assert ask(gateway) == server.content
+    assert time.monotonic() - start < 1.0
+    assert server.requests == 2
+    assert gateway.tracer.counters["llm.hedges"] == 1
+
+def test_stream_through_gateway(server):
+    """Test that streamed deltas pass through and release the slot."""
+    server.script = [{'status': 502}]
+    gateway = make_gateway(server, max_concurrency=1)
+
+    events = gateway.stream(
+        model="mistral-medium",
+        messages=[{"role": "user", "content": "How long is probation?"}]
+    )
+    text = "".join(e.data.choices[0].delta.content for e in events)
+    assert text.strip() == server.content
+    assert ask(gateway) == server.content
+
+def test_rag_model_answers_through_gateway(offline_rag, server):
+    """Test the answer path end to end against the fake server."""
+    server.script = [{'status': 503}]
+    offline_rag.llm = make_gateway(server)
+    offline_rag.client = offline_rag.llm.client
+
+    answer, sources = offline_rag.get_answer_with_sources("How long is probation?")
+    assert answer == server.content
+    assert sources
+
+def test_token_bucket_deadline():
+    """Test that the bucket refuses when a token would come too late."""
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.try_acquire()
+    assert not bucket.acquire(time.monotonic() + 0.1)
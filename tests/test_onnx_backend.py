@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+
+from src.config.config import Config
+from src.embeddings.embedder import DocumentEmbedder
+from src.embeddings.onnx_backend import OnnxEncoder, compare_encoders, export_onnx
+from conftest import TEXTS
+
+
+WORDS = sorted({word.strip('.').lower() for _, text in TEXTS for word in text.split()})
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A small random BERT sentence model built offline."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    base = tmp_path_factory.mktemp("tiny_bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+    (base / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(base / "vocab.txt")).save_pretrained(str(base))
+    torch.manual_seed(0)
+    BertModel(BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64,
+        max_position_embeddings=64
+    )).save_pretrained(str(base))
+
+    model = SentenceTransformer(modules=[
+        models.Transformer(str(base), max_seq_length=32),
+        models.Pooling(32, "mean"),
+        models.Normalize(),
+    ])
+    path = tmp_path_factory.mktemp("tiny_st")
+    model.save(str(path))
+    return str(path), model
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tiny_model, tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp("onnx"))
+    export_onnx(tiny_model[0], output_dir, quantize=True)
+    return output_dir
+
+
+def test_onnx_matches_torch(tiny_model, onnx_dir):
+    texts = [text for _, text in TEXTS] + ["probation"]
+    encoder = OnnxEncoder(onnx_dir, quantized=False, intra_op_threads=1)
+
+    agreement = compare_encoders(tiny_model[1], encoder, texts)
+    assert agreement['max_abs_diff'] < 1e-4
+    assert encoder.encode("probation").shape == (32,)
+    assert encoder.encode(texts, batch_size=2).shape == (len(texts), 32)
+
+
+def test_quantized_model_stays_close(tiny_model, onnx_dir):
+    texts = [text for _, text in TEXTS]
+    encoder = OnnxEncoder(onnx_dir, quantized=True, intra_op_threads=1)
+
+    assert compare_encoders(tiny_model[1], encoder, texts)['min_cosine'] > 0.99
+
+
+def test_embedder_uses_onnx_backend(onnx_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'EMBEDDING_BACKEND', 'onnx')
+    monkeypatch.setattr(Config, 'ONNX_MODEL_DIR', onnx_dir)
+    monkeypatch.setattr(Config, 'EMBEDDING_SERVER_SOCKET', '')
+
+    embedder = DocumentEmbedder()
+    assert isinstance(embedder.model, OnnxEncoder)
+    embeddings = embedder.generate_embeddings(["final exams", "credit hour"])
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-5)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from src.embeddings.parallel_encoder import ParallelEncoder
+from conftest import DIMENSION, FakeEncoder
+
+
+TEXTS = [f"policy chunk number {i} about topic {i % 7}" for i in range(41)]
+
+
+def broken_model():
+    """Model factory failing like a missing model download."""
+    raise OSError("model not found")
+
+
+def make_encoder(**kwargs):
+    options = dict(
+        num_workers=2, threads_per_worker=1, model_factory=FakeEncoder,
+        task_size=4, dimension=DIMENSION
+    )
+    options.update(kwargs)
+    return ParallelEncoder(**options)
+
+
+def test_encodes_in_input_order():
+    """Test that slices from several workers land in their own rows."""
+    with make_encoder() as encoder:
+        embeddings = encoder.encode(TEXTS)
+        again = encoder.encode(TEXTS[:5])
+    assert embeddings.dtype == np.float32
+    assert np.allclose(embeddings, FakeEncoder().encode(TEXTS))
+    assert np.allclose(again, embeddings[:5])
+
+def test_writes_memory_mapped_matrix(tmp_path):
+    """Test that the matrix can be written to a .npy memory map."""
+    path = str(tmp_path / "embeddings.npy")
+    with make_encoder() as encoder:
+        embeddings = encoder.encode(TEXTS, output_path=path)
+    assert isinstance(embeddings, np.memmap)
+    assert np.allclose(np.load(path), FakeEncoder().encode(TEXTS))
+
+def test_worker_failure_raises():
+    """Test that a worker that cannot load its model fails the call."""
+    with make_encoder(model_factory=broken_model) as encoder:
+        with pytest.raises(RuntimeError, match="model not found"):
+            encoder.encode(TEXTS)
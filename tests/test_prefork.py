@@ -0,0 +1,84 @@
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import threading
+import numpy as np
+import pytest
+from src.serving.prefork import PreforkServer, load_shared_model
+
+
+def request(address, path, body=None):
+    """GET or POST JSON to a worker, returning status and decoded body."""
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(
+        f"http://{address[0]}:{address[1]}{path}", data=data,
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+    except OSError:
+        return None, None
+
+
+def test_after_fork_rebuilds_per_process_state(offline_rag):
+    """Test that thread pools and the LLM gateway are replaced with the
+    same settings, and an injected client is kept."""
+    gateway = offline_rag.llm
+    executor = offline_rag.reranker._executor
+    offline_rag.after_fork(num_threads=0)
+
+    assert offline_rag.llm is not gateway
+    assert offline_rag.llm.client is offline_rag.client
+    assert offline_rag.llm.max_concurrency == gateway.max_concurrency
+    assert offline_rag.llm.bucket.rate == gateway.bucket.rate
+    assert offline_rag.reranker._executor is not executor
+
+def test_faq_refresh_starts_in_workers_not_the_launcher(offline_rag, monkeypatch):
+    """Test that the launcher never starts the FAQ refresh thread, which
+    would not survive the fork, and each worker starts its own."""
+    refreshed = threading.Event()
+    monkeypatch.setattr(
+        "src.models.rag_model.refresh_faq_index",
+        lambda rag, faq: refreshed.set()
+    )
+    offline_rag.faq.add("q", np.ones(16), "a", ["s"], "old version")
+    load_shared_model(offline_rag)
+    offline_rag.refresh_faq()
+    assert not refreshed.wait(0.2)
+
+    lock = offline_rag.faq._lock
+    offline_rag.after_fork(num_threads=0)
+    assert offline_rag.faq._lock is not lock
+    assert refreshed.wait(5)
+
+def test_forked_workers_serve_the_parent_model(offline_rag):
+    """Test that forked workers answer on the shared socket without
+    loading anything themselves."""
+    server = PreforkServer(offline_rag, "127.0.0.1", 0, workers=2, threads_per_worker=1)
+    server.start()
+    try:
+        assert len(server.pids) == 2
+        assert os.getpid() not in server.pids
+        deadline = time.monotonic() + 30
+        while request(server.address, "/ready")[0] != 200:
+            assert time.monotonic() < deadline, "workers did not become ready"
+            time.sleep(0.1)
+
+        status, body = request(
+            server.address, "/retrieve", {"query": "credit hour article 4.2"}
+        )
+        assert status == 200
+        assert "http://example.com/b.txt" in body["sources"]
+        status, body = request(server.address, "/answer", {"question": "What is probation?"})
+        assert body["answer"] == "This is a mock answer."
+    finally:
+        pids = list(server.pids)
+        server.stop()
+    for pid in pids:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
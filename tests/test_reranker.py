@@ -0,0 +1,126 @@
+import threading
+import time
+import pytest
+from src.retrieval.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores pairs by how often the query words appear in the chunk."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        time.sleep(self.delay)
+        return [
+            sum(content.lower().count(w) for w in query.lower().split())
+            for query, content in pairs
+        ]
+
+
+def make_results():
+    return [
+        {'source_file': 'a.txt', 'chunk_index': i, 'content': content}
+        for i, content in enumerate([
+            "Leave requests go to the dean.",
+            "Annual leave accrues monthly.",
+            "Annual leave and sick leave rules for annual contracts.",
+        ])
+    ]
+
+
+@pytest.fixture
+def reranker():
+    """Create a re-ranker with a fake cross-encoder."""
+    reranker = CrossEncoderReranker()
+    reranker.config.RERANK_TIME_BUDGET_MS = 1000
+    reranker._model = FakeCrossEncoder()
+    return reranker
+
+def test_rerank_orders_and_truncates(reranker):
+    """Test that candidates are re-ordered by score and cut to top_k."""
+    results = reranker.rerank("annual leave", make_results(), top_k=2)
+    assert [r['chunk_index'] for r in results] == [2, 1]
+    assert results[0]['rerank_score'] > results[1]['rerank_score']
+
+def test_rerank_uses_one_batch_and_cache(reranker):
+    """Test that scoring is batched and repeated pairs hit the cache."""
+    reranker.rerank("annual leave", make_results())
+    reranker.rerank("annual leave", make_results())
+    assert reranker.model.calls == [3]
+
+def test_rerank_falls_back_when_over_budget(reranker):
+    """Test that a slow model falls back to retrieval order."""
+    reranker._model = FakeCrossEncoder(delay=0.2)
+    reranker.config.RERANK_TIME_BUDGET_MS = 10
+    results = reranker.rerank("annual leave", make_results(), top_k=2)
+    assert [r['chunk_index'] for r in results] == [0, 1]
+    assert 'rerank_score' not in results[0]
+
+def test_model_loads_in_background_on_first_use(reranker, monkeypatch):
+    """Test that without warm-up the first request keeps retrieval order
+    while the model loads, and later requests are re-ranked."""
+    reranker._model = None
+    loaded = FakeCrossEncoder()
+
+    def load():
+        time.sleep(0.05)
+        reranker._model = loaded
+
+    monkeypatch.setattr(reranker, "warm_up", load)
+    first = reranker.rerank("annual leave", make_results(), top_k=2)
+    assert [r['chunk_index'] for r in first] == [0, 1]
+    reranker._loading.result(timeout=1)
+    second = reranker.rerank("annual leave", make_results(), top_k=2)
+    assert [r['chunk_index'] for r in second] == [2, 1]
+
+def test_concurrent_first_use_loads_the_model_once(reranker, monkeypatch):
+    """Test that warm-up and a background load racing on first use
+    build a single cross-encoder."""
+    import sentence_transformers
+
+    reranker._model = None
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        time.sleep(0.1)
+        return FakeCrossEncoder()
+
+    monkeypatch.setattr(sentence_transformers, "CrossEncoder", load)
+    threads = [threading.Thread(target=reranker.warm_up) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == [reranker.config.RERANK_MODEL]
+
+def test_overrunning_call_does_not_block_other_requests(reranker):
+    """Test that while a timed-out call still occupies every worker, new
+    requests fall back at once instead of queueing behind it."""
+    reranker.config.RERANK_WORKERS = 1
+    reranker.after_fork()
+    reranker._model = FakeCrossEncoder(delay=0.3)
+    reranker.config.RERANK_TIME_BUDGET_MS = 10
+    reranker.rerank("annual leave", make_results())
+
+    start = time.perf_counter()
+    results = reranker.rerank("sick leave", make_results(), top_k=2)
+    assert time.perf_counter() - start < 0.05
+    assert [r['chunk_index'] for r in results] == [0, 1]
+    assert reranker._model.calls == [3]
+
+def test_mmr_keeps_the_rerank_candidate_pool(offline_rag, reranker):
+    """Test that diversification before re-ranking keeps every re-rank
+    candidate instead of cutting to MMR_TOP_K."""
+    reranker._model = FakeCrossEncoder()
+    offline_rag.reranker = reranker
+    for config in (offline_rag.config, reranker.config):
+        config.RERANK_ENABLED = True
+        config.MMR_ENABLED = True
+        config.MMR_TOP_K = 2
+        config.RERANK_CANDIDATES = 6
+        config.RERANK_TOP_K = 3
+    offline_rag.get_relevant_context("exams and probation")
+    assert reranker._model.calls == [6]
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from starlette.testclient import TestClient
+from src.embeddings.embedder import DocumentEmbedder
+from src.serving.api import create_app
+from src.serving.batcher import EmbeddingBatcher
+from conftest import FakeEncoder
+
+
+@pytest.fixture
+def client(offline_rag):
+    """Create a test client serving the offline RAG model."""
+    with TestClient(create_app(offline_rag)) as client:
+        yield client
+
+def test_health_and_ready(client):
+    """Test the liveness and readiness endpoints."""
+    assert client.get("/health").json() == {"status": "ok"}
+    body = client.get("/ready").json()
+    assert body["ready"] is True
+    assert body["latency_ms"]["cold_query_ms"] > 0
+    assert body["latency_ms"]["first_query_ms"] is None
+
+def test_ready_reports_first_and_steady_latency(client):
+    """Test that served retrievals after warm-up are recorded apart from
+    the warm-up queries."""
+    for _ in range(3):
+        client.post("/retrieve", json={"query": "credit hour"})
+    latency = client.get("/ready").json()["latency_ms"]
+    assert latency["first_query_ms"] > 0
+    assert latency["steady_query_ms"] > 0
+
+def test_failed_warm_up_is_not_ready(offline_rag, monkeypatch):
+    """Test that readiness waits for a successful warm-up."""
+    def broken(*args, **kwargs):
+        raise RuntimeError("index pages unavailable")
+
+    monkeypatch.setattr(offline_rag.index, "search", broken)
+    monkeypatch.setattr(offline_rag.index, "hybrid_search", broken)
+    with TestClient(create_app(offline_rag)) as client:
+        assert client.get("/ready").status_code == 503
+        assert client.post("/retrieve", json={"query": "credit"}).status_code == 503
+
+def test_retrieve(client):
+    """Test that retrieval returns context and sources."""
+    response = client.post("/retrieve", json={"query": "credit hour article 4.2"})
+    assert response.status_code == 200
+    body = response.json()
+    assert "Article 4.2" in body["context"]
+    assert "http://example.com/b.txt" in body["sources"]
+
+def test_retrieve_with_filters(client):
+    """Test that filters are passed through to the index."""
+    response = client.post("/retrieve", json={
+        "query": "credit hour", "filters": {"source_file": "c.txt"}
+    })
+    assert response.json()["sources"] == ["http://example.com/c.txt"]
+
+def test_retrieve_rejects_malformed_filters(client):
+    """Test that filters other than a dict of strings or string lists are
+    rejected with 400."""
+    for filters in ["c.txt", ["c.txt"], {"source_file": 3}, {"source_file": ["c.txt", None]}]:
+        response = client.post("/retrieve", json={"query": "credit hour", "filters": filters})
+        assert response.status_code == 400
+    response = client.post("/retrieve", json={
+        "query": "credit hour", "filters": {"source_file": ["b.txt", "c.txt"]}
+    })
+    assert response.status_code == 200
+
+def test_answer(client):
+    """Test that the answer endpoint returns the LLM answer and sources."""
+    response = client.post("/answer", json={"question": "What is probation?"})
+    assert response.status_code == 200
+    assert response.json()["answer"] == "This is a mock answer."
+    assert response.json()["sources"]
+
+def test_answer_requires_question(client):
+    """Test that an invalid body is rejected."""
+    assert client.post("/answer", json={}).status_code == 400
+    assert client.post("/answer", content=b"not json").status_code == 400
+
+def test_answer_stream(client):
+    """Test that the streaming endpoint emits tokens and then sources."""
+    with client.stream(
+        "POST", "/answer/stream", json={"question": "What is probation?"}
+    ) as response:
+        body = "".join(response.iter_text())
+    
+    events = [block for block in body.split("\n\n") if block]
+    tokens = [
+        json.loads(e.split("data: ", 1)[1])["text"]
+        for e in events if e.startswith("event: token")
+    ]
+    assert "".join(tokens).strip() == "This is a mock answer."
+    assert events[-1].startswith("event: done")
+    assert json.loads(events[-1].split("data: ", 1)[1])["sources"]
+
+def test_batcher_coalesces_concurrent_queries():
+    """Test that concurrent embeds share one encode call."""
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(
+        DocumentEmbedder(model=encoder), window_ms=50, max_batch_size=32
+    )
+    texts = [f"query number {i}" for i in range(8)]
+    
+    async def run():
+        results = await asyncio.gather(*(batcher.embed(t) for t in texts))
+        await batcher.stop()
+        return results
+    
+    results = asyncio.run(run())
+    assert list(batcher.batch_sizes) == [8]
+    assert encoder.calls == 1
+    for text, embedding in zip(texts, results):
+        assert np.allclose(embedding, encoder.encode(text))
+
+def test_batcher_fails_requests_when_encoding_fails():
+    """Test that an encoder error reaches every waiting request instead of
+    zero vectors, and that the batch size history is bounded."""
+    class BrokenEncoder:
+        def encode(self, *args, **kwargs):
+            raise ValueError("model failed")
+
+    batcher = EmbeddingBatcher(DocumentEmbedder(model=BrokenEncoder()), window_ms=20)
+
+    async def run():
+        results = await asyncio.gather(
+            *(batcher.embed(f"query {i}") for i in range(3)), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(run()))
+    assert batcher.batch_sizes.maxlen == batcher.config.SERVING_BATCH_HISTORY
+
+def test_embedding_failure_is_503(client, offline_rag, monkeypatch):
+    """Test that a failing encoder is reported as unavailable, not answered."""
+    def fail(*args, **kwargs):
+        raise RuntimeError("encoder down")
+
+    monkeypatch.setattr(offline_rag.embedder.model, "encode", fail)
+    assert client.post("/answer", json={"question": "What is probation?"}).status_code == 503
+    assert client.post("/retrieve", json={"query": "probation"}).status_code == 503
@@ -0,0 +1,208 @@
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+import numpy as np
+import pytest
+from src.retrieval.faiss_index import FAISSIndex
+from src.retrieval.sharded_index import (
+    ShardedIndex,
+    ShardServer,
+    assign_shards,
+    build_shards,
+    shard_path,
+)
+from src.utils.rpc import RPCClient, connect, make_server
+from conftest import DIMENSION
+
+
+def make_index():
+    index = FAISSIndex()
+    index.config.EMBEDDING_DIMENSION = DIMENSION
+    return index
+
+
+def serve_shard(path, address):
+    """Serve a test shard in its own process."""
+    ShardServer(path, address, make_index()).serve_forever()
+
+
+@pytest.fixture
+def shards(tmp_path, embeddings_dict):
+    """Two shards built in worker processes, one on a Unix socket and one
+    on TCP, and a connected coordinator."""
+    shard_dir = str(tmp_path / "shards")
+    build_shards(embeddings_dict, num_shards=2, shard_dir=shard_dir, workers=2)
+    servers = [
+        ShardServer(shard_path(shard_dir, 0), str(tmp_path / "shard_0.sock"), make_index()),
+        ShardServer(shard_path(shard_dir, 1), "127.0.0.1:0", make_index()),
+    ]
+    for server in servers:
+        server.start()
+    index = ShardedIndex([s.address for s in servers], shard_dir, timeout=1)
+    index.config.EMBEDDING_DIMENSION = DIMENSION
+    assert index.load_index()
+    yield index, servers
+    index.close()
+    for server in servers:
+        server.stop()
+
+
+def test_assign_shards_keeps_documents_whole(embeddings_dict):
+    """Test that every document lands on exactly one shard."""
+    groups = assign_shards(embeddings_dict, 2)
+    sources = [
+        {embeddings_dict[c]['metadata']['source_file'] for c in group}
+        for group in groups
+    ]
+    assert sorted(len(group) for group in groups) == [2, 4]
+    assert not sources[0] & sources[1]
+
+def test_scatter_gather_matches_single_index(shards, faiss_index):
+    """Test that merged shard results equal a search over one index."""
+    index, _ = shards
+    queries = np.stack([faiss_index.index.reconstruct(i) for i in (1, 4)])
+    expected = faiss_index.search_batch(queries, top_k=4)
+    batch = index.search_batch(queries, top_k=4)
+
+    for results, reference in zip(batch, expected):
+        assert [r['index_id'] for r in results] == [r['index_id'] for r in reference]
+        assert [r['content'] for r in results] == [r['content'] for r in reference]
+        assert [r['distance'] for r in results] == pytest.approx(
+            [r['distance'] for r in reference], abs=1e-5
+        )
+    assert index.version == faiss_index.version
+    np.testing.assert_allclose(
+        index.get_embeddings([4, 0]), faiss_index.get_embeddings([4, 0])
+    )
+
+def test_filters_and_hybrid_search(shards, faiss_index):
+    """Test that filters and hybrid search go through the shards."""
+    index, _ = shards
+    query = faiss_index.index.reconstruct(0)
+    filtered = index.search(query, top_k=5, filters={'source_file': 'c.txt'})
+    assert {r['index_id'] for r in filtered} == {4, 5}
+
+    results = index.hybrid_search("article 4.2", query, top_k=3)
+    assert 2 in [r['index_id'] for r in results]
+    scores = [r['rrf_score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_hybrid_search_fuses_across_shards(shards, faiss_index):
+    """Test that hybrid results are ranked over all shards, not taken in
+    turn from each, when the best hits all sit on one shard."""
+    index, _ = shards
+    query = faiss_index.get_embeddings([0, 1]).mean(axis=0)
+    results = index.hybrid_search("probation", query, top_k=3)
+    expected = faiss_index.hybrid_search("probation", query, top_k=3)
+
+    assert [r['index_id'] for r in results] == [r['index_id'] for r in expected]
+    assert {r['index_id'] for r in results[:2]} == {0, 1}
+    assert [r['rrf_score'] for r in results] == pytest.approx(
+        [r['rrf_score'] for r in expected]
+    )
+
+def test_rebuilt_shard_of_the_same_size_is_rejected(tmp_path, embeddings_dict):
+    """Test that a shard built from other documents is refused even when
+    its vector count matches the manifest."""
+    shard_dir, other_dir = str(tmp_path / "shards"), str(tmp_path / "other")
+    build_shards(embeddings_dict, num_shards=2, shard_dir=shard_dir, workers=1)
+    for item in embeddings_dict.values():
+        item['metadata']['content'] += " (revised)"
+    build_shards(embeddings_dict, num_shards=2, shard_dir=other_dir, workers=1)
+
+    servers = [
+        ShardServer(shard_path(shard_dir, 0), str(tmp_path / "shard_0.sock"), make_index()),
+        ShardServer(shard_path(other_dir, 1), str(tmp_path / "shard_1.sock"), make_index()),
+    ]
+    for server in servers:
+        server.start()
+    index = ShardedIndex([s.address for s in servers], shard_dir, timeout=1)
+    index.config.EMBEDDING_DIMENSION = DIMENSION
+    try:
+        assert not index.load_index()
+    finally:
+        index.close()
+        for server in servers:
+            server.stop()
+
+def test_failed_shard_returns_partial_results(tmp_path, embeddings_dict, faiss_index):
+    """Test that a shard process dying degrades to the other shards' results."""
+    shard_dir = str(tmp_path / "shards")
+    build_shards(embeddings_dict, num_shards=2, shard_dir=shard_dir, workers=1)
+    local = ShardServer(shard_path(shard_dir, 0), str(tmp_path / "shard_0.sock"), make_index())
+    local.start()
+    remote_address = str(tmp_path / "shard_1.sock")
+    remote = multiprocessing.get_context("spawn").Process(
+        target=serve_shard, args=(shard_path(shard_dir, 1), remote_address)
+    )
+    remote.start()
+    try:
+        index = ShardedIndex([local.address, remote_address], shard_dir, timeout=10)
+        index.config.EMBEDDING_DIMENSION = DIMENSION
+        assert index.load_index()
+        query = faiss_index.index.reconstruct(0)
+        assert len(index.search(query, top_k=6)) == 6
+
+        remote.terminate()
+        remote.join()
+        for client in index._clients:
+            client.timeout = 0.2
+        results = index.search(query, top_k=6)
+        assert 0 < len(results) < 6
+    finally:
+        remote.terminate()
+        local.stop()
+
+def test_shard_rejects_pickled_messages(shards, tmp_path):
+    """Test that a pickled payload sent to a TCP shard is refused, not
+    unpickled, and that the shard keeps serving."""
+    index, servers = shards
+    marker = tmp_path / "pwned"
+
+    class Exploit:
+        def __reduce__(self):
+            return (open, (str(marker), "w"))
+
+    payload = pickle.dumps(Exploit())
+    sock = connect(servers[1].address, timeout=1)
+    try:
+        sock.sendall(struct.pack('!QQ', len(payload), 0) + payload)
+        assert sock.recv(1) == b""
+    finally:
+        sock.close()
+    assert not marker.exists()
+    assert index.search(np.ones(DIMENSION, dtype='float32'), top_k=2)
+
+def test_shard_rejects_oversized_messages(shards):
+    """Test that a header announcing a huge message drops the connection
+    before anything is buffered."""
+    _, servers = shards
+    sock = connect(servers[1].address, timeout=1)
+    try:
+        sock.sendall(struct.pack('!QQ', 1 << 30, 0))
+        assert sock.recv(1) == b""
+    finally:
+        sock.close()
+
+def test_timed_out_call_does_not_read_a_stale_reply(tmp_path):
+    """Test that a reply arriving after its call timed out is never
+    returned to the next call on the same thread."""
+    def handle(message):
+        time.sleep(message['delay'])
+        return {'n': message['n']}
+
+    address = str(tmp_path / "slow.sock")
+    server = make_server(address, handle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = RPCClient(address, timeout=0.2)
+    try:
+        with pytest.raises(TimeoutError):
+            client.call({'n': 1, 'delay': 0.4})
+        time.sleep(0.4)
+        assert client.call({'n': 2, 'delay': 0}) == {'n': 2}
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()